@@ -1,5 +1,6 @@
 from __future__ import with_statement
 
+import os
 from datetime import datetime
 
 import importlib
@@ -12,7 +13,7 @@ from django.template.response import TemplateResponse
 from django.contrib import messages
 from django.contrib.admin.models import LogEntry, ADDITION, CHANGE, DELETION
 from django.contrib.contenttypes.models import ContentType
-from django.http import HttpResponseRedirect, HttpResponse
+from django.http import HttpResponseRedirect, HttpResponse, StreamingHttpResponse
 from django.core.urlresolvers import reverse
 from django.conf import settings
 from django.template.defaultfilters import pluralize
@@ -52,6 +53,18 @@ if isinstance(TMP_STORAGE_CLASS, six.string_types):
         msg = "Could not import '%s' for import_export setting 'IMPORT_EXPORT_TMP_STORAGE_CLASS'" % TMP_STORAGE_CLASS
         raise ImportError(msg)
 
+LOOKUP_CACHE_CLASS = getattr(settings, 'IMPORT_EXPORT_LOOKUP_CACHE_CLASS',
+                             None)
+if isinstance(LOOKUP_CACHE_CLASS, six.string_types):
+    try:
+        parts = LOOKUP_CACHE_CLASS.split('.')
+        module_path, class_name = '.'.join(parts[:-1]), parts[-1]
+        module = importlib.import_module(module_path)
+        LOOKUP_CACHE_CLASS = getattr(module, class_name)
+    except ImportError:
+        msg = "Could not import '%s' for import_export setting 'IMPORT_EXPORT_LOOKUP_CACHE_CLASS'" % LOOKUP_CACHE_CLASS
+        raise ImportError(msg)
+
 #: These are the default formats for import and export. Whether they can be
 #: used or not is depending on their implementation in the tablib library.
 DEFAULT_FORMATS = (
@@ -94,6 +107,8 @@ class ImportMixin(ImportExportMixinBase):
     skip_admin_log = None
     # storage class for saving temporary files
     tmp_storage_class = None
+    # class of the cache keeping instance lookups between dry run and import
+    lookup_cache_class = None
 
     def get_skip_admin_log(self):
         if self.skip_admin_log is None:
@@ -107,6 +122,24 @@ class ImportMixin(ImportExportMixinBase):
         else:
             return self.tmp_storage_class
 
+    def get_lookup_cache_class(self):
+        if self.lookup_cache_class is None:
+            return LOOKUP_CACHE_CLASS
+        else:
+            return self.lookup_cache_class
+
+    def get_lookup_cache(self, import_file_name):
+        """
+        Returns the lookup cache shared by the dry run and the import of
+        ``import_file_name``, or ``None`` if no lookup cache is used.
+        """
+        lookup_cache_class = self.get_lookup_cache_class()
+        if lookup_cache_class is None:
+            return None
+        # the name of the dry run's temporary file, as cleaned by
+        # ConfirmImportForm for the import
+        return lookup_cache_class(os.path.basename(import_file_name))
+
     def get_urls(self):
         urls = super(ImportMixin, self).get_urls()
         info = self.get_model_info()
@@ -165,14 +198,19 @@ class ImportMixin(ImportExportMixinBase):
             result = self.process_dataset(dataset, confirm_form, request, *args, **kwargs)
 
             tmp_storage.remove()
+            lookup_cache = self.get_lookup_cache(tmp_storage.name)
+            if lookup_cache is not None:
+                lookup_cache.remove()
 
             return self.process_result(result, request)
 
     def process_dataset(self, dataset, confirm_form, request, *args, **kwargs):
         resource = self.get_import_resource_class()(**self.get_import_resource_kwargs(request, *args, **kwargs))
+        lookup_cache = self.get_lookup_cache(confirm_form.cleaned_data['import_file_name'])
         return resource.import_data(dataset,
                                     dry_run=False,
                                     raise_errors=True,
+                                    lookup_cache=lookup_cache,
                                     file_name=confirm_form.cleaned_data['original_file_name'],
                                     user=request.user,
                                     **kwargs)
@@ -268,6 +306,7 @@ class ImportMixin(ImportExportMixinBase):
                 return HttpResponse(_(u"<h1>%s encountered while trying to read file: %s</h1>" % (type(e).__name__, import_file.name)))
             result = resource.import_data(dataset, dry_run=True,
                                           raise_errors=False,
+                                          lookup_cache=self.get_lookup_cache(tmp_storage.name),
                                           file_name=import_file.name,
                                           user=request.user)
 
@@ -309,6 +348,9 @@ class ExportMixin(ImportExportMixinBase):
     formats = DEFAULT_FORMATS
     #: export data encoding
     to_encoding = "utf-8"
+    #: stream exports in formats supporting it instead of building the whole
+    #: file in memory
+    export_streaming = False
 
     def get_urls(self):
         urls = super(ExportMixin, self).get_urls()
@@ -384,6 +426,52 @@ class ExportMixin(ImportExportMixinBase):
         export_data = file_format.export_data(data)
         return export_data
 
+    def can_stream_export(self, file_format):
+        """
+        Returns if the export in ``file_format`` is streamed, that is if
+        ``export_streaming`` is set, the format supports streaming and
+        ``get_export_data`` is not overridden.
+        """
+        return (self.export_streaming and file_format.can_stream() and
+                six.get_unbound_function(type(self).get_export_data) is
+                six.get_unbound_function(ExportMixin.get_export_data))
+
+    def get_export_stream(self, file_format, queryset, *args, **kwargs):
+        """
+        Returns a generator of the file_format representation of the given
+        queryset, see
+        :meth:`~import_export.resources.Resource.iter_export`.
+        """
+        request = kwargs.pop("request")
+        resource_class = self.get_export_resource_class()
+        resource = resource_class(**self.get_export_resource_kwargs(request))
+        return file_format.stream_export(
+            resource.get_export_headers(),
+            resource.iter_export(queryset, *args, **kwargs))
+
+    def get_export_response(self, file_format, queryset, request):
+        """
+        Returns the response of an export of ``queryset`` in
+        ``file_format``, a ``StreamingHttpResponse`` if
+        :meth:`~import_export.admin.ExportMixin.can_stream_export`.
+        """
+        content_type = file_format.get_content_type()
+        if self.can_stream_export(file_format):
+            response = StreamingHttpResponse(
+                self.get_export_stream(file_format, queryset, request=request),
+                content_type=content_type)
+        else:
+            export_data = self.get_export_data(file_format, queryset, request=request)
+            # Django 1.7 uses the content_type kwarg instead of mimetype
+            try:
+                response = HttpResponse(export_data, content_type=content_type)
+            except TypeError:
+                response = HttpResponse(export_data, mimetype=content_type)
+        response['Content-Disposition'] = 'attachment; filename=%s' % (
+            self.get_export_filename(file_format),
+        )
+        return response
+
     def get_export_context_data(self, **kwargs):
         return self.get_context_data(**kwargs)
 
@@ -399,16 +487,7 @@ class ExportMixin(ImportExportMixinBase):
             ]()
 
             queryset = self.get_export_queryset(request)
-            export_data = self.get_export_data(file_format, queryset, request=request)
-            content_type = file_format.get_content_type()
-            # Django 1.7 uses the content_type kwarg instead of mimetype
-            try:
-                response = HttpResponse(export_data, content_type=content_type)
-            except TypeError:
-                response = HttpResponse(export_data, mimetype=content_type)
-            response['Content-Disposition'] = 'attachment; filename=%s' % (
-                self.get_export_filename(file_format),
-            )
+            response = self.get_export_response(file_format, queryset, request)
 
             post_export.send(sender=None, model=self.model)
             return response
@@ -478,17 +557,7 @@ class ExportActionModelAdmin(ExportMixin, admin.ModelAdmin):
             formats = self.get_export_formats()
             file_format = formats[int(export_format)]()
 
-            export_data = self.get_export_data(file_format, queryset, request=request)
-            content_type = file_format.get_content_type()
-            # Django 1.7 uses the content_type kwarg instead of mimetype
-            try:
-                response = HttpResponse(export_data, content_type=content_type)
-            except TypeError:
-                response = HttpResponse(export_data, mimetype=content_type)
-            response['Content-Disposition'] = 'attachment; filename=%s' % (
-                self.get_export_filename(file_format),
-            )
-            return response
+            return self.get_export_response(file_format, queryset, request)
     export_admin_action.short_description = _(
         'Export selected %(verbose_name_plural)s')
 
@@ -1,6 +1,6 @@
 from __future__ import unicode_literals
 
-from django.db import transaction
+from django.db import connections, transaction
 
 # transaction management for Django < 1.6
 
@@ -25,3 +25,55 @@ def savepoint_rollback(*args, **kwargs):
 def savepoint_commit(*args, **kwargs):
     transaction.commit()
     transaction.leave_transaction_management()
+
+
+def bulk_update(queryset, objs, fields, batch_size=None):
+    """
+    Updates ``fields`` of ``objs`` with one ``CASE ... WHEN`` update query
+    per batch, like ``QuerySet.bulk_update`` of Django >= 2.2 does.
+
+    Requires Django >= 1.8.
+    """
+    from django.db.models import Case, Value, When
+    try:
+        from django.db.models.functions import Cast
+    except ImportError:
+        # Django < 1.10
+        Cast = None
+
+    if not objs or not fields:
+        return
+    connection = connections[queryset.db]
+    model_fields = [queryset.model._meta.get_field(name) for name in fields]
+    max_batch_size = connection.ops.bulk_batch_size(
+        ['pk', 'pk'] + model_fields, objs)
+    batch_size = min(batch_size, max_batch_size) if batch_size else max_batch_size
+    # PostgreSQL can't infer the type of a CASE with only parameters
+    requires_casting = Cast is not None and connection.vendor == 'postgresql'
+    for i in range(0, len(objs), batch_size):
+        batch = objs[i:i + batch_size]
+        updates = {}
+        for field in model_fields:
+            whens = [
+                When(pk=obj.pk, then=Value(getattr(obj, field.attname),
+                                           output_field=field))
+                for obj in batch]
+            case = Case(*whens, output_field=field)
+            if requires_casting:
+                case = Cast(case, output_field=field)
+            updates[field.attname] = case
+        queryset.filter(pk__in=[obj.pk for obj in batch]).update(**updates)
+
+
+def prefetch_related_objects(model_instances, *related_lookups):
+    """
+    Prefetches ``related_lookups`` of ``model_instances`` like
+    ``django.db.models.prefetch_related_objects`` of Django >= 1.10 does.
+    """
+    try:
+        from django.db.models import prefetch_related_objects
+    except ImportError:
+        # Django < 1.10
+        from django.db.models.query import prefetch_related_objects
+        return prefetch_related_objects(model_instances, related_lookups)
+    return prefetch_related_objects(model_instances, *related_lookups)
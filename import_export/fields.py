@@ -1,5 +1,7 @@
 from __future__ import unicode_literals
 
+from operator import attrgetter
+
 from . import widgets
 
 from django.core.exceptions import ObjectDoesNotExist
@@ -50,10 +52,15 @@ class Field(object):
             return '<%s: %s>' % (path, column_name)
         return '<%s>' % path
 
-    def clean(self, data):
+    def clean(self, data, cleaned=NOT_PROVIDED, **kwargs):
         """
         Translates the value stored in the imported datasource to an
         appropriate Python object and returns it.
+
+        ``cleaned`` is the value of ``data`` already cleaned by
+        :meth:`~import_export.fields.Field.clean_column`, or the exception
+        raised cleaning it. Keyword arguments are passed to the widget's
+        ``clean`` method.
         """
         try:
             value = data[self.column_name]
@@ -63,7 +70,12 @@ class Field(object):
                                                 list(data.keys())))
 
         try:
-            value = self.widget.clean(value, row=data)
+            if cleaned is NOT_PROVIDED:
+                value = self.widget.clean(value, row=data, **kwargs)
+            elif isinstance(cleaned, Exception):
+                raise cleaned
+            else:
+                value = cleaned
         except ValueError as e:
             raise ValueError("Column '%s': %s" % (self.column_name, e))
 
@@ -100,7 +112,16 @@ class Field(object):
             value = value()
         return value
 
-    def save(self, obj, data):
+    def clean_column(self, values):
+        """
+        Translates ``values``, the values of this field's column in the
+        imported datasource, at once with the widget's ``clean_column``
+        method. Returns the list of cleaned values, holding the exception
+        raised for each value which can't be cleaned.
+        """
+        return self.widget.clean_column(values)
+
+    def save(self, obj, data, cleaned=NOT_PROVIDED, **kwargs):
         """
         If this field is not declared readonly, the object's attribute will
         be set to the value returned by :meth:`~import_export.fields.Field.clean`.
@@ -109,7 +130,59 @@ class Field(object):
             attrs = self.attribute.split('__')
             for attr in attrs[:-1]:
                 obj = getattr(obj, attr, None)
-            setattr(obj, attrs[-1], self.clean(data))
+            setattr(obj, attrs[-1], self.clean(data, cleaned, **kwargs))
+
+    def get_setter(self):
+        """
+        Returns a function setting the attribute of an object to a cleaned
+        value like :meth:`~import_export.fields.Field.save`, with
+        ``attribute`` parsed once.
+        """
+        attrs = self.attribute.split('__')
+        name = attrs[-1]
+        if len(attrs) == 1:
+            return lambda obj, value: setattr(obj, name, value)
+        path = attrs[:-1]
+
+        def setter(obj, value):
+            for attr in path:
+                obj = getattr(obj, attr, None)
+            setattr(obj, name, value)
+        return setter
+
+    def get_exporter(self):
+        """
+        Returns a function returning the export representation of an object
+        like :meth:`~import_export.fields.Field.export`, with ``attribute``
+        parsed once into an ``attrgetter``.
+
+        Returns ``export`` itself if a subclass overrides it or
+        :meth:`~import_export.fields.Field.get_value`.
+        """
+        cls = type(self)
+        if (cls.export != Field.export or cls.get_value != Field.get_value or
+                self.attribute is None):
+            return self.export
+        get = attrgetter(self.attribute.replace('__', '.'))
+        render = self.widget.render
+
+        def exporter(obj):
+            try:
+                value = get(obj)
+            except (AttributeError, ValueError, ObjectDoesNotExist):
+                # missing attributes are exported as empty values, see
+                # get_value
+                return ""
+            if value is None:
+                return ""
+            # RelatedManager and ManyRelatedManager classes are callable in
+            # Django >= 1.7 but we don't want to call them
+            if callable(value) and not isinstance(value, Manager):
+                value = value()
+                if value is None:
+                    return ""
+            return render(value, obj)
+        return exporter
 
     def export(self, obj):
         """
@@ -1,9 +1,15 @@
 from __future__ import unicode_literals
 from django.utils.six import moves
 
+import json
 import sys
+from itertools import chain
 import warnings
+from collections import OrderedDict
+from decimal import Decimal
+
 import tablib
+from tablib.compat import StringIO, csv, is_py3
 
 try:
     from tablib.compat import xlrd
@@ -86,6 +92,21 @@ class Format(object):
     def can_export(self):
         return False
 
+    def stream_export(self, headers, rows, **kwargs):
+        """
+        Returns a generator of the format representation of ``headers`` and
+        ``rows``, an iterable of rows, in chunks, without building the
+        whole representation.
+        """
+        raise NotImplementedError()
+
+    def can_stream(self):
+        """
+        Returns if this format supports
+        :meth:`~import_export.formats.base_formats.Format.stream_export`.
+        """
+        return False
+
 
 class TablibFormat(Format):
     TABLIB_MODULE = None
@@ -135,10 +156,33 @@ class TextFormat(TablibFormat):
         return False
 
 
+def stream_csv(headers, rows, **kwargs):
+    """
+    Returns a generator of the lines of the CSV representation of
+    ``headers`` and ``rows``, written like ``tablib`` does.
+    """
+    kwargs.setdefault('delimiter', ',')
+    if not is_py3:
+        kwargs.setdefault('encoding', 'utf-8')
+    stream = StringIO()
+    writer = csv.writer(stream, **kwargs)
+    for row in chain([headers], rows):
+        writer.writerow(row)
+        yield stream.getvalue()
+        stream.seek(0)
+        stream.truncate()
+
+
 class CSV(TextFormat):
     TABLIB_MODULE = 'tablib.formats._csv'
     CONTENT_TYPE = 'text/csv'
 
+    def stream_export(self, headers, rows, **kwargs):
+        return stream_csv(headers, rows, **kwargs)
+
+    def can_stream(self):
+        return True
+
     def create_dataset(self, in_stream, **kwargs):
         if sys.version_info[0] < 3:
             # python 2.7 csv does not do unicode
@@ -146,10 +190,31 @@ class CSV(TextFormat):
         return super(CSV, self).create_dataset(in_stream, **kwargs)
 
 
+def json_default(obj):
+    """
+    Serializes decimals and dates like ``tablib``'s JSON format.
+    """
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    raise TypeError("%r is not JSON serializable" % obj)
+
+
 class JSON(TextFormat):
     TABLIB_MODULE = 'tablib.formats._json'
     CONTENT_TYPE = 'application/json'
 
+    def stream_export(self, headers, rows, **kwargs):
+        yield '['
+        for i, row in enumerate(rows):
+            yield (', ' if i else '') + json.dumps(
+                OrderedDict(moves.zip(headers, row)), default=json_default)
+        yield ']'
+
+    def can_stream(self):
+        return True
+
 
 class YAML(TextFormat):
     TABLIB_MODULE = 'tablib.formats._yaml'
@@ -161,6 +226,13 @@ class TSV(TextFormat):
     TABLIB_MODULE = 'tablib.formats._tsv'
     CONTENT_TYPE = 'text/tab-separated-values'
 
+    def stream_export(self, headers, rows, **kwargs):
+        kwargs.setdefault('delimiter', '\t')
+        return stream_csv(headers, rows, **kwargs)
+
+    def can_stream(self):
+        return True
+
 
 class ODS(TextFormat):
     TABLIB_MODULE = 'tablib.formats._ods'
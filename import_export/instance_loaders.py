@@ -1,5 +1,34 @@
 from __future__ import unicode_literals
 
+import json
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    from django.utils.datastructures import SortedDict as OrderedDict
+
+from django.db import connections
+from django.db.models import (
+    DateField, DateTimeField, Field, Model, Q, TimeField,
+)
+from django.db.models.fields import FieldDoesNotExist
+from django.utils import six
+
+try:
+    from django.utils.encoding import force_text
+except ImportError:
+    from django.utils.encoding import force_unicode as force_text
+
+try:
+    from django.core.exceptions import EmptyResultSet
+except ImportError:
+    from django.db.models.sql.datastructures import EmptyResultSet
+
+
+#: Returned by ``get_instance`` of loaders in existence only mode for rows of
+#: existing instances, see ``CachedInstanceLoader.existence_only``.
+EXISTING = object()
+
 
 class BaseInstanceLoader(object):
     """
@@ -22,7 +51,85 @@ class ModelInstanceLoader(BaseInstanceLoader):
     """
 
     def get_queryset(self):
-        return self.resource._meta.model.objects.all()
+        queryset = self.resource._meta.model.objects.all()
+        if not self.resource._meta.load_only_fields:
+            return queryset
+        only, related = self.get_load_fields()
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*only)
+
+    def get_load_fields(self):
+        """
+        Returns the field names passed to ``only()`` and ``select_related()``
+        of the queryset, as a tuple of two lists.
+
+        Loaded fields are the primary key, the model fields the resource's
+        fields read or write and the fields changing when instances are
+        saved, see
+        :meth:`~import_export.instance_loaders.ModelInstanceLoader.has_pre_save_effect`.
+        Foreign keys followed by attributes using ``__`` are selected with
+        the instances.
+        """
+        opts = self.resource._meta.model._meta
+        only = set([opts.pk.name])
+        only.update(f.name for f in opts.concrete_fields
+                    if self.has_pre_save_effect(f))
+        related = set()
+        for field in self.resource.get_fields():
+            if not field.attribute:
+                continue
+            path = self._get_field_path(field.attribute)
+            for i in range(1, len(path) + 1):
+                only.add('__'.join(path[:i]))
+            related.update('__'.join(path[:i]) for i in range(1, len(path)))
+        return sorted(only), sorted(related)
+
+    def limit_chunk_size(self, chunk_size, params_per_key=1):
+        """
+        Returns ``chunk_size`` limited to the number of keys of
+        ``params_per_key`` query parameters each the database allows in a
+        single query.
+        """
+        connection = connections[self.get_queryset().db]
+        if connection.vendor == 'sqlite':
+            # SQLite allows 999 query parameters by default
+            return min(chunk_size, 999 // params_per_key)
+        return chunk_size
+
+    def has_pre_save_effect(self, model_field):
+        """
+        Returns ``True`` if ``model_field`` changes its value when an
+        instance is saved, like fields with ``auto_now`` or fields of classes
+        overriding ``pre_save``. ``Model.save()`` only saves the loaded
+        fields of instances with deferred fields, so these must be loaded.
+        """
+        if getattr(model_field, 'auto_now', False):
+            return True
+        pre_save = six.get_unbound_function(type(model_field).pre_save)
+        return pre_save not in (
+            six.get_unbound_function(getattr(cls, 'pre_save'))
+            for cls in (Field, DateField, DateTimeField, TimeField))
+
+    def _get_field_path(self, attribute):
+        """
+        Returns the leading names of the ``__`` separated ``attribute`` which
+        are concrete model fields, following foreign keys.
+        """
+        model = self.resource._meta.model
+        path = []
+        for name in attribute.split('__'):
+            if model is None:
+                break
+            try:
+                model_field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                break
+            if model_field not in model._meta.concrete_fields:
+                break
+            path.append(name)
+            model = model_field.rel.to if model_field.rel else None
+        return path
 
     def get_instance(self, row):
         try:
@@ -40,24 +147,375 @@ class CachedInstanceLoader(ModelInstanceLoader):
     Loads all possible model instances in dataset avoid hitting database for
     every ``get_instance`` call.
 
-    This instance loader work only when there is one ``import_id_fields``
-    field.
+    Instances are cached by their ``import_id_fields`` values: the value
+    itself if there is one ``import_id_fields`` field, a tuple of the values
+    for composite keys.
+
+    Instances are loaded in chunks of ``chunk_size`` keys, in the order keys
+    first appear in the dataset. Set ``lazy`` to load a chunk only when a
+    row of the chunk is imported, and ``max_instances`` to limit the number
+    of cached instances.
+
+    Set ``existence_only`` for imports which never modify existing
+    instances: only the keys of existing instances are loaded, and
+    ``get_instance`` returns :data:`EXISTING` for their rows, which are
+    skipped by the import.
     """
 
+    #: Maximum number of keys looked up by a single query.
+    chunk_size = 1000
+
+    #: If ``True``, chunks are loaded when the import reaches their rows
+    #: instead of all at once.
+    lazy = False
+
+    #: Maximum number of cached instances, chunks loaded first are evicted
+    #: first and loaded again if needed. ``None`` doesn't limit the cache.
+    max_instances = None
+
+    #: If ``True``, only the keys of existing instances are loaded.
+    existence_only = False
+
     def __init__(self, *args, **kwargs):
         super(CachedInstanceLoader, self).__init__(*args, **kwargs)
 
-        pk_field_name = self.resource.get_import_id_fields()[0]
-        self.pk_field = self.resource.fields[pk_field_name]
+        self.key_fields = [self.resource.fields[name] for name
+                           in self.resource.get_import_id_fields()]
+        self.pk_field = self.key_fields[0]
+
+        keys = list(OrderedDict.fromkeys(
+            self.get_key(row) for row in self.dataset.dict))
+        chunk_size = self.get_chunk_size()
+        self.chunks = [keys[i:i + chunk_size]
+                       for i in range(0, len(keys), chunk_size)]
+        self.key_chunks = dict((key, index)
+                               for index, chunk in enumerate(self.chunks)
+                               for key in chunk)
+        # keys of the instances cached by every loaded chunk
+        self.loaded_chunks = OrderedDict()
+        self.all_instances = {}
+        if not self.lazy:
+            for index in range(len(self.chunks)):
+                self.load_chunk(index)
+
+    def get_chunk_size(self):
+        """
+        Returns the number of keys looked up by a single query.
+        """
+        return self.limit_chunk_size(self.chunk_size, len(self.key_fields))
+
+    def load_chunk(self, index):
+        """
+        Loads the instances of the chunk of keys at ``index``, evicting
+        chunks loaded first if there are more than ``max_instances`` cached
+        instances.
+        """
+        queryset = self.get_queryset_for_keys(self.chunks[index])
+        if self.existence_only:
+            attributes = [field.attribute for field in self.key_fields]
+            instances = dict(
+                (self._make_key(values), EXISTING) for values
+                in queryset.values_list(*attributes))
+        else:
+            instances = dict((self.get_instance_key(instance), instance)
+                             for instance in queryset)
+        self.all_instances.update(instances)
+        self.loaded_chunks[index] = list(instances)
+        if self.max_instances is None:
+            return
+        while (len(self.all_instances) > self.max_instances and
+               len(self.loaded_chunks) > 1):
+            _, keys = self.loaded_chunks.popitem(last=False)
+            for key in keys:
+                del self.all_instances[key]
+
+    def get_key(self, row):
+        """
+        Returns the key of the instance ``row`` is imported into.
+        """
+        return self._make_key([field.clean(row) for field in self.key_fields])
+
+    def get_instance_key(self, instance):
+        """
+        Returns the key of ``instance``.
+        """
+        return self._make_key([field.get_value(instance)
+                               for field in self.key_fields])
+
+    def get_queryset_for_keys(self, keys):
+        """
+        Returns a queryset of the instances matching ``keys``.
 
-        ids = [self.pk_field.clean(row) for row in self.dataset.dict]
-        qs = self.get_queryset().filter(**{
-            "%s__in" % self.pk_field.attribute: ids
-            })
+        Composite keys are looked up with a row value ``IN`` clause where the
+        database supports it and key fields are columns of the model, with
+        ``OR`` of the key fields' lookups otherwise.
+        """
+        queryset = self.get_queryset()
+        attributes = [field.attribute for field in self.key_fields]
+        if len(attributes) == 1:
+            keys = [key for key in keys if key is not None]
+            return queryset.filter(**{"%s__in" % attributes[0]: keys})
 
-        self.all_instances = dict([
-            (self.pk_field.get_value(instance), instance)
-            for instance in qs])
+        keys = [key for key in keys if None not in key]
+        if not keys:
+            return queryset.none()
+        model_fields = self._get_key_model_fields()
+        connection = connections[queryset.db]
+        if model_fields and self._supports_row_values(connection):
+            qn = connection.ops.quote_name
+            table = qn(self.resource._meta.model._meta.db_table)
+            placeholder = "(%s)" % ", ".join(["%s"] * len(model_fields))
+            where = "(%s) IN (%s)" % (
+                ", ".join("%s.%s" % (table, qn(f.column))
+                          for f in model_fields),
+                ", ".join([placeholder] * len(keys)))
+            params = [f.get_db_prep_value(value, connection)
+                      for key in keys
+                      for f, value in zip(model_fields, key)]
+            return queryset.extra(where=[where], params=params)
+
+        q = Q()
+        for key in keys:
+            q |= Q(**dict(zip(attributes, key)))
+        return queryset.filter(q)
 
     def get_instance(self, row):
-        return self.all_instances.get(self.pk_field.clean(row))
+        key = self.get_key(row)
+        index = self.key_chunks.get(key)
+        if index is not None and index not in self.loaded_chunks:
+            self.load_chunk(index)
+        return self.all_instances.get(key)
+
+    def _make_key(self, values):
+        if self.existence_only:
+            # related keys are compared by primary key
+            values = [value.pk if isinstance(value, Model) else value
+                      for value in values]
+        if len(values) == 1:
+            return values[0]
+        return tuple(values)
+
+    def _get_key_model_fields(self):
+        """
+        Returns the model fields of the key fields, or ``None`` if a key
+        field is not a non-relational column of the model.
+        """
+        opts = self.resource._meta.model._meta
+        model_fields = []
+        for field in self.key_fields:
+            try:
+                model_field = opts.get_field(field.attribute)
+            except FieldDoesNotExist:
+                return None
+            if (model_field.rel is not None or
+                    model_field not in opts.concrete_fields):
+                return None
+            model_fields.append(model_field)
+        return model_fields
+
+    def _supports_row_values(self, connection):
+        if connection.vendor in ('postgresql', 'mysql'):
+            return True
+        if connection.vendor == 'sqlite':
+            return connection.Database.sqlite_version_info >= (3, 15, 0)
+        return False
+
+
+class HashIndexInstanceLoader(ModelInstanceLoader):
+    """
+    Loads the primary keys of all instances by their ``import_id_fields``
+    values with a single scan of the table, and the instances of the keys in
+    dataset by primary key in chunks of ``chunk_size``.
+
+    The index is kept for later imports into the same model with the same
+    queryset, as keys may only be unique within a filtered queryset, as long
+    as the resource's
+    :meth:`~import_export.resources.Resource.get_lookup_cache_version` is
+    unchanged. Instances whose key fields no longer match the row are looked
+    up again and the kept index is dropped. Call :meth:`invalidate` when key
+    fields of existing instances change, e.g. from a ``post_save`` signal
+    handler, as rows of keys missing from a kept index are imported as new
+    instances.
+    """
+
+    #: Maximum number of primary keys looked up by a single query.
+    chunk_size = 1000
+
+    #: Indexes kept by model, database, key fields and SQL of the queryset,
+    #: with their version.
+    indexes = {}
+
+    def __init__(self, *args, **kwargs):
+        super(HashIndexInstanceLoader, self).__init__(*args, **kwargs)
+        self.key_fields = [self.resource.fields[name] for name
+                           in self.resource.get_import_id_fields()]
+        self.index = self.get_index()
+
+        pks = set(self.index.get(self.get_key(row))
+                  for row in self.dataset.dict)
+        pks.discard(None)
+        pks = list(pks)
+        self.instances = {}
+        chunk_size = self.limit_chunk_size(self.chunk_size)
+        for i in range(0, len(pks), chunk_size):
+            queryset = self.get_queryset().filter(
+                pk__in=pks[i:i + chunk_size])
+            for instance in queryset:
+                self.instances[instance.pk] = instance
+
+    @classmethod
+    def invalidate(cls, model=None):
+        """
+        Drops the kept indexes of ``model``, or all of them.
+        """
+        for index_key in list(cls.indexes):
+            if model is None or index_key[0] is model:
+                del cls.indexes[index_key]
+
+    def get_index(self):
+        """
+        Returns a dict of the primary keys of all instances by key.
+        """
+        queryset = self.get_queryset()
+        attributes = tuple(field.attribute for field in self.key_fields)
+        try:
+            # keys may only be unique within a filtered queryset
+            sql = six.text_type(queryset.query)
+        except EmptyResultSet:
+            sql = None
+        self.index_key = index_key = (queryset.model, queryset.db, attributes,
+                                      sql)
+        version = self.resource.get_lookup_cache_version()
+        if version is not None and index_key in self.indexes:
+            index_version, index = self.indexes[index_key]
+            if index_version == version:
+                return index
+        index = {}
+        values = queryset.order_by().values_list('pk', *attributes)
+        for row in values.iterator():
+            index[self._make_key(row[1:])] = row[0]
+        self.indexes[index_key] = (version, index)
+        return index
+
+    def get_key(self, row):
+        """
+        Returns the key of the instance ``row`` is imported into.
+        """
+        return self._make_key([field.clean(row) for field in self.key_fields])
+
+    def get_instance_key(self, instance):
+        """
+        Returns the key of ``instance``.
+        """
+        return self._make_key([field.get_value(instance)
+                               for field in self.key_fields])
+
+    def get_instance(self, row):
+        key = self.get_key(row)
+        pk = self.index.get(key)
+        if pk is None:
+            return None
+        instance = self.instances.get(pk)
+        if instance is not None and self.get_instance_key(instance) == key:
+            return instance
+        # the index is stale, e.g. the key fields of the instance have been
+        # updated without changing the lookup cache version
+        self.indexes.pop(self.index_key, None)
+        return super(HashIndexInstanceLoader, self).get_instance(row)
+
+    def _make_key(self, values):
+        values = tuple(value.pk if isinstance(value, Model) else value
+                       for value in values)
+        if len(values) == 1:
+            return values[0]
+        return values
+
+
+class LookupCacheInstanceLoader(ModelInstanceLoader):
+    """
+    Loads instances by the primary keys a lookup cache (see
+    :mod:`import_export.lookup_caches`) has stored for their keys, and with
+    an instance of ``instance_loader_class`` for keys it doesn't know.
+
+    Instances are fetched by primary key in chunks of ``chunk_size``, and
+    only reused if their ``import_id_fields`` still match the row. Keys
+    looked up more than once are only looked up in the lookup cache the
+    first time, as later rows may see instances created by earlier rows.
+    Keys of rows for which the instance loader returns :data:`EXISTING` are
+    not stored.
+    """
+
+    #: Maximum number of primary keys looked up by a single query.
+    chunk_size = 1000
+
+    def __init__(self, resource, dataset, instance_loader_class, lookup_cache):
+        super(LookupCacheInstanceLoader, self).__init__(resource, dataset)
+        self.instance_loader_class = instance_loader_class
+        self.instance_loader = None
+        self.lookup_cache = lookup_cache
+        self.key_fields = [self.resource.fields[name] for name
+                           in self.resource.get_import_id_fields()]
+
+        pks = set()
+        for row in self.dataset.dict:
+            try:
+                pks.add(lookup_cache.loaded.get(self.get_key(row)))
+            except ValueError:
+                continue
+        pks.discard(None)
+        pks = list(pks)
+        self.instances = {}
+        chunk_size = self.limit_chunk_size(self.chunk_size)
+        for i in range(0, len(pks), chunk_size):
+            queryset = self.get_queryset().filter(
+                pk__in=pks[i:i + chunk_size])
+            for instance in queryset:
+                self.instances[force_text(instance.pk)] = instance
+
+    def get_key(self, row):
+        """
+        Returns the key of the instance ``row`` is imported into, as stored by
+        the lookup cache.
+        """
+        return self._serialize([field.clean(row) for field in self.key_fields])
+
+    def get_instance_key(self, instance):
+        """
+        Returns the key of ``instance``, as stored by the lookup cache.
+        """
+        return self._serialize([field.get_value(instance)
+                                for field in self.key_fields])
+
+    def get_instance(self, row):
+        key = self.get_key(row)
+        lookups = self.lookup_cache.lookups
+        if key in lookups:
+            return self.load_instance(row)
+        if key in self.lookup_cache.loaded:
+            pk = self.lookup_cache.loaded[key]
+            instance = self.instances.get(pk)
+            if pk is None or (instance is not None and
+                              self.get_instance_key(instance) == key):
+                lookups[key] = pk
+                return instance
+        instance = self.load_instance(row)
+        if instance is not EXISTING:
+            # rows of existing instances of loaders in existence only mode
+            # are looked up by the loader again
+            lookups[key] = (None if instance is None
+                            else force_text(instance.pk))
+        return instance
+
+    def load_instance(self, row):
+        """
+        Loads the instance of ``row`` with the instance loader the lookup
+        cache is used with.
+        """
+        if self.instance_loader is None:
+            self.instance_loader = self.instance_loader_class(self.resource,
+                                                              self.dataset)
+        return self.instance_loader.get_instance(row)
+
+    def _serialize(self, values):
+        return json.dumps([force_text(value.pk if isinstance(value, Model)
+                                      else value) for value in values])
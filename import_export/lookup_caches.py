@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import hashlib
+import json
+import os
+import tempfile
+
+from django.core.cache import cache
+from django.utils.encoding import force_bytes
+
+
+class BaseLookupCache(object):
+    """
+    Keeps the primary keys of the instances looked up by an import, so that
+    importing the same dataset again, e.g. confirming an import after its
+    dry run, can reuse them instead of looking instances up again.
+
+    Stored lookups are only reused if the ``version`` passed to
+    :meth:`load` is the one they have been saved with. Only instances
+    looked up by ``import_id_fields`` are kept, not the objects looked up
+    by :class:`~import_export.widgets.ForeignKeyWidget`.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.version = None
+        #: Primary keys of the instances looked up by the stored import by
+        #: key, ``None`` for keys without instance
+        self.loaded = {}
+        #: Primary keys of the instances looked up by the current import
+        self.lookups = {}
+
+    def load(self, version):
+        """
+        Loads the stored lookups if they have been saved with ``version``,
+        returns ``True`` if they have been loaded.
+        """
+        self.version = version
+        data = self.read()
+        if version is None or not data or data.get('version') != version:
+            return False
+        self.loaded = data['lookups']
+        return True
+
+    def save(self):
+        """
+        Stores the lookups with the version they have been loaded with.
+        """
+        self.write({'version': self.version, 'lookups': self.lookups})
+
+    def read(self):
+        raise NotImplementedError
+
+    def write(self, data):
+        raise NotImplementedError
+
+    def remove(self):
+        raise NotImplementedError
+
+
+class CacheLookupCache(BaseLookupCache):
+    """
+    Stores lookups with Django's cache framework.
+    """
+    CACHE_LIFETIME = 86400
+    CACHE_PREFIX = 'django-import-export-lookups-'
+
+    def read(self):
+        return cache.get(self.get_cache_key())
+
+    def write(self, data):
+        cache.set(self.get_cache_key(), data, self.CACHE_LIFETIME)
+
+    def remove(self):
+        cache.delete(self.get_cache_key())
+
+    def get_cache_key(self):
+        return self.CACHE_PREFIX + hashlib.sha1(force_bytes(self.name)).hexdigest()
+
+
+class FileLookupCache(BaseLookupCache):
+    """
+    Stores lookups as JSON in a file of the temporary folder.
+    """
+    FILE_PREFIX = 'django-import-export-lookups-'
+
+    def read(self):
+        try:
+            with open(self.get_full_path()) as f:
+                return json.load(f)
+        except (IOError, ValueError):
+            return None
+
+    def write(self, data):
+        with open(self.get_full_path(), 'w') as f:
+            json.dump(data, f)
+
+    def remove(self):
+        try:
+            os.remove(self.get_full_path())
+        except OSError:
+            pass
+
+    def get_full_path(self):
+        return os.path.join(
+            tempfile.gettempdir(),
+            self.FILE_PREFIX + hashlib.sha1(force_bytes(self.name)).hexdigest()
+        )
@@ -0,0 +1,105 @@
+from __future__ import unicode_literals
+
+import binascii
+
+from django.db import connections
+from django.utils import six
+
+#: Internal types of model fields whose values have no plain text
+#: representation in ``COPY`` text format, rejected by
+#: :meth:`~import_export.resources.Resource.check_copy_support`.
+UNSUPPORTED_FIELD_TYPES = (
+    'ArrayField', 'HStoreField', 'JSONField', 'IntegerRangeField',
+    'BigIntegerRangeField', 'FloatRangeField', 'DecimalRangeField',
+    'DateTimeRangeField', 'DateRangeField',
+)
+
+
+def escape_copy_value(value, binary=False):
+    """
+    Returns a value prepared for the database in PostgreSQL ``COPY`` text
+    format. Set ``binary`` for values of binary fields, which are written as
+    hex encoded ``bytea``.
+    """
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if binary:
+        # unwrap psycopg2's Binary adapter
+        value = getattr(value, 'adapted', value)
+        return '\\\\x' + binascii.hexlify(
+            six.binary_type(bytearray(value))).decode('ascii')
+    return (six.text_type(value).replace('\\', '\\\\')
+            .replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r'))
+
+
+class CopyStream(object):
+    """
+    File-like object reading from an iterable of strings, used to stream
+    rows to ``COPY ... FROM STDIN`` without building the whole input.
+    """
+
+    def __init__(self, lines):
+        self.lines = iter(lines)
+        self.buffer = ''
+
+    def read(self, size=-1):
+        while size is None or size < 0 or len(self.buffer) < size:
+            try:
+                self.buffer += next(self.lines)
+            except StopIteration:
+                break
+        if size is None or size < 0:
+            data, self.buffer = self.buffer, ''
+        else:
+            data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    def readline(self, size=-1):
+        return self.read(size)
+
+
+def copy_rows(model, fields, rows, using, batch_size=1000):
+    """
+    Loads ``rows``, an iterable of tuples of values prepared for the
+    database for ``fields``, into the table of ``model``.
+
+    PostgreSQL streams the rows with ``COPY ... FROM STDIN``, other
+    databases insert them with ``executemany`` in batches of
+    ``batch_size``. Returns the number of loaded rows.
+    """
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    columns = ', '.join(qn(f.column) for f in fields)
+    count = [0]
+
+    def counted(rows):
+        for row in rows:
+            count[0] += 1
+            yield row
+
+    cursor = connection.cursor()
+    try:
+        if connection.vendor == 'postgresql':
+            binary = [f.get_internal_type() == 'BinaryField' for f in fields]
+            lines = ('\t'.join(escape_copy_value(v, b)
+                               for v, b in zip(row, binary)) + '\n'
+                     for row in counted(rows))
+            cursor.copy_expert('COPY %s (%s) FROM STDIN' % (table, columns),
+                               CopyStream(lines))
+        else:
+            sql = 'INSERT INTO %s (%s) VALUES (%s)' % (
+                table, columns, ', '.join(['%s'] * len(fields)))
+            batch = []
+            for row in counted(rows):
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    cursor.executemany(sql, batch)
+                    batch = []
+            if batch:
+                cursor.executemany(sql, batch)
+    finally:
+        cursor.close()
+    return count[0]
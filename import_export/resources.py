@@ -3,7 +3,9 @@ from __future__ import unicode_literals
 import functools
 import tablib
 import traceback
+from collections import namedtuple
 from copy import deepcopy
+from datetime import date, datetime
 
 from diff_match_patch import diff_match_patch
 
@@ -12,22 +14,35 @@ from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 from django.core.management.color import no_style
 from django.db import connections, transaction, DEFAULT_DB_ALIAS
-from django.db.models.fields import FieldDoesNotExist
+from django.db.models import (
+    AutoField, Count, DateField, DateTimeField, ManyToManyField, Max,
+    Model, Q,
+)
+from django.db.models.fields import NOT_PROVIDED, FieldDoesNotExist
+from django.db.models.manager import Manager
 from django.db.models.query import QuerySet
 from django.db.transaction import TransactionManagementError
-from django.utils import six
+from django.utils import six, timezone
 from django.utils.safestring import mark_safe
 
 from . import widgets
 from .fields import Field
-from .instance_loaders import ModelInstanceLoader
+from .instance_loaders import (
+    EXISTING, LookupCacheInstanceLoader, ModelInstanceLoader,
+)
+from .pgcopy import UNSUPPORTED_FIELD_TYPES, copy_rows
 from .results import Error, Result, RowResult
+from .upsert import (
+    check_upsert_support, get_existing_keys, get_existing_pks, get_key, upsert,
+)
 
 try:
     from django.db.transaction import atomic, savepoint, savepoint_rollback, savepoint_commit  # noqa
 except ImportError:
     from .django_compat import atomic, savepoint, savepoint_rollback, savepoint_commit  # noqa
 
+from .django_compat import bulk_update, prefetch_related_objects
+
 
 if VERSION < (1, 8):
     from django.db.models.related import RelatedObject
@@ -60,6 +75,11 @@ logging.getLogger(__name__).addHandler(NullHandler())
 USE_TRANSACTIONS = getattr(settings, 'IMPORT_EXPORT_USE_TRANSACTIONS', True)
 
 
+#: Fields of a resource prepared for importing rows, see
+#: :meth:`~import_export.resources.Resource.compile_import_plan`.
+ImportPlan = namedtuple('ImportPlan', ['fields', 'm2m_fields'])
+
+
 class ResourceOptions(object):
     """
     The inner Meta class allows for class-level configuration of how the
@@ -90,6 +110,16 @@ class ResourceOptions(object):
     care of loading existing objects.
     """
 
+    load_only_fields = False
+    """
+    Controls if instance loaders only load the primary key and the model
+    fields of the resource fields, deferring other columns of existing
+    instances, and select foreign keys of ``__`` separated field attributes
+    with them. As ``Model.save()`` only saves the loaded fields of instances
+    with deferred fields, fields changing when they are saved, e.g. with
+    ``auto_now``, are loaded as well. Default value is False
+    """
+
     import_id_fields = ['id']
     """
     Controls which object fields will be used to
@@ -124,6 +154,105 @@ class ResourceOptions(object):
     Controls if the result reports skipped rows Default value is True
     """
 
+    use_bulk = False
+    """
+    Controls if import should use bulk operations. When enabled, instances
+    are not saved or deleted one by one but queued and written with
+    ``bulk_create`` (new instances), bulk updates (existing instances) and
+    ``filter(pk__in=...).delete()`` (deleted instances) in batches of
+    ``batch_size``. On databases which don't return the primary keys of
+    bulk created instances, they are selected back by ``import_id_fields``,
+    see :meth:`~import_export.resources.Resource.get_bulk_create_key_fields`.
+    Default value is False.
+    """
+
+    batch_size = 1000
+    """
+    Number of instances written in one bulk operation when ``use_bulk`` is
+    enabled. Default value is 1000.
+    """
+
+    use_upsert = False
+    """
+    Controls if bulk imports should skip loading existing instances and write
+    rows with database-native upserts conflicting on ``import_id_fields``
+    (``INSERT ... ON CONFLICT`` on PostgreSQL and SQLite,
+    ``INSERT ... ON DUPLICATE KEY UPDATE`` on MySQL). Requires ``use_bulk``
+    and a unique constraint on ``import_id_fields``. Default value is False.
+    """
+
+    skip_diff = False
+    """
+    Controls if the import should skip capturing the differences of imported
+    rows, leaving ``diff`` of row results empty. Diffs are only rendered when
+    ``diff`` of a row result is accessed, skipping them saves reading the
+    resource fields twice per row. Default value is False
+    """
+
+    prefetch_foreign_keys = True
+    """
+    Controls if objects referenced by columns of fields using a
+    :class:`~import_export.widgets.ForeignKeyWidget` are looked up in bulk
+    before rows are imported, see
+    :meth:`~import_export.widgets.ForeignKeyWidget.prefetch`. Widgets with
+    ``create_missing`` require it. Default value is True
+    """
+
+    use_deepcopy = None
+    """
+    Controls how the state of an instance is kept before a row is imported
+    into it. If ``False``, only the values of the resource fields are
+    captured (see
+    :meth:`~import_export.resources.Resource.get_instance_snapshot`), and
+    ``skip_row`` receives them as ``original``. If ``True``, a deep copy of
+    the instance is made and passed to ``skip_row`` instead, for
+    implementations needing the original instance itself. Default value is
+    None, deep copying instances only if ``skip_row`` is overridden
+    """
+
+    prefetch_export_relations = True
+    """
+    Controls if exports of querysets follow the relations of the exported
+    fields with ``select_related`` for foreign keys and prefetch many-to-many
+    fields for chunks of ``export_chunk_size`` objects, see
+    :meth:`~import_export.resources.Resource.get_export_relations`. Default
+    value is True
+    """
+
+    export_chunk_size = 1000
+    """
+    Controls the number of exported objects whose many-to-many fields and
+    ``prefetch_related`` lookups are prefetched at once. Default value is
+    1000
+    """
+
+    clean_columns = False
+    """
+    Controls if the columns of fields whose widget has a ``clean_column``
+    method, e.g. :class:`~import_export.widgets.NumberWidget` subclasses, are
+    cleaned a column at a time before rows are imported, see
+    :meth:`~import_export.resources.Resource.clean_dataset_columns`. Default
+    value is False
+    """
+
+    use_row_savepoints = None
+    """
+    Controls if every row saved by an import is wrapped in its own savepoint,
+    so that a failing row can be rolled back alone while the import goes on.
+    Default value is ``None``, meaning savepoints are only used if the import
+    uses transactions and collects errors instead of raising them
+    (``raise_errors=False``), and is neither a bulk nor a chunked import.
+    """
+
+    use_copy = False
+    """
+    Controls if import should load rows of append-only resources straight
+    into the database table, bypassing instance loading and model instances:
+    rows are cleaned by the resource fields' widgets and streamed with
+    ``COPY ... FROM STDIN`` on PostgreSQL, or inserted with ``executemany``
+    in batches of ``batch_size`` on other databases. Default value is False.
+    """
+
 
 class DeclarativeMetaclass(type):
 
@@ -165,19 +294,39 @@ class DeclarativeMetaclass(type):
         return new_class
 
 
+class RenderedValue(six.text_type):
+    """
+    Value of a diff which has been exported when it was read.
+    """
+
+
 class Diff(object):
+    """
+    Values of the resource fields of an instance before and after a row has
+    been imported into it.
+
+    Values are kept as read from the instance and only rendered and compared
+    by :meth:`as_html`. Values of fields with a ``dehydrate_<field>`` method
+    and of related managers can't be read later on and are exported at once,
+    as are values of widgets whose ``render`` may use the instance, i.e. is
+    not one of the widgets of :mod:`import_export.widgets`.
+    """
+
     def __init__(self, resource, instance, new):
-        self.left = self._export_resource_fields(resource, instance)
-        self.right = []
+        self.resource = resource
+        self.left = self._read_resource_fields(resource, instance)
+        self.right = ()
         self.new = new
 
     def compare_with(self, resource, instance, dry_run=False):
-        self.right = self._export_resource_fields(resource, instance)
+        self.right = self._read_resource_fields(resource, instance)
 
     def as_html(self):
         data = []
         dmp = diff_match_patch()
-        for v1, v2 in six.moves.zip(self.left, self.right):
+        fields = self.resource.get_user_visible_fields()
+        for field, v1, v2 in six.moves.zip(fields, self.left, self.right):
+            v1, v2 = self._render(field, v1), self._render(field, v2)
             if v1 != v2 and self.new:
                 v1 = ""
             diff = dmp.diff_main(force_text(v1), force_text(v2))
@@ -187,8 +336,32 @@ class Diff(object):
             data.append(html)
         return data
 
-    def _export_resource_fields(self, resource, instance):
-        return [resource.export_field(f, instance) if instance else "" for f in resource.get_user_visible_fields()]
+    def _read_resource_fields(self, resource, instance):
+        fields = resource.get_user_visible_fields()
+        if not instance:
+            return (None, ) * len(fields)
+        return tuple(self._read_field(resource, f, instance) for f in fields)
+
+    def _read_field(self, resource, field, instance):
+        field_name = resource.get_field_name(field)
+        if getattr(resource, 'dehydrate_%s' % field_name, None) is not None:
+            return RenderedValue(resource.export_field(field, instance))
+        value = field.get_value(instance)
+        if isinstance(value, Manager) or (
+                value is not None and self._renders_with_obj(field.widget)):
+            return RenderedValue(field.widget.render(value, instance))
+        return value
+
+    def _renders_with_obj(self, widget):
+        render = six.get_unbound_function(type(widget).render)
+        return render.__module__ != widgets.__name__
+
+    def _render(self, field, value):
+        if value is None:
+            return ""
+        if isinstance(value, RenderedValue):
+            return value
+        return field.widget.render(value)
 
 
 class Resource(six.with_metaclass(DeclarativeMetaclass)):
@@ -196,6 +369,28 @@ class Resource(six.with_metaclass(DeclarativeMetaclass)):
     Resource defines how objects are mapped to their import and export
     representations and handle importing and exporting data.
     """
+    #: Columns cleaned beforehand by the running import, see
+    #: :meth:`~import_export.resources.Resource.clean_dataset_columns`
+    cleaned_columns = None
+    #: Index of the row being imported in its dataset
+    row_index = None
+    #: :class:`ImportPlan` of the running import
+    import_plan = None
+    #: Headers of the dataset being imported
+    dataset_headers = None
+    #: Caches of the widgets of the running import by widget, see
+    #: :meth:`~import_export.resources.Resource.get_widget_cache`
+    widget_caches = None
+    #: Export plan of the running export, see
+    #: :meth:`~import_export.resources.Resource.compile_export_plan`
+    export_plan = None
+    #: Methods :meth:`~import_export.resources.Resource.copy_data` doesn't
+    #: call, which resources using ``use_copy`` must not override
+    copy_ignored_methods = (
+        'for_delete', 'skip_row', 'import_row', 'before_import_row',
+        'after_import_row', 'import_obj', 'import_field',
+        'before_save_instance', 'save_instance', 'after_save_instance',
+    )
 
     @classmethod
     def get_result_class(self):
@@ -266,9 +461,21 @@ class Resource(six.with_metaclass(DeclarativeMetaclass)):
         Takes care of saving the object to the database.
 
         Keep in mind that this is done by calling ``instance.save()``, so
-        objects are not created in bulk!
+        objects are not created in bulk unless
+        :attr:`~import_export.resources.ResourceOptions.use_bulk` is set.
+        In that case instances are queued and
+        :meth:`~import_export.resources.Resource.after_save_instance` is
+        called once the batch holding the instance has been written.
         """
         self.before_save_instance(instance, using_transactions, dry_run)
+        if self._meta.use_bulk:
+            if self._meta.use_upsert:
+                self.upsert_instances.append(instance)
+            elif instance._state.adding:
+                self.create_instances.append(instance)
+            else:
+                self.update_instances.append(instance)
+            return
         if not using_transactions and dry_run:
             # we don't have transactions and we want to do a dry_run
             pass
@@ -288,11 +495,313 @@ class Resource(six.with_metaclass(DeclarativeMetaclass)):
         """
         pass
 
+    def bulk_create(self, using_transactions, dry_run):
+        """
+        Writes the queued new instances with ``bulk_create`` and calls
+        :meth:`~import_export.resources.Resource.after_save_instance` for
+        each of them.
+
+        Returns a list of ``(instance, error, traceback)`` tuples for
+        instances that could not be saved.
+        """
+        instances, self.create_instances = self.create_instances, []
+        key_fields = None
+        if not self.returns_bulk_created_pks():
+            key_fields = self.get_bulk_create_key_fields()
+
+        def write_batch():
+            self._meta.model.objects.bulk_create(
+                instances, batch_size=self._meta.batch_size)
+            if key_fields:
+                self.set_bulk_created_pks(instances, key_fields)
+
+        return self._write_bulk(
+            instances, write_batch, lambda instance: instance.save(),
+            lambda instance: self.after_save_instance(
+                instance, using_transactions, dry_run),
+            using_transactions, dry_run)
+
+    def returns_bulk_created_pks(self):
+        """
+        Returns ``True`` if the database sets the primary keys of bulk
+        created instances (``can_return_ids_from_bulk_insert``, i.e.
+        PostgreSQL).
+        """
+        connection = connections[DEFAULT_DB_ALIAS]
+        return getattr(connection.features, 'can_return_ids_from_bulk_insert',
+                       False)
+
+    def get_bulk_create_key_fields(self):
+        """
+        Returns the model fields mapped by ``import_id_fields`` by which the
+        primary keys of bulk created instances are selected back on
+        databases which don't return them, or ``None`` if they include the
+        primary key or fields which aren't concrete fields of the model.
+        """
+        opts = self._meta.model._meta
+        key_fields = []
+        for name in self.get_import_id_fields():
+            try:
+                model_field = opts.get_field(self.fields[name].attribute)
+            except FieldDoesNotExist:
+                return None
+            if (model_field.primary_key or
+                    model_field not in opts.concrete_fields):
+                return None
+            key_fields.append(model_field)
+        return key_fields or None
+
+    def set_bulk_created_pks(self, instances, key_fields):
+        """
+        Sets the primary keys of bulk created ``instances`` without primary
+        key by selecting the rows of their ``key_fields`` values. Instances
+        whose key isn't unique among ``instances`` or in the table keep
+        ``None``.
+        """
+        instances = [instance for instance in instances if instance.pk is None]
+        counts = {}
+        for instance in instances:
+            key = get_key(instance, key_fields)
+            counts[key] = counts.get(key, 0) + 1
+        connection = connections[DEFAULT_DB_ALIAS]
+        batch_size = max(connection.ops.bulk_batch_size(key_fields, instances), 1)
+        for i in range(0, len(instances), batch_size):
+            batch = instances[i:i + batch_size]
+            pks = get_existing_pks(self._meta.model, batch, key_fields,
+                                   DEFAULT_DB_ALIAS, unique=True)
+            for instance in batch:
+                key = get_key(instance, key_fields)
+                if counts[key] == 1:
+                    instance.pk = pks.get(key)
+
+    def check_bulk_support(self):
+        """
+        Raises ``ImproperlyConfigured`` if ``after_save_instance`` is
+        overridden while the primary keys of bulk created instances are
+        neither returned by the database nor selected back by
+        ``import_id_fields``, see
+        :meth:`~import_export.resources.Resource.get_bulk_create_key_fields`,
+        as it would receive instances without primary key.
+        """
+        if (six.get_unbound_function(type(self).after_save_instance) is
+                six.get_unbound_function(Resource.after_save_instance)):
+            return
+        if (not self.returns_bulk_created_pks() and
+                self.get_bulk_create_key_fields() is None):
+            raise ImproperlyConfigured(
+                "use_bulk can't be used by resources overriding "
+                "after_save_instance on databases which don't return primary "
+                "keys of bulk created instances, unless import_id_fields "
+                "are fields of the model other than the primary key.")
+
+    def save_new_m2m_instances(self, pending_rows, using_transactions,
+                               dry_run):
+        """
+        Saves the queued new instances without primary key of the rows of
+        ``pending_rows`` with many-to-many columns one by one, and calls
+        :meth:`~import_export.resources.Resource.after_save_instance` for
+        each of them.
+
+        ``bulk_create`` only sets the primary keys of created instances if
+        the database can return them (``can_return_ids_from_bulk_insert``,
+        i.e. PostgreSQL), which saving their many-to-many fields requires.
+        Does nothing on such databases. Returns a list of
+        ``(instance, error, traceback)`` tuples for instances that could not
+        be saved.
+        """
+        if self.returns_bulk_created_pks():
+            return []
+        columns = [field.column_name for field in
+                   self.get_import_plan().m2m_fields
+                   if field.attribute and not field.readonly]
+        needed = set(id(row_result.instance) for row, row_result in pending_rows
+                     if any(column in row for column in columns))
+        instances = [instance for instance in self.create_instances
+                     if instance.pk is None and id(instance) in needed]
+        if not instances:
+            return []
+        saved = set(id(instance) for instance in instances)
+        self.create_instances = [instance for instance in self.create_instances
+                                 if id(instance) not in saved]
+
+        def save_instance(instance):
+            # the primary key may have been set by a rolled back batch
+            instance.pk = None
+            instance.save()
+
+        def write_batch():
+            for instance in instances:
+                instance.save()
+
+        return self._write_bulk(
+            instances, write_batch, save_instance,
+            lambda instance: self.after_save_instance(
+                instance, using_transactions, dry_run),
+            using_transactions, dry_run)
+
+    def bulk_update(self, using_transactions, dry_run):
+        """
+        Writes the queued existing instances in bulk and calls
+        :meth:`~import_export.resources.Resource.after_save_instance` for
+        each of them.
+
+        Only the model fields returned by
+        :meth:`~import_export.resources.Resource.get_bulk_update_fields` are
+        written, using ``QuerySet.bulk_update`` where available and an
+        equivalent ``CASE ... WHEN`` update otherwise. Returns a list of
+        ``(instance, error, traceback)`` tuples for instances that could not
+        be saved.
+        """
+        instances, self.update_instances = self.update_instances, []
+        fields = self.get_bulk_update_fields()
+        queryset = self._meta.model.objects.all()
+
+        def write_batch():
+            if not fields:
+                return
+            if hasattr(queryset, 'bulk_update'):
+                queryset.bulk_update(instances, fields,
+                                     batch_size=self._meta.batch_size)
+            else:
+                bulk_update(queryset, instances, fields,
+                            batch_size=self._meta.batch_size)
+
+        return self._write_bulk(
+            instances, write_batch,
+            lambda instance: instance.save(update_fields=fields),
+            lambda instance: self.after_save_instance(
+                instance, using_transactions, dry_run),
+            using_transactions, dry_run)
+
+    def bulk_upsert(self, using_transactions, dry_run):
+        """
+        Writes the queued instances with database-native upserts and calls
+        :meth:`~import_export.resources.Resource.after_save_instance` for
+        each of them.
+
+        Returns a tuple of a list of ``(instance, error, traceback)`` tuples
+        for instances that could not be saved, and the set of ids of the
+        instances which have been inserted rather than updated.
+        """
+        instances, self.upsert_instances = self.upsert_instances, []
+        if not instances:
+            return [], set()
+        model = self._meta.model
+        key_fields = self.get_upsert_key_fields()
+        update_fields = [model._meta.get_field(name)
+                         for name in self.get_upsert_update_fields()]
+        created = set()
+
+        def write(instances):
+            flags = upsert(model, instances, key_fields, update_fields,
+                           DEFAULT_DB_ALIAS, self._meta.batch_size)
+            created.update(id(instance) for instance, new in
+                           six.moves.zip(instances, flags) if new)
+
+        if not using_transactions and dry_run:
+            # nothing is written, classify rows by looking up their keys
+            existing = get_existing_keys(model, instances, key_fields,
+                                         DEFAULT_DB_ALIAS)
+            created.update(id(instance) for instance in instances
+                           if get_key(instance, key_fields) not in existing)
+
+        errors = self._write_bulk(
+            instances, lambda: write(instances),
+            lambda instance: write([instance]),
+            lambda instance: self.after_save_instance(
+                instance, using_transactions, dry_run),
+            using_transactions, dry_run)
+        return errors, created
+
+    def get_upsert_update_fields(self):
+        """
+        Returns names of the model fields
+        :meth:`~import_export.resources.Resource.bulk_upsert` writes to
+        existing rows: the fields returned by
+        :meth:`~import_export.resources.Resource.get_bulk_update_fields`
+        mapped by a column of the dataset being imported, as upserted
+        instances only hold model defaults for other fields.
+        """
+        headers = self.dataset_headers or ()
+        attributes = set(field.attribute for field in self.get_fields()
+                         if field.column_name in headers)
+        return [name for name in self.get_bulk_update_fields()
+                if name in attributes]
+
+    def get_upsert_key_fields(self):
+        """
+        Returns the model fields mapped by ``import_id_fields``, on which
+        upserted rows conflict.
+        """
+        return [self._meta.model._meta.get_field(self.fields[name].attribute)
+                for name in self.get_import_id_fields()]
+
+    def _write_bulk(self, instances, write_batch, write_instance, after_write,
+                    using_transactions, dry_run):
+        # If the batch fails, instances are written one by one so that
+        # errors can be attributed to the rows they come from.
+        errors = []
+        if not instances:
+            return errors
+        if not using_transactions and dry_run:
+            # we don't have transactions and we want to do a dry_run
+            pass
+        else:
+            try:
+                with transaction.atomic():
+                    write_batch()
+            except Exception:
+                for instance in instances:
+                    try:
+                        with transaction.atomic():
+                            write_instance(instance)
+                    except Exception as e:
+                        logging.exception(e)
+                        errors.append((instance, e, traceback.format_exc()))
+        failed = set(id(instance) for instance, e, tb in errors)
+        for instance in instances:
+            if id(instance) not in failed:
+                after_write(instance)
+        return errors
+
+    def get_bulk_update_fields(self):
+        """
+        Returns names of the model fields written by
+        :meth:`~import_export.resources.Resource.bulk_update`, that is the
+        concrete model fields mapped by non-readonly resource fields.
+        """
+        model_fields = dict(
+            (f.name, f) for f in self._meta.model._meta.fields)
+        names = []
+        for field in self.get_fields():
+            if field.readonly or field.attribute not in model_fields:
+                continue
+            if model_fields[field.attribute].primary_key:
+                continue
+            if field.attribute not in names:
+                names.append(field.attribute)
+        return names
+
+    def get_bulk_pending_count(self):
+        """
+        Returns the number of instances queued for the next bulk operation.
+        """
+        return (len(self.create_instances) + len(self.update_instances) +
+                len(self.delete_instances) + len(self.upsert_instances))
+
     def delete_instance(self, instance, using_transactions=True, dry_run=False):
         """
         Calls :meth:`instance.delete` as long as ``dry_run`` is not set.
+
+        If :attr:`~import_export.resources.ResourceOptions.use_bulk` is set,
+        the instance is queued and deleted with its batch by
+        :meth:`~import_export.resources.Resource.bulk_delete`.
         """
         self.before_delete_instance(instance, dry_run)
+        if self._meta.use_bulk:
+            # deleted, and after_delete_instance called, with the batch
+            self.delete_instances.append(instance)
+            return
         if not using_transactions and dry_run:
             # we don't have transactions and we want to do a dry_run
             pass
@@ -312,23 +821,194 @@ class Resource(six.with_metaclass(DeclarativeMetaclass)):
         """
         pass
 
+    def bulk_delete(self, using_transactions, dry_run):
+        """
+        Deletes the queued instances with one ``filter(pk__in=...).delete()``
+        query per batch and calls
+        :meth:`~import_export.resources.Resource.after_delete_instance` for
+        each of them.
+
+        Returns a list of ``(instance, error, traceback)`` tuples for
+        instances that could not be deleted.
+        """
+        instances, self.delete_instances = self.delete_instances, []
+        if not instances:
+            return []
+        self.before_bulk_delete(instances, dry_run)
+        batch_size = self._meta.batch_size or len(instances)
+        queryset = self._meta.model.objects.all()
+
+        def write_batch():
+            for i in range(0, len(instances), batch_size):
+                pks = [instance.pk for instance in instances[i:i + batch_size]]
+                queryset.filter(pk__in=pks).delete()
+
+        errors = self._write_bulk(
+            instances, write_batch, lambda instance: instance.delete(),
+            lambda instance: self.after_delete_instance(instance, dry_run),
+            using_transactions, dry_run)
+        failed = set(id(instance) for instance, e, tb in errors)
+        self.after_bulk_delete(
+            [instance for instance in instances if id(instance) not in failed],
+            dry_run)
+        return errors
+
+    def before_bulk_delete(self, instances, dry_run):
+        """
+        Override to add additional logic before a batch of ``instances`` is
+        deleted. Does nothing by default.
+        """
+        pass
+
+    def after_bulk_delete(self, instances, dry_run):
+        """
+        Override to add additional logic after a batch of ``instances`` has
+        been deleted. Does nothing by default.
+        """
+        pass
+
     def import_field(self, field, obj, data):
         """
         Calls :meth:`import_export.fields.Field.save` if ``Field.attribute``
         and ``Field.column_name`` are found in ``data``.
         """
         if field.attribute and field.column_name in data:
-            field.save(obj, data)
+            cleaned = self.get_cleaned_value(field, data)
+            kwargs = (self.get_widget_kwargs(field)
+                      if self._has_default_save(field) else {})
+            if cleaned is NOT_PROVIDED:
+                field.save(obj, data, **kwargs)
+            else:
+                field.save(obj, data, cleaned, **kwargs)
+
+    def get_widget_cache(self, field):
+        """
+        Returns the dictionary caching the objects looked up by the widget of
+        ``field`` during the running import, or ``None`` outside of imports.
+
+        Caches are kept by the resource rather than by widgets, which are
+        shared by all instances of the resource class.
+        """
+        if self.widget_caches is None:
+            return None
+        return self.widget_caches.setdefault(field.widget, {})
+
+    def get_widget_kwargs(self, field):
+        """
+        Returns the keyword arguments passed to the ``clean`` method of the
+        widget of ``field``: the cache of the running import for
+        :class:`~import_export.widgets.ForeignKeyWidget` instances which
+        don't override ``clean``, as overrides may not accept it.
+        """
+        if (self.widget_caches is not None and
+                isinstance(field.widget, widgets.ForeignKeyWidget) and
+                six.get_unbound_function(type(field.widget).clean) is
+                six.get_unbound_function(widgets.ForeignKeyWidget.clean)):
+            return {'cache': self.get_widget_cache(field)}
+        return {}
+
+    def clean_dataset_columns(self, dataset):
+        """
+        Cleans the columns of ``dataset`` mapped by non-readonly fields whose
+        widget has a ``clean_column`` method with
+        :meth:`~import_export.fields.Field.clean_column`.
+
+        Returns a dictionary of ``(values, cleaned)`` tuples of the original
+        and the cleaned values of each column by field.
+        """
+        cleaned_columns = {}
+        for field in self.get_fields():
+            if (not field.readonly and field.attribute and
+                    hasattr(field.widget, 'clean_column') and
+                    field.column_name in dataset.headers):
+                values = dataset[field.column_name]
+                cleaned_columns[field] = (values, field.clean_column(values))
+        return cleaned_columns
+
+    def get_cleaned_value(self, field, data):
+        """
+        Returns the value of ``field`` in ``data``, the row being imported,
+        cleaned by :meth:`~import_export.resources.Resource.clean_dataset_columns`,
+        or ``NOT_PROVIDED`` if the value has not been cleaned beforehand or
+        has been changed since, e.g. by ``before_import_row``.
+        """
+        column = (self.cleaned_columns or {}).get(field)
+        if column is None or self.row_index is None:
+            return NOT_PROVIDED
+        values, cleaned = column
+        if (self.row_index >= len(values) or
+                data[field.column_name] is not values[self.row_index]):
+            return NOT_PROVIDED
+        return cleaned[self.row_index]
 
     def import_obj(self, obj, data, dry_run):
         """
-        Traverses every field in this Resource and calls
-        :meth:`~import_export.resources.Resource.import_field`.
+        Traverses every field of the
+        :meth:`~import_export.resources.Resource.get_import_plan` which is
+        not a many-to-many field and imports it, calling
+        :meth:`~import_export.resources.Resource.import_field` if it has no
+        setter.
         """
+        cleaned_columns = self.cleaned_columns
+        for field, setter in self.get_import_plan().fields:
+            if setter is None:
+                self.import_field(field, obj, data)
+            elif field.column_name in data:
+                if cleaned_columns and field in cleaned_columns:
+                    cleaned = self.get_cleaned_value(field, data)
+                else:
+                    cleaned = NOT_PROVIDED
+                setter(obj, field.clean(data, cleaned,
+                                        **self.get_widget_kwargs(field)))
+
+    def compile_import_plan(self):
+        """
+        Returns the :class:`ImportPlan` of the resource: the list of
+        ``(field, setter)`` tuples of the fields imported by
+        :meth:`~import_export.resources.Resource.import_obj` and the list of
+        the many-to-many fields saved by
+        :meth:`~import_export.resources.Resource.save_m2m`.
+
+        ``setter`` is the function returned by
+        :meth:`~import_export.fields.Field.get_setter`, or ``None`` if the
+        field is imported with
+        :meth:`~import_export.resources.Resource.import_field` as either it
+        or ``Field.save`` and ``Field.clean`` are overridden. Readonly fields
+        and fields without ``attribute`` are left out if they have a setter.
+        """
+        fast = (six.get_unbound_function(type(self).import_field) is
+                six.get_unbound_function(Resource.import_field))
+        fields, m2m_fields = [], []
         for field in self.get_fields():
             if isinstance(field.widget, widgets.ManyToManyWidget):
-                continue
-            self.import_field(field, obj, data)
+                m2m_fields.append(field)
+            elif not fast or not self._has_default_save(field):
+                fields.append((field, None))
+            elif field.attribute and not field.readonly:
+                fields.append((field, field.get_setter()))
+        return ImportPlan(tuple(fields), tuple(m2m_fields))
+
+    def _has_default_m2m_import(self, field):
+        return (six.get_unbound_function(type(self).import_field) is
+                six.get_unbound_function(Resource.import_field) and
+                self._has_default_save(field) and
+                six.get_unbound_function(type(field.widget).clean) is
+                six.get_unbound_function(widgets.ManyToManyWidget.clean))
+
+    def _has_default_save(self, field):
+        cls = type(field)
+        return all(six.get_unbound_function(getattr(cls, name)) is
+                   six.get_unbound_function(getattr(Field, name))
+                   for name in ('save', 'clean'))
+
+    def get_import_plan(self):
+        """
+        Returns the :class:`ImportPlan` compiled at the start of the running
+        import, or compiles it if no import is running.
+        """
+        if self.import_plan is None:
+            return self.compile_import_plan()
+        return self.import_plan
 
     def save_m2m(self, obj, data, using_transactions, dry_run):
         """
@@ -341,11 +1021,97 @@ class Resource(six.with_metaclass(DeclarativeMetaclass)):
             # we don't have transactions and we want to do a dry_run
             pass
         else:
-            for field in self.get_fields():
-                if not isinstance(field.widget, widgets.ManyToManyWidget):
-                    continue
+            for field in self.get_import_plan().m2m_fields:
                 self.import_field(field, obj, data)
 
+    def bulk_save_m2m(self, instance_rows, using_transactions, dry_run):
+        """
+        Saves the many-to-many fields of ``instance_rows``, a list of
+        ``(instance, row)`` tuples of instances written in bulk.
+
+        The related objects of a whole batch are resolved at once with
+        :meth:`~import_export.widgets.ManyToManyWidget.prefetch`. Links of
+        fields with an automatically created through model are read with one
+        query, added with one ``bulk_create`` and removed with one
+        ``delete`` query per field, without sending ``m2m_changed`` signals;
+        other fields, and fields imported by overridden
+        ``Resource.import_field``, ``Field.save``, ``Field.clean`` or
+        ``ManyToManyWidget.clean`` methods, are saved row by row.
+
+        Returns a list of ``(instance, error, traceback)`` tuples for
+        instances whose many-to-many fields could not be saved.
+        """
+        rows = dict((id(instance), row) for instance, row in instance_rows)
+
+        def write_batch():
+            for field in self.get_import_plan().m2m_fields:
+                self.bulk_import_m2m_field(field, instance_rows)
+
+        return self._write_bulk(
+            [instance for instance, row in instance_rows], write_batch,
+            lambda instance: self.save_m2m(instance, rows[id(instance)],
+                                           using_transactions, dry_run),
+            lambda instance: None, using_transactions, dry_run)
+
+    def bulk_import_m2m_field(self, field, instance_rows):
+        """
+        Saves the many-to-many ``field`` of ``instance_rows``, see
+        :meth:`~import_export.resources.Resource.bulk_save_m2m`.
+        """
+        instance_rows = [(instance, row) for instance, row in instance_rows
+                         if field.attribute and field.column_name in row]
+        if field.readonly or not instance_rows:
+            return
+        try:
+            model_field = self._meta.model._meta.get_field(field.attribute)
+            through = model_field.rel.through
+        except (FieldDoesNotExist, AttributeError):
+            model_field = through = None
+        if (not isinstance(model_field, ManyToManyField) or through is None or
+                not through._meta.auto_created or
+                not self._has_default_m2m_import(field)):
+            for instance, row in instance_rows:
+                self.import_field(field, instance, row)
+            return
+
+        widget = field.widget
+        source_field = through._meta.get_field(model_field.m2m_field_name())
+        target_field = through._meta.get_field(
+            model_field.m2m_reverse_field_name())
+        source_attname = source_field.rel.get_related_field().attname
+        target_attname = target_field.rel.get_related_field().attname
+        cache = self.get_widget_cache(field)
+        widget.prefetch([row[field.column_name] for instance, row in instance_rows],
+                        cache=cache)
+        wanted = OrderedDict()
+        for instance, row in instance_rows:
+            wanted[getattr(instance, source_attname)] = set(
+                getattr(obj, target_attname)
+                for obj in widget.resolve(row[field.column_name], cache=cache))
+
+        manager = through._default_manager
+        sources = list(wanted)
+        stale, present = [], set()
+        for i in range(0, len(sources), widget.prefetch_chunk_size):
+            links = manager.filter(**{
+                '%s__in' % source_field.attname:
+                    sources[i:i + widget.prefetch_chunk_size]
+            }).values_list('pk', source_field.attname, target_field.attname)
+            for pk, source, target in links:
+                if target in wanted[source]:
+                    present.add((source, target))
+                else:
+                    stale.append(pk)
+        for i in range(0, len(stale), widget.prefetch_chunk_size):
+            manager.filter(
+                pk__in=stale[i:i + widget.prefetch_chunk_size]).delete()
+        manager.bulk_create([
+            through(**{source_field.attname: source,
+                       target_field.attname: target})
+            for source, targets in six.iteritems(wanted)
+            for target in sorted(targets) if (source, target) not in present
+        ], batch_size=self._meta.batch_size)
+
     def for_delete(self, row, instance):
         """
         Returns ``True`` if ``row`` importing should delete instance.
@@ -359,22 +1125,67 @@ class Resource(six.with_metaclass(DeclarativeMetaclass)):
         """
         Returns ``True`` if ``row`` importing should be skipped.
 
+        ``original`` is a deep copy of ``instance`` taken before the row was
+        imported into it, or its snapshot, see
+        :meth:`~import_export.resources.Resource.deep_copies_original`.
+
         Default implementation returns ``False`` unless skip_unchanged == True.
         Override this method to handle skipping rows meeting certain
         conditions.
         """
         if not self._meta.skip_unchanged:
             return False
+        if self.deep_copies_original():
+            original = self.get_instance_snapshot(original)
+        return self.get_instance_snapshot(instance) == original
+
+    def skip_row_uses_original(self):
+        """
+        Returns ``True`` if :meth:`~import_export.resources.Resource.skip_row`
+        may use ``original``, that is if ``skip_unchanged`` is set or
+        ``skip_row`` is overridden. Otherwise no snapshot is taken and
+        ``skip_row`` receives ``None`` as ``original``.
+        """
+        return self._meta.skip_unchanged or (
+            six.get_unbound_function(type(self).skip_row) is not
+            six.get_unbound_function(Resource.skip_row))
+
+    def deep_copies_original(self):
+        """
+        Returns ``True`` if ``original`` is a deep copy of the instance
+        rather than a snapshot of the values of its resource fields, see
+        :attr:`~import_export.resources.ResourceOptions.use_deepcopy`. By
+        default instances are only deep copied for overridden ``skip_row``
+        methods, which may expect a model instance.
+        """
+        if self._meta.use_deepcopy is None:
+            return (six.get_unbound_function(type(self).skip_row) is not
+                    six.get_unbound_function(Resource.skip_row))
+        return self._meta.use_deepcopy
+
+    def get_instance_snapshot(self, instance):
+        """
+        Returns a tuple of the values of the resource fields of
+        ``instance``, as returned by :meth:`~import_export.fields.Field.get_value`.
+
+        Related managers are evaluated to lists, so that many-to-many
+        relations can be compared.
+        """
+        values = []
         for field in self.get_fields():
-            try:
-                # For fields that are models.fields.related.ManyRelatedManager
-                # we need to compare the results
-                if list(field.get_value(instance).all()) != list(field.get_value(original).all()):
-                    return False
-            except AttributeError:
-                if field.get_value(instance) != field.get_value(original):
-                    return False
-        return True
+            value = field.get_value(instance)
+            if isinstance(value, Manager):
+                value = list(value.all())
+            values.append(value)
+        return tuple(values)
+
+    def get_lookup_cache_version(self):
+        """
+        Returns a string changing whenever instances looked up by an import
+        may have changed, so that lookups stored by a lookup cache can't be
+        reused, or ``None`` if lookups can't be reused.
+        """
+        return None
 
     def get_diff_headers(self):
         """
@@ -412,7 +1223,7 @@ class Resource(six.with_metaclass(DeclarativeMetaclass)):
         """
         pass
 
-    def import_row(self, row, instance_loader, using_transactions=True, dry_run=False, **kwargs):
+    def import_row(self, row, instance_loader, using_transactions=True, dry_run=False, raise_errors=False, **kwargs):
         """
         Imports data from ``tablib.Dataset``. Refer to :doc:`import_workflow`
         for a more complete description of the whole import process.
@@ -426,37 +1237,71 @@ class Resource(six.with_metaclass(DeclarativeMetaclass)):
 
         :param dry_run: If ``dry_run`` is set, or error occurs, transaction
             will be rolled back.
+
+        :param raise_errors: If ``raise_errors`` is set, an error in this row
+            ends the import (or the chunk of rows being imported), so the row
+            doesn't need to be rolled back on its own.
         """
         row_result = self.get_row_result_class()()
         try:
             self.before_import_row(row, **kwargs)
-            instance, new = self.get_or_init_instance(instance_loader, row)
+            if self._meta.use_upsert:
+                # existing instances are not loaded, the row is classified
+                # once its batch has been written
+                instance, new = self.init_instance(row), True
+            else:
+                instance, new = self.get_or_init_instance(instance_loader, row)
+                if instance is EXISTING:
+                    # the loader only knows an instance exists for the row
+                    row_result.import_type = RowResult.IMPORT_TYPE_SKIP
+                    self.after_import_row(row, row_result, **kwargs)
+                    return row_result
             self.after_import_instance(instance, new, **kwargs)
             if new:
                 row_result.import_type = RowResult.IMPORT_TYPE_NEW
             else:
                 row_result.import_type = RowResult.IMPORT_TYPE_UPDATE
             row_result.new_record = new
-            original = deepcopy(instance)
-            diff = Diff(self, original, new)
+            if self.deep_copies_original():
+                original = deepcopy(instance)
+            elif self.skip_row_uses_original():
+                original = self.get_instance_snapshot(instance)
+            else:
+                original = None
+            if not self._meta.skip_diff:
+                # the diff reads the instance before the row is imported into it
+                diff = Diff(self, instance, new)
+            # instance the diff compares with
+            imported = None
             if self.for_delete(row, instance):
                 if new:
                     row_result.import_type = RowResult.IMPORT_TYPE_SKIP
-                    diff.compare_with(self, None, dry_run)
                 else:
                     row_result.import_type = RowResult.IMPORT_TYPE_DELETE
                     self.delete_instance(instance, using_transactions, dry_run)
-                    diff.compare_with(self, None, dry_run)
+                    if self._meta.use_bulk:
+                        row_result.instance = instance
             else:
                 self.import_obj(instance, row, dry_run)
                 if self.skip_row(instance, original):
                     row_result.import_type = RowResult.IMPORT_TYPE_SKIP
                 else:
-                    with transaction.atomic():
+                    if self.get_use_row_savepoints(using_transactions, raise_errors):
+                        with transaction.atomic():
+                            self.save_instance(instance, using_transactions, dry_run)
+                    else:
                         self.save_instance(instance, using_transactions, dry_run)
-                    self.save_m2m(instance, row, using_transactions, dry_run)
-                diff.compare_with(self, instance, dry_run)
-            row_result.diff = diff.as_html()
+                    if self._meta.use_bulk:
+                        # many-to-many fields are saved once the batch
+                        # holding the instance has been written
+                        row_result.instance = instance
+                    else:
+                        self.save_m2m(instance, row, using_transactions, dry_run)
+                imported = instance
+            if not self._meta.skip_diff:
+                diff.compare_with(self, imported, dry_run)
+                # rendered when the diff of the row result is accessed
+                row_result.diff = diff
             # Add object info to RowResult for LogEntry
             if row_result.import_type != RowResult.IMPORT_TYPE_SKIP:
                 row_result.object_id = instance.pk
@@ -472,8 +1317,22 @@ class Resource(six.with_metaclass(DeclarativeMetaclass)):
             row_result.errors.append(self.get_error_result_class()(e, tb_info, row))
         return row_result
 
+    def get_use_row_savepoints(self, using_transactions, raise_errors):
+        """
+        Returns ``True`` if saving a row should be wrapped in a savepoint,
+        see :attr:`~import_export.resources.ResourceOptions.use_row_savepoints`.
+        """
+        if not using_transactions:
+            return False
+        if self._meta.use_row_savepoints is not None:
+            return self._meta.use_row_savepoints
+        # bulk imports only queue instances when saving rows
+        return not raise_errors and not self._meta.use_bulk
+
     def import_data(self, dataset, dry_run=False, raise_errors=False,
-                    use_transactions=None, collect_failed_rows=False, **kwargs):
+                    use_transactions=None, collect_failed_rows=False,
+                    commit_every=None, resume_from=0, lookup_cache=None,
+                    **kwargs):
         """
         Imports data from ``tablib.Dataset``. Refer to :doc:`import_workflow`
         for a more complete description of the whole import process.
@@ -491,6 +1350,23 @@ class Resource(six.with_metaclass(DeclarativeMetaclass)):
 
         :param dry_run: If ``dry_run`` is set, or an error occurs, if a transaction
             is being used, it will be rolled back.
+
+        :param commit_every: If set, rows are imported in chunks of
+            ``commit_every`` rows, each committed in its own transaction
+            instead of wrapping the whole import in one transaction. The import
+            stops at the first chunk with errors, which is rolled back. Dry
+            runs are still rolled back as a whole.
+
+        :param resume_from: Index of the first row to import with
+            ``commit_every``, e.g. ``Result.resume_from`` of an import which
+            stopped at a failed chunk.
+
+        :param lookup_cache: An instance of a
+            :class:`~import_export.lookup_caches.BaseLookupCache` subclass.
+            Instances are looked up by the primary keys it has stored for an
+            import of the same dataset, if the
+            :meth:`~import_export.resources.Resource.get_lookup_cache_version`
+            is unchanged. The lookups of a ``dry_run`` are stored in it.
         """
 
         if use_transactions is None:
@@ -504,17 +1380,96 @@ class Resource(six.with_metaclass(DeclarativeMetaclass)):
 
         using_transactions = (use_transactions or dry_run) and supports_transactions
 
-        if using_transactions:
-            with transaction.atomic():
-                return self.import_data_inner(dataset, dry_run, raise_errors, using_transactions, collect_failed_rows, **kwargs)
-        return self.import_data_inner(dataset, dry_run, raise_errors, using_transactions, collect_failed_rows, **kwargs)
+        if self._meta.use_bulk:
+            self.check_bulk_support()
+
+        if self._meta.use_upsert:
+            if not self._meta.use_bulk:
+                raise ImproperlyConfigured("use_upsert requires use_bulk.")
+            check_upsert_support(self._meta.model,
+                                 self.get_upsert_key_fields(),
+                                 DEFAULT_DB_ALIAS)
+
+        if self._meta.use_copy:
+            self.check_copy_support()
+
+        self.check_create_missing_support()
+
+        if lookup_cache is not None:
+            lookup_cache.load(self.get_lookup_cache_version())
+
+        self.widget_caches = {}
+        try:
+            if using_transactions and (dry_run or not commit_every):
+                # dry runs are rolled back as a whole, chunked or not
+                with transaction.atomic():
+                    result = self.import_data_inner(dataset, dry_run, raise_errors, using_transactions,
+                                                    collect_failed_rows, commit_every=commit_every,
+                                                    resume_from=resume_from, lookup_cache=lookup_cache,
+                                                    **kwargs)
+            else:
+                result = self.import_data_inner(dataset, dry_run, raise_errors, using_transactions, collect_failed_rows,
+                                                commit_every=commit_every, resume_from=resume_from,
+                                                lookup_cache=lookup_cache, **kwargs)
+        finally:
+            self.import_plan = self.dataset_headers = self.widget_caches = None
+
+        if lookup_cache is not None and dry_run:
+            lookup_cache.save()
+        return result
+
+    def prefetch_foreign_keys(self, dataset, create=True):
+        """
+        Looks up the objects referenced by the columns of ``dataset`` mapped
+        by fields using a :class:`~import_export.widgets.ForeignKeyWidget`.
 
-    def import_data_inner(self, dataset, dry_run, raise_errors, using_transactions, collect_failed_rows, **kwargs):
+        Missing objects of widgets with ``create_missing`` are only created
+        if ``create`` is set.
+        """
+        for field in self.get_fields():
+            if (not field.readonly and
+                    isinstance(field.widget, widgets.ForeignKeyWidget) and
+                    field.column_name in dataset.headers):
+                field.widget.prefetch(dataset[field.column_name], create=create,
+                                      cache=self.get_widget_cache(field))
+
+    def check_create_missing_support(self):
+        """
+        Raises ``ImproperlyConfigured`` if a field uses a
+        :class:`~import_export.widgets.ForeignKeyWidget` with
+        ``create_missing`` whose missing objects can't be created, as they
+        are only created when its column is prefetched: if the
+        ``prefetch_foreign_keys`` resource option is ``False`` or the widget
+        can't prefetch values, see
+        :meth:`~import_export.widgets.ForeignKeyWidget.can_prefetch`.
+        """
+        for field in self.get_fields():
+            widget = field.widget
+            if (field.readonly or
+                    not isinstance(widget, widgets.ForeignKeyWidget) or
+                    not widget.create_missing):
+                continue
+            if not self._meta.prefetch_foreign_keys:
+                raise ImproperlyConfigured(
+                    "create_missing of field '%s' requires "
+                    "prefetch_foreign_keys." % field.column_name)
+            if not widget.can_prefetch():
+                raise ImproperlyConfigured(
+                    "create_missing of field '%s' requires a widget with "
+                    "use_cache, the default get_queryset and a "
+                    "non-relational lookup field." % field.column_name)
+
+    def import_data_inner(self, dataset, dry_run, raise_errors, using_transactions, collect_failed_rows,
+                          commit_every=None, resume_from=0, lookup_cache=None, **kwargs):
         result = self.get_result_class()()
         result.diff_headers = self.get_diff_headers()
         result.total_rows = len(dataset)
 
-        if using_transactions:
+        # chunks of a chunked import are wrapped in their own transactions,
+        # dry runs are rolled back as a whole
+        use_savepoint = using_transactions and (dry_run or not commit_every)
+        sp1 = None
+        if use_savepoint:
             # when transactions are used we want to create/update/delete object
             # as transaction will be rolled back if dry_run is set
             sp1 = savepoint()
@@ -526,31 +1481,48 @@ class Resource(six.with_metaclass(DeclarativeMetaclass)):
             tb_info = traceback.format_exc()
             result.append_base_error(self.get_error_result_class()(e, tb_info))
             if raise_errors:
-                if using_transactions:
+                if use_savepoint:
                     savepoint_rollback(sp1)
                 raise
 
-        instance_loader = self._meta.instance_loader_class(self, dataset)
-
         # Update the total in case the dataset was altered by before_import()
         result.total_rows = len(dataset)
 
-        if collect_failed_rows:
-            result.add_dataset_headers(dataset.headers)
+        self.import_plan = self.compile_import_plan()
 
-        for row in dataset.dict:
-            row_result = self.import_row(row, instance_loader, using_transactions, dry_run, **kwargs)
-            result.increment_row_result_total(row_result)
-            if row_result.errors:
-                if collect_failed_rows:
-                    result.append_failed_row(row, row_result.errors[0])
+        if self._meta.prefetch_foreign_keys:
+            try:
+                # objects created by a dry run must be rolled back with it
+                self.prefetch_foreign_keys(dataset, create=not dry_run or use_savepoint)
+            except Exception as e:
+                logging.exception(e)
+                tb_info = traceback.format_exc()
+                result.append_base_error(self.get_error_result_class()(e, tb_info))
                 if raise_errors:
-                    if using_transactions:
+                    if use_savepoint:
                         savepoint_rollback(sp1)
-                    raise row_result.errors[-1].error
-            if (row_result.import_type != RowResult.IMPORT_TYPE_SKIP or
-                    self._meta.report_skipped):
-                result.append_row_result(row_result)
+                    raise
+
+        if collect_failed_rows:
+            result.add_dataset_headers(dataset.headers)
+
+        if self._meta.use_copy:
+            try:
+                self.copy_data(dataset, result, using_transactions, dry_run,
+                               raise_errors, collect_failed_rows)
+            except Exception:
+                if use_savepoint:
+                    savepoint_rollback(sp1)
+                raise
+        elif commit_every:
+            self.import_chunks(dataset, result, commit_every, resume_from,
+                               using_transactions, dry_run, raise_errors,
+                               collect_failed_rows, lookup_cache=lookup_cache,
+                               **kwargs)
+        else:
+            self.import_rows(dataset, result, using_transactions, dry_run,
+                             raise_errors, collect_failed_rows, sp1,
+                             lookup_cache=lookup_cache, **kwargs)
 
         try:
             self.after_import(dataset, result, using_transactions, dry_run, **kwargs)
@@ -559,11 +1531,11 @@ class Resource(six.with_metaclass(DeclarativeMetaclass)):
             tb_info = traceback.format_exc()
             result.append_base_error(self.get_error_result_class()(e, tb_info))
             if raise_errors:
-                if using_transactions:
+                if use_savepoint:
                     savepoint_rollback(sp1)
                 raise
 
-        if using_transactions:
+        if use_savepoint:
             if dry_run or result.has_errors():
                 savepoint_rollback(sp1)
             else:
@@ -571,6 +1543,369 @@ class Resource(six.with_metaclass(DeclarativeMetaclass)):
 
         return result
 
+    def import_rows(self, dataset, result, using_transactions, dry_run,
+                    raise_errors, collect_failed_rows, savepoint_id=None,
+                    stop_on_error=False, lookup_cache=None, **kwargs):
+        """
+        Imports every row of ``dataset`` with
+        :meth:`~import_export.resources.Resource.import_row` and appends the
+        row results to ``result``.
+
+        If ``stop_on_error`` is set, rows following a row with errors are not
+        imported. If ``lookup_cache`` is given, instances are loaded with a
+        :class:`~import_export.instance_loaders.LookupCacheInstanceLoader`.
+        """
+        if lookup_cache is not None:
+            instance_loader = LookupCacheInstanceLoader(
+                self, dataset, self._meta.instance_loader_class, lookup_cache)
+        else:
+            instance_loader = self._meta.instance_loader_class(self, dataset)
+
+        self.create_instances = []
+        self.update_instances = []
+        self.delete_instances = []
+        self.upsert_instances = []
+        # rows whose results are not final until pending bulk operations
+        # have been written
+        pending_rows = []
+
+        self.dataset_headers = dataset.headers
+        self.cleaned_columns = None
+        if self._meta.clean_columns:
+            self.cleaned_columns = self.clean_dataset_columns(dataset)
+
+        for index, row in enumerate(dataset.dict):
+            self.row_index = index
+            row_result = self.import_row(row, instance_loader, using_transactions, dry_run,
+                                         raise_errors=raise_errors or stop_on_error, **kwargs)
+            pending_rows.append((row, row_result))
+            if (self._meta.use_bulk and
+                    self.get_bulk_pending_count() < self._meta.batch_size):
+                continue
+            self.flush_pending_rows(result, pending_rows, using_transactions,
+                                    dry_run, raise_errors, collect_failed_rows,
+                                    savepoint_id)
+            failed = any(r.errors for row, r in pending_rows)
+            pending_rows = []
+            if failed and stop_on_error:
+                break
+        self.cleaned_columns = self.row_index = None
+        self.flush_pending_rows(result, pending_rows, using_transactions,
+                                dry_run, raise_errors, collect_failed_rows,
+                                savepoint_id)
+
+    def import_chunks(self, dataset, result, commit_every, resume_from,
+                      using_transactions, dry_run, raise_errors,
+                      collect_failed_rows, lookup_cache=None, **kwargs):
+        """
+        Imports the rows of ``dataset`` from ``resume_from`` on in chunks of
+        ``commit_every`` rows with
+        :meth:`~import_export.resources.Resource.import_rows`, committing
+        each chunk in its own transaction.
+
+        The import stops at the first row with errors and its chunk is
+        rolled back, the rows imported before it in the chunk are reported
+        as skipped. Committed chunks are recorded in ``result.committed_chunks``
+        and ``result.resume_from`` is the index of the first row which has
+        not been committed.
+        """
+        result.resume_from = resume_from
+        for start in range(resume_from, len(dataset), commit_every):
+            end = min(start + commit_every, len(dataset))
+            chunk = tablib.Dataset(*dataset[start:end], headers=dataset.headers)
+            errors = result.totals[RowResult.IMPORT_TYPE_ERROR]
+            first_row = len(result.rows)
+            if not using_transactions:
+                self.import_rows(chunk, result, using_transactions, dry_run,
+                                 raise_errors, collect_failed_rows,
+                                 stop_on_error=True,
+                                 lookup_cache=lookup_cache, **kwargs)
+                failed = result.totals[RowResult.IMPORT_TYPE_ERROR] > errors
+            else:
+                with transaction.atomic():
+                    sp = savepoint()
+                    self.import_rows(chunk, result, using_transactions,
+                                     dry_run, raise_errors,
+                                     collect_failed_rows, sp,
+                                     stop_on_error=True,
+                                     lookup_cache=lookup_cache, **kwargs)
+                    failed = result.totals[RowResult.IMPORT_TYPE_ERROR] > errors
+                    if dry_run or failed:
+                        savepoint_rollback(sp)
+                    else:
+                        savepoint_commit(sp)
+                if failed:
+                    self.skip_rolled_back_rows(result, first_row)
+            if failed:
+                break
+            if not dry_run:
+                result.append_committed_chunk(start, end)
+
+    def skip_rolled_back_rows(self, result, first_row):
+        """
+        Reports the rows of ``result`` from ``first_row`` on which have been
+        imported without errors as skipped, as their chunk has been rolled
+        back. They are kept in ``result.rows`` even if skipped rows are not
+        reported, so that rows keep their line numbers.
+        """
+        for row_result in result.rows[first_row:]:
+            if row_result.import_type in (RowResult.IMPORT_TYPE_ERROR,
+                                          RowResult.IMPORT_TYPE_SKIP):
+                continue
+            result.totals[row_result.import_type] -= 1
+            result.totals[RowResult.IMPORT_TYPE_SKIP] += 1
+            row_result.import_type = RowResult.IMPORT_TYPE_SKIP
+            row_result.object_id = None
+
+    def copy_data(self, dataset, result, using_transactions, dry_run,
+                  raise_errors, collect_failed_rows):
+        """
+        Loads the rows of ``dataset`` straight into the model's table, see
+        :attr:`~import_export.resources.ResourceOptions.use_copy`.
+
+        Only rows which fail to be cleaned get a
+        :class:`~import_export.results.RowResult` appended to ``result``,
+        with the line ``number`` of the row, loaded rows are counted in
+        ``result.totals``.
+        """
+        columns = self.get_copy_columns(dataset)
+        headers = dataset.headers
+        existing = self.get_copy_existing_keys(dataset)
+        key_fields = [self.fields[name] for name in self.get_import_id_fields()]
+
+        def rows():
+            for index, values in enumerate(dataset):
+                row = OrderedDict(six.moves.zip(headers, values))
+                try:
+                    if existing and self.get_copy_key(key_fields,
+                                                      row) in existing:
+                        raise ValueError(
+                            "An instance with these %s already exists, "
+                            "use_copy only appends rows."
+                            % ", ".join(self.get_import_id_fields()))
+                    yield tuple(self.copy_value(model_field, field, row)
+                                for model_field, field in columns)
+                except Exception as e:
+                    if raise_errors:
+                        raise
+                    row_result = self.get_row_result_class()()
+                    row_result.import_type = RowResult.IMPORT_TYPE_ERROR
+                    row_result.number = index + 1
+                    row_result.errors.append(self.get_error_result_class()(
+                        e, traceback.format_exc(), row))
+                    result.increment_row_result_total(row_result)
+                    result.append_row_result(row_result)
+                    if collect_failed_rows:
+                        result.append_failed_row(row, row_result.errors[0])
+
+        if not using_transactions and dry_run:
+            # we don't have transactions and we want to do a dry_run
+            count = sum(1 for row in rows())
+        else:
+            try:
+                count = copy_rows(self._meta.model,
+                                  [model_field for model_field, f in columns],
+                                  rows(), DEFAULT_DB_ALIAS,
+                                  self._meta.batch_size)
+            except Exception as e:
+                if raise_errors:
+                    raise
+                logging.exception(e)
+                result.append_base_error(self.get_error_result_class()(
+                    e, traceback.format_exc()))
+                return
+        result.totals[RowResult.IMPORT_TYPE_NEW] += count
+
+    def check_copy_support(self):
+        """
+        Raises ``ImproperlyConfigured`` if the resource uses options which
+        :meth:`~import_export.resources.Resource.copy_data` can't honour, as
+        it only appends rows without initializing instances:
+        ``use_upsert``, ``skip_unchanged``, overridden row, field or save
+        hooks listed in ``copy_ignored_methods``, or model fields whose
+        values can't be written as ``COPY`` text, see
+        :data:`~import_export.pgcopy.UNSUPPORTED_FIELD_TYPES`.
+        """
+        if self._meta.use_upsert:
+            raise ImproperlyConfigured(
+                "use_copy can't be combined with use_upsert.")
+        if self._meta.skip_unchanged:
+            raise ImproperlyConfigured(
+                "use_copy can't be combined with skip_unchanged.")
+        for name in self.copy_ignored_methods:
+            if (six.get_unbound_function(getattr(type(self), name)) is not
+                    six.get_unbound_function(getattr(Resource, name))):
+                raise ImproperlyConfigured(
+                    "use_copy can't be used by resources overriding %s."
+                    % name)
+        for model_field in self._meta.model._meta.local_concrete_fields:
+            if model_field.get_internal_type() in UNSUPPORTED_FIELD_TYPES:
+                raise ImproperlyConfigured(
+                    "use_copy can't load %s %s."
+                    % (model_field.get_internal_type(), model_field.name))
+
+    def get_copy_existing_keys(self, dataset):
+        """
+        Returns the set of the keys of rows of ``dataset`` which match an
+        existing instance by ``import_id_fields``, as tuples of the values
+        of the key fields. :meth:`~import_export.resources.Resource.copy_data`
+        reports these rows as errors instead of loading them.
+        """
+        key_fields = [self.fields[name] for name in self.get_import_id_fields()]
+        if any(field.column_name not in dataset.headers
+               for field in key_fields):
+            return set()
+        keys = set()
+        for row in dataset.dict:
+            key = self.get_copy_key(key_fields, row)
+            if key is not None:
+                keys.add(key)
+        keys = list(keys)
+        attributes = [field.attribute for field in key_fields]
+        queryset = self._meta.model._default_manager.all()
+        chunk_size = 900 // len(key_fields)
+        existing = set()
+        for i in range(0, len(keys), chunk_size):
+            chunk = keys[i:i + chunk_size]
+            if len(attributes) == 1:
+                chunk_queryset = queryset.filter(**{
+                    '%s__in' % attributes[0]: [key[0] for key in chunk]})
+            else:
+                q = Q()
+                for key in chunk:
+                    q |= Q(**dict(six.moves.zip(attributes, key)))
+                chunk_queryset = queryset.filter(q)
+            existing.update(tuple(values) for values in
+                            chunk_queryset.values_list(*attributes))
+        return existing
+
+    def get_copy_key(self, key_fields, row):
+        # key of a row, None if it has no complete key or can't be cleaned
+        try:
+            key = tuple(field.clean(row) for field in key_fields)
+        except Exception:
+            return None
+        if any(value in Field.empty_values for value in key):
+            return None
+        return tuple(value.pk if isinstance(value, Model) else value
+                     for value in key)
+
+    def get_copy_columns(self, dataset):
+        """
+        Returns ``(model_field, field)`` tuples for the columns loaded by
+        :meth:`~import_export.resources.Resource.copy_data`, where ``field``
+        is the resource field mapping the column, or ``None`` if the column
+        gets the model field's default.
+
+        An ``AutoField`` is only loaded if every row has a value for it.
+        """
+        fields = dict((f.attribute, f) for f in self.get_fields()
+                      if not f.readonly and f.column_name in dataset.headers)
+        columns = []
+        for model_field in self._meta.model._meta.local_concrete_fields:
+            field = fields.get(model_field.name)
+            if isinstance(model_field, AutoField) and (
+                    field is None or
+                    any(v in Field.empty_values
+                        for v in dataset[field.column_name])):
+                continue
+            columns.append((model_field, field))
+        return columns
+
+    def copy_value(self, model_field, field, row):
+        """
+        Returns the value of ``model_field`` for ``row`` prepared for the
+        database.
+        """
+        if field is not None:
+            value = field.clean(row)
+            if isinstance(value, Model):
+                value = getattr(value,
+                                model_field.rel.get_related_field().attname)
+        elif getattr(model_field, 'auto_now', False) or \
+                getattr(model_field, 'auto_now_add', False):
+            if isinstance(model_field, DateTimeField):
+                value = timezone.now()
+            elif isinstance(model_field, DateField):
+                value = date.today()
+            else:
+                value = datetime.now().time()
+        else:
+            value = model_field.get_default()
+        return model_field.get_db_prep_save(
+            value, connection=connections[DEFAULT_DB_ALIAS])
+
+    def flush_pending_rows(self, result, pending_rows, using_transactions,
+                           dry_run, raise_errors, collect_failed_rows,
+                           savepoint_id=None):
+        """
+        Writes pending bulk operations and appends results of
+        ``pending_rows``, a list of ``(row, row_result)`` tuples, to
+        ``result``.
+        """
+        if self._meta.use_bulk:
+            self.write_bulk_instances(pending_rows, using_transactions,
+                                      dry_run)
+        for row, row_result in pending_rows:
+            result.increment_row_result_total(row_result)
+            if row_result.errors:
+                if collect_failed_rows:
+                    result.append_failed_row(row, row_result.errors[0])
+                if raise_errors:
+                    if savepoint_id is not None:
+                        savepoint_rollback(savepoint_id)
+                    raise row_result.errors[-1].error
+            if (row_result.import_type != RowResult.IMPORT_TYPE_SKIP or
+                    self._meta.report_skipped):
+                result.append_row_result(row_result)
+
+    def write_bulk_instances(self, pending_rows, using_transactions, dry_run):
+        """
+        Writes queued instances in bulk, then saves many-to-many fields of
+        the written instances and updates the row results of ``pending_rows``
+        accordingly.
+        """
+        upsert_errors, created = self.bulk_upsert(using_transactions, dry_run)
+        errors = dict(
+            (id(instance), (e, tb)) for instance, e, tb in
+            self.save_new_m2m_instances(pending_rows, using_transactions,
+                                        dry_run) +
+            self.bulk_create(using_transactions, dry_run) +
+            self.bulk_update(using_transactions, dry_run) +
+            self.bulk_delete(using_transactions, dry_run) + upsert_errors)
+        m2m_rows = []
+        for row, row_result in pending_rows:
+            instance = row_result.instance
+            row_result.instance = None
+            if instance is None or row_result.errors:
+                continue
+            if self._meta.use_upsert:
+                row_result.new_record = id(instance) in created
+                row_result.import_type = (
+                    RowResult.IMPORT_TYPE_NEW if row_result.new_record
+                    else RowResult.IMPORT_TYPE_UPDATE)
+            error = errors.get(id(instance))
+            if (error is None and
+                    row_result.import_type != RowResult.IMPORT_TYPE_DELETE):
+                m2m_rows.append((instance, row, row_result))
+            elif error is not None:
+                self._set_row_error(row_result, row, error)
+        m2m_errors = dict(
+            (id(instance), (e, tb)) for instance, e, tb in
+            self.bulk_save_m2m([(instance, row) for instance, row, _ in m2m_rows],
+                               using_transactions, dry_run))
+        for instance, row, row_result in m2m_rows:
+            error = m2m_errors.get(id(instance))
+            if error is None:
+                row_result.object_id = instance.pk
+            else:
+                self._set_row_error(row_result, row, error)
+
+    def _set_row_error(self, row_result, row, error):
+        row_result.import_type = RowResult.IMPORT_TYPE_ERROR
+        row_result.errors.append(
+            self.get_error_result_class()(error[0], error[1], row))
+
     def get_export_order(self):
         order = tuple(self._meta.export_order or ())
         return order + tuple(k for k in self.fields.keys() if k not in order)
@@ -598,7 +1933,38 @@ class Resource(six.with_metaclass(DeclarativeMetaclass)):
         return self.get_fields()
 
     def export_resource(self, obj):
-        return [self.export_field(field, obj) for field in self.get_export_fields()]
+        return [export(obj) for export in self.get_export_plan()]
+
+    def compile_export_plan(self):
+        """
+        Returns the export plan of the resource, a tuple holding a function
+        returning the export representation of an object per field of
+        :meth:`~import_export.resources.Resource.get_export_fields`.
+
+        These are the resolved ``dehydrate_<field_name>`` methods and the
+        functions returned by :meth:`~import_export.fields.Field.get_exporter`,
+        or :meth:`~import_export.resources.Resource.export_field` bound to each
+        field if it is overridden.
+        """
+        if (six.get_unbound_function(type(self).export_field) is not
+                six.get_unbound_function(Resource.export_field)):
+            return tuple(functools.partial(self.export_field, field)
+                         for field in self.get_export_fields())
+        plan = []
+        for field in self.get_export_fields():
+            field_name = self.get_field_name(field)
+            method = getattr(self, 'dehydrate_%s' % field_name, None)
+            plan.append(method if method is not None else field.get_exporter())
+        return tuple(plan)
+
+    def get_export_plan(self):
+        """
+        Returns the export plan compiled at the start of the running export,
+        or compiles it if no export is running.
+        """
+        if self.export_plan is None:
+            return self.compile_export_plan()
+        return self.export_plan
 
     def get_export_headers(self):
         headers = [
@@ -620,18 +1986,94 @@ class Resource(six.with_metaclass(DeclarativeMetaclass)):
         headers = self.get_export_headers()
         data = tablib.Dataset(headers=headers)
 
+        for row in self.iter_export_rows(queryset):
+            data.append(row)
+
+        self.after_export(queryset, data, *args, **kwargs)
+
+        return data
+
+    def iter_export(self, queryset=None, *args, **kwargs):
+        """
+        Exports a resource row by row, without building a dataset: returns
+        a generator of the export representations of the objects of
+        ``queryset``, see
+        :meth:`~import_export.resources.Resource.get_export_headers` for the
+        headers. ``after_export`` receives ``None`` as ``data``.
+        """
+        self.before_export(queryset, *args, **kwargs)
+
+        if queryset is None:
+            queryset = self.get_queryset()
+
+        for row in self.iter_export_rows(queryset):
+            yield row
+
+        self.after_export(queryset, None, *args, **kwargs)
+
+    def get_export_relations(self):
+        """
+        Returns a tuple of the lists of ``select_related`` and
+        ``prefetch_related`` lookups followed by the exported fields.
+
+        Default implementation returns empty lists.
+        """
+        return [], []
+
+    def iter_export_rows(self, queryset):
+        """
+        Returns a generator of the export representations of the objects of
+        ``queryset`` with the export plan compiled for them.
+
+        Querysets are iterated with the
+        :meth:`~import_export.resources.Resource.get_export_relations` if
+        ``prefetch_export_relations`` is set, prefetching lookups for chunks
+        of objects, as ``QuerySet.iterator()`` doesn't.
+        """
         if isinstance(queryset, QuerySet):
+            prefetch = list(queryset._prefetch_related_lookups)
+            if (self._meta.prefetch_export_relations and
+                    getattr(queryset, '_fields', None) is None):
+                select_related, prefetch_related = self.get_export_relations()
+                if queryset.query.deferred_loading[0]:
+                    # select_related can't follow deferred fields, foreign
+                    # keys are prefetched instead
+                    prefetch_related = select_related + prefetch_related
+                elif select_related and queryset.query.select_related is not True:
+                    queryset = queryset.select_related(*select_related)
+                prefetch.extend(lookup for lookup in prefetch_related
+                                if lookup not in prefetch)
             # Iterate without the queryset cache, to avoid wasting memory when
             # exporting large datasets.
             iterable = queryset.iterator()
+            if prefetch:
+                iterable = self.iter_prefetched(iterable, prefetch)
         else:
             iterable = queryset
-        for obj in iterable:
-            data.append(self.export_resource(obj))
-
-        self.after_export(queryset, data, *args, **kwargs)
-
-        return data
+        self.export_plan = self.compile_export_plan()
+        try:
+            for obj in iterable:
+                yield self.export_resource(obj)
+        finally:
+            self.export_plan = None
+
+    def iter_prefetched(self, objects, lookups):
+        """
+        Yields ``objects`` after prefetching ``lookups`` for chunks of
+        ``export_chunk_size`` objects.
+        """
+        chunk = []
+        for obj in objects:
+            chunk.append(obj)
+            if len(chunk) >= self._meta.export_chunk_size:
+                prefetch_related_objects(chunk, *lookups)
+                for prefetched in chunk:
+                    yield prefetched
+                chunk = []
+        if chunk:
+            prefetch_related_objects(chunk, *lookups)
+            for prefetched in chunk:
+                yield prefetched
 
 
 class ModelDeclarativeMetaclass(DeclarativeMetaclass):
@@ -802,6 +2244,55 @@ class ModelResource(six.with_metaclass(ModelDeclarativeMetaclass, Resource)):
         """
         return self._meta.model.objects.all()
 
+    def get_export_relations(self):
+        """
+        Returns a tuple of the lists of ``select_related`` and
+        ``prefetch_related`` lookups followed by the exported fields: the
+        foreign keys and the many-to-many field their ``attribute`` traverses
+        on the model. Fields exported by a ``dehydrate_<field_name>`` method
+        are not followed.
+        """
+        select_related, prefetch_related = [], []
+        for field in self.get_export_fields():
+            if not field.attribute:
+                continue
+            try:
+                field_name = self.get_field_name(field)
+            except AttributeError:
+                field_name = None
+            if field_name and hasattr(self, 'dehydrate_%s' % field_name):
+                continue
+            model = self._meta.model
+            path = []
+            for attr in field.attribute.split('__'):
+                try:
+                    model_field = model._meta.get_field(attr)
+                except FieldDoesNotExist:
+                    break
+                if isinstance(model_field, ForeignObjectRel):
+                    break
+                path.append(attr)
+                lookup = '__'.join(path)
+                if isinstance(model_field, ManyToManyField):
+                    if lookup not in prefetch_related:
+                        prefetch_related.append(lookup)
+                    break
+                if getattr(model_field, 'rel', None) is None:
+                    break
+                if lookup not in select_related:
+                    select_related.append(lookup)
+                model = model_field.rel.to
+        return select_related, prefetch_related
+
+    def get_lookup_cache_version(self):
+        """
+        Returns the number of instances and the greatest primary key of the
+        queryset, which change if instances are created or deleted.
+        """
+        aggregates = self.get_queryset().aggregate(count=Count('pk'),
+                                                   max_pk=Max('pk'))
+        return '%(count)s:%(max_pk)s' % aggregates
+
     def init_instance(self, row=None):
         """
         Initializes a new Django model.
@@ -813,7 +2304,7 @@ class ModelResource(six.with_metaclass(ModelDeclarativeMetaclass, Resource)):
         Reset the SQL sequences after new objects are imported
         """
         # Adapted from django's loaddata
-        if not dry_run and any(r.import_type == RowResult.IMPORT_TYPE_NEW for r in result.rows):
+        if not dry_run and result.totals[RowResult.IMPORT_TYPE_NEW]:
             connection = connections[DEFAULT_DB_ALIAS]
             sequence_sql = connection.ops.sequence_reset_sql(no_style(), [self._meta.model])
             if sequence_sql:
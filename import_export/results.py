@@ -24,8 +24,27 @@ class RowResult(object):
 
     def __init__(self):
         self.errors = []
-        self.diff = None
+        self._diff = None
         self.import_type = None
+        #: Instance whose bulk operations are still pending, if any
+        self.instance = None
+        #: Line number of the row in its dataset, set if row results are not
+        #: appended for every row
+        self.number = None
+
+    @property
+    def diff(self):
+        """
+        List of HTML fragments of the differences of the exported fields,
+        rendered on first access.
+        """
+        if hasattr(self._diff, 'as_html'):
+            self._diff = self._diff.as_html()
+        return self._diff
+
+    @diff.setter
+    def diff(self, value):
+        self._diff = value
 
 
 class Result(object):
@@ -41,6 +60,10 @@ class Result(object):
                                    (RowResult.IMPORT_TYPE_SKIP, 0),
                                    (RowResult.IMPORT_TYPE_ERROR, 0)])
         self.total_rows = 0
+        #: ``(start, end)`` row ranges committed by a chunked import
+        self.committed_chunks = []
+        #: Index of the first row a chunked import has not committed
+        self.resume_from = 0
 
     def append_row_result(self, row_result):
         self.rows.append(row_result)
@@ -51,6 +74,10 @@ class Result(object):
     def add_dataset_headers(self, headers):
         self.failed_dataset.headers = headers + ["Error"]
 
+    def append_committed_chunk(self, start, end):
+        self.committed_chunks.append((start, end))
+        self.resume_from = end
+
     def append_failed_row(self, row, error):
         row_values = [v for (k, v) in row.items()]
         row_values.append(str(error.error))
@@ -61,7 +88,7 @@ class Result(object):
             self.totals[row_result.import_type] += 1
 
     def row_errors(self):
-        return [(i + 1, row.errors)
+        return [(row.number or i + 1, row.errors)
                 for i, row in enumerate(self.rows) if row.errors]
 
     def has_errors(self):
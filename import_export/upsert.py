@@ -0,0 +1,180 @@
+from __future__ import unicode_literals
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.db.models import AutoField, Q
+
+#: Database vendors supporting native upserts.
+SUPPORTED_VENDORS = ('postgresql', 'sqlite', 'mysql')
+
+
+def get_key(instance, key_fields):
+    """
+    Returns the values of ``key_fields`` of ``instance`` as a tuple.
+    """
+    return tuple(getattr(instance, f.attname) for f in key_fields)
+
+
+def check_upsert_support(model, key_fields, using):
+    """
+    Raises ``ImproperlyConfigured`` if rows of ``model`` can't be upserted
+    on ``key_fields`` with the ``using`` database.
+    """
+    connection = connections[using]
+    if connection.vendor not in SUPPORTED_VENDORS:
+        raise ImproperlyConfigured(
+            "Upserts are not supported by the '%s' database backend."
+            % connection.vendor)
+    if (connection.vendor == 'sqlite' and
+            connection.Database.sqlite_version_info < (3, 24, 0)):
+        raise ImproperlyConfigured("Upserts require SQLite 3.24 or later.")
+    if model._meta.parents:
+        raise ImproperlyConfigured(
+            "Upserts are not supported for multi-table inherited models.")
+    names = set(f.name for f in key_fields)
+    unique = (len(key_fields) == 1 and key_fields[0].unique) or any(
+        set(fields) == names for fields in model._meta.unique_together)
+    if not unique:
+        raise ImproperlyConfigured(
+            "Upserts require a unique constraint on %s of %s."
+            % (", ".join(sorted(names)), model.__name__))
+
+
+def get_existing_keys(model, instances, key_fields, using):
+    """
+    Returns the set of keys of ``instances`` already present in the
+    database.
+    """
+    return set(get_existing_pks(model, instances, key_fields, using))
+
+
+def get_existing_pks(model, instances, key_fields, using, unique=False):
+    """
+    Returns a dict of the primary keys of the rows matching the keys of
+    ``instances`` by key. If ``unique`` is set, keys matching several rows
+    are left out.
+    """
+    attnames = [f.attname for f in key_fields]
+    queryset = model._default_manager.using(using)
+    if len(key_fields) == 1:
+        queryset = queryset.filter(**{
+            '%s__in' % attnames[0]: [getattr(i, attnames[0]) for i in instances]
+        })
+    else:
+        q = Q()
+        for instance in instances:
+            q |= Q(**dict((attname, getattr(instance, attname))
+                          for attname in attnames))
+        queryset = queryset.filter(q)
+    pks, duplicates = {}, set()
+    for values in queryset.values_list(model._meta.pk.attname, *attnames):
+        key = tuple(values[1:])
+        if key in pks:
+            duplicates.add(key)
+        pks[key] = values[0]
+    if unique:
+        for key in duplicates:
+            del pks[key]
+    return pks
+
+
+def split_batches(instances, key_fields, batch_size):
+    """
+    Splits ``instances`` into batches which can be written by a single
+    upsert statement: keys are unique within a batch, and either all or
+    none of the instances of a batch have a primary key.
+    """
+    batch, keys = [], set()
+    for instance in instances:
+        key = get_key(instance, key_fields)
+        if batch and (len(batch) >= batch_size or key in keys or
+                      (batch[0].pk is None) != (instance.pk is None)):
+            yield batch
+            batch, keys = [], set()
+        batch.append(instance)
+        keys.add(key)
+    if batch:
+        yield batch
+
+
+def upsert(model, instances, key_fields, update_fields, using,
+           batch_size=None):
+    """
+    Inserts ``instances``, updating ``update_fields`` of existing rows
+    which conflict on ``key_fields`` instead.
+
+    PostgreSQL and SQLite use ``INSERT ... ON CONFLICT ... DO UPDATE``,
+    MySQL uses ``INSERT ... ON DUPLICATE KEY UPDATE``. Primary keys of
+    ``instances`` are set, with ``RETURNING`` on PostgreSQL and by selecting
+    the rows of their keys on other databases. Returns a list of booleans,
+    ``True`` for every instance which has been inserted.
+    """
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    opts = model._meta
+    vendor = connection.vendor
+    fields = list(opts.local_concrete_fields)
+    max_batch_size = max(connection.ops.bulk_batch_size(fields, instances), 1)
+    batch_size = min(batch_size or max_batch_size, max_batch_size)
+    key_columns = [f.column for f in key_fields]
+    update_columns = [f.column for f in update_fields
+                      if f.column not in key_columns]
+
+    created = {}
+    cursor = connection.cursor()
+    try:
+        for batch in split_batches(instances, key_fields, batch_size):
+            batch_fields = fields
+            if batch[0].pk is None:
+                batch_fields = [f for f in fields
+                                if not isinstance(f, AutoField)]
+            columns = [f.column for f in batch_fields]
+            placeholder = '(%s)' % ', '.join(['%s'] * len(batch_fields))
+            sql = 'INSERT INTO %s (%s) VALUES %s' % (
+                qn(opts.db_table),
+                ', '.join(qn(c) for c in columns),
+                ', '.join([placeholder] * len(batch)))
+            # assign a key column to itself if there is nothing to update
+            # so that every row is returned and classified
+            assignments = [c for c in update_columns if c in columns]
+            assignments = assignments or key_columns[:1]
+            if vendor == 'mysql':
+                sql += ' ON DUPLICATE KEY UPDATE %s' % ', '.join(
+                    '%s = VALUES(%s)' % (qn(c), qn(c)) for c in assignments)
+            else:
+                sql += ' ON CONFLICT (%s) DO UPDATE SET %s' % (
+                    ', '.join(qn(c) for c in key_columns),
+                    ', '.join('%s = EXCLUDED.%s' % (qn(c), qn(c))
+                              for c in assignments))
+            params = []
+            for instance in batch:
+                params.extend(
+                    f.get_db_prep_save(f.pre_save(instance, True),
+                                       connection=connection)
+                    for f in batch_fields)
+
+            if vendor == 'postgresql':
+                sql += ' RETURNING %s, (xmax = 0)' % qn(opts.pk.column)
+                cursor.execute(sql, params)
+                for instance, (pk, inserted) in zip(batch, cursor.fetchall()):
+                    instance.pk = pk
+                    created[id(instance)] = inserted
+            else:
+                pks = get_existing_pks(model, batch, key_fields, using)
+                cursor.execute(sql, params)
+                inserted = [instance for instance in batch
+                            if get_key(instance, key_fields) not in pks]
+                if inserted:
+                    pks.update(get_existing_pks(model, inserted, key_fields,
+                                                using))
+                inserted = set(id(instance) for instance in inserted)
+                for instance in batch:
+                    created[id(instance)] = id(instance) in inserted
+                    instance.pk = pks.get(get_key(instance, key_fields),
+                                          instance.pk)
+            for instance in batch:
+                instance._state.adding = False
+                instance._state.db = using
+    finally:
+        cursor.close()
+    return [created[id(instance)] for instance in instances]
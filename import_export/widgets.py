@@ -1,17 +1,28 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import re
+from collections import OrderedDict
+from itertools import chain
 from decimal import Decimal
 from datetime import datetime, date
 from django.utils import datetime_safe, timezone, six
 from django.utils.encoding import smart_text
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models.fields import FieldDoesNotExist
 
 try:
     from django.utils.encoding import force_text
 except ImportError:
     from django.utils.encoding import force_unicode as force_text
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 class Widget(object):
     """
@@ -47,6 +58,11 @@ class Widget(object):
 
 class NumberWidget(Widget):
     """
+    Base class for widgets converting numbers.
+
+    Numbers can be converted a column at a time with
+    :meth:`~import_export.widgets.NumberWidget.clean_column`, see the
+    ``clean_columns`` resource option.
     """
 
     def is_empty(self, value):
@@ -56,6 +72,61 @@ class NumberWidget(Widget):
     def render(self, value, obj=None):
         return value
 
+    def clean_column(self, values):
+        """
+        Cleans ``values``, the values of a column of the datasource, at once
+        and returns the list of cleaned values. The exception raised for a
+        value which can't be cleaned takes its place in the list.
+        """
+        cleaned = []
+        for value in values:
+            try:
+                cleaned.append(self.clean(value))
+            except Exception as e:
+                cleaned.append(e)
+        return cleaned
+
+    def _has_fast_clean(self):
+        # whether clean is the one clean_column is equivalent to
+        cls = type(self)
+        fast_clean = getattr(cls, '_fast_clean', None)
+        return fast_clean is not None and (
+            six.get_unbound_function(cls.clean) is
+            six.get_unbound_function(fast_clean))
+
+    def _clean_column_with(self, values, convert):
+        # converts values with a single list comprehension, falling back to
+        # value by value cleaning if a value can't be converted or if clean
+        # is overridden by a subclass
+        if not self._has_fast_clean():
+            return NumberWidget.clean_column(self, values)
+        is_empty = self.is_empty
+        try:
+            return [None if is_empty(value) else convert(value)
+                    for value in values]
+        except Exception:
+            return NumberWidget.clean_column(self, values)
+
+    def _clean_column_with_numpy(self, values, integer=False):
+        # converts the non-empty values with a single numpy array, returns
+        # None if numpy is not installed or can't convert them exactly
+        if numpy is None or not self._has_fast_clean():
+            return None
+        is_empty = self.is_empty
+        empty = [is_empty(value) for value in values]
+        try:
+            array = numpy.array([value for value, e in zip(values, empty)
+                                 if not e], dtype=float)
+        except (ValueError, TypeError):
+            return None
+        if integer:
+            if not numpy.isfinite(array).all() or (
+                    abs(array) >= 2 ** 53).any():
+                return None
+            array = array.astype(numpy.int64)
+        converted = iter(array.tolist())
+        return [None if e else next(converted) for e in empty]
+
 
 class FloatWidget(NumberWidget):
     """
@@ -67,6 +138,14 @@ class FloatWidget(NumberWidget):
             return None
         return float(value)
 
+    _fast_clean = clean
+
+    def clean_column(self, values):
+        cleaned = self._clean_column_with_numpy(values)
+        if cleaned is None:
+            cleaned = self._clean_column_with(values, float)
+        return cleaned
+
 
 class IntegerWidget(NumberWidget):
     """
@@ -78,6 +157,15 @@ class IntegerWidget(NumberWidget):
             return None
         return int(float(value))
 
+    _fast_clean = clean
+
+    def clean_column(self, values):
+        cleaned = self._clean_column_with_numpy(values, integer=True)
+        if cleaned is None:
+            cleaned = self._clean_column_with(
+                values, lambda value: int(float(value)))
+        return cleaned
+
 
 class DecimalWidget(NumberWidget):
     """
@@ -89,6 +177,11 @@ class DecimalWidget(NumberWidget):
             return None
         return Decimal(value)
 
+    _fast_clean = clean
+
+    def clean_column(self, values):
+        return self._clean_column_with(values, Decimal)
+
 
 class CharWidget(Widget):
     """
@@ -117,7 +210,124 @@ class BooleanWidget(Widget):
         return True if value in self.TRUE_VALUES else False
 
 
-class DateWidget(Widget):
+#: Regular expressions of the ``strptime`` directives parsed by
+#: :class:`FormatParser` without ``strptime``, by directive.
+FAST_DIRECTIVES = {
+    'Y': ('year', r'\d{4}'),
+    'm': ('month', r'\d{1,2}'),
+    'd': ('day', r'\d{1,2}'),
+    'H': ('hour', r'\d{1,2}'),
+    'M': ('minute', r'\d{1,2}'),
+    'S': ('second', r'\d{1,2}'),
+    'f': ('microsecond', r'\d{1,6}'),
+}
+
+
+def compile_format(format):
+    """
+    Returns a compiled regular expression matching ``format``, a
+    ``strptime`` format, with a named group per directive, or ``None`` if
+    ``format`` has directives which are not in ``FAST_DIRECTIVES`` or which
+    are not separated by other characters.
+    """
+    pattern, previous = [], None
+    for part in re.split(r'(%.)', format):
+        if part.startswith('%') and len(part) == 2:
+            if part[1] not in FAST_DIRECTIVES or previous == 'directive':
+                return None
+            name, regex = FAST_DIRECTIVES[part[1]]
+            if '(?P<%s>' % name in ''.join(pattern):
+                return None
+            pattern.append('(?P<%s>%s)' % (name, regex))
+            previous = 'directive'
+        elif part:
+            pattern.extend(r'\s+' if c.isspace() else re.escape(c)
+                           for c in part)
+            previous = 'literal'
+    return re.compile(''.join(pattern) + r'\Z')
+
+
+class FormatParser(object):
+    """
+    Parses strings into naive datetimes with the first matching of a list of
+    ``strptime`` formats.
+
+    Formats made of numeric date and time directives are matched by
+    compiled regular expressions instead of ``strptime``, the last matching
+    format is tried first for the next string and results are memoized, so
+    that columns of dates in the same format are parsed quickly. Formats are
+    kept in a tuple which is never reordered, as parsers of widgets are
+    shared by concurrent imports.
+    """
+    #: Maximum number of memoized results, the memo is cleared when full.
+    memo_size = 10000
+
+    def __init__(self, formats):
+        self.formats = tuple(formats)
+        self.patterns = dict((format, compile_format(format))
+                             for format in self.formats)
+        #: Index of the last matching format in ``formats``
+        self.last = 0
+        self.memo = {}
+
+    def parse(self, value):
+        """
+        Returns the naive datetime ``value`` represents, raises
+        ``ValueError`` if no format matches it.
+        """
+        try:
+            return self.memo[value]
+        except (KeyError, TypeError):
+            pass
+        formats, last = self.formats, self.last
+        if not formats:
+            raise ValueError(value)
+        for i in chain((last,), range(last), range(last + 1, len(formats))):
+            try:
+                dt = self.parse_format(value, formats[i])
+            except (ValueError, TypeError):
+                continue
+            self.last = i
+            if len(self.memo) >= self.memo_size:
+                self.memo.clear()
+            self.memo[value] = dt
+            return dt
+        raise ValueError(value)
+
+    def parse_format(self, value, format):
+        pattern = self.patterns[format]
+        if pattern is None:
+            return datetime.strptime(value, format)
+        match = pattern.match(value)
+        if match is None:
+            raise ValueError(value)
+        parts = match.groupdict()
+        if 'microsecond' in parts:
+            parts['microsecond'] = parts['microsecond'].ljust(6, '0')
+        kwargs = {'year': 1900, 'month': 1, 'day': 1}
+        kwargs.update((name, int(part)) for name, part in six.iteritems(parts))
+        return datetime(**kwargs)
+
+
+class FormatParserMixin(object):
+    """
+    Mixin for widgets parsing values with the ``strptime`` formats of their
+    ``formats`` attribute.
+    """
+
+    def get_parser(self):
+        """
+        Returns the :class:`FormatParser` of ``formats``, which is rebuilt
+        if ``formats`` is replaced.
+        """
+        parser = getattr(self, '_parser', None)
+        if parser is None or self._parser_formats is not self.formats:
+            self._parser = parser = FormatParser(self.formats)
+            self._parser_formats = self.formats
+        return parser
+
+
+class DateWidget(FormatParserMixin, Widget):
     """
     Widget for converting date fields.
 
@@ -139,12 +349,10 @@ class DateWidget(Widget):
             return None
         if isinstance(value, date):
             return value
-        for format in self.formats:
-            try:
-                return datetime.strptime(value, format).date()
-            except (ValueError, TypeError):
-                continue
-        raise ValueError("Enter a valid date.")
+        try:
+            return self.get_parser().parse(value).date()
+        except ValueError:
+            raise ValueError("Enter a valid date.")
 
     def render(self, value, obj=None):
         if not value:
@@ -155,7 +363,7 @@ class DateWidget(Widget):
             return datetime_safe.new_date(value).strftime(self.formats[0])
 
 
-class DateTimeWidget(Widget):
+class DateTimeWidget(FormatParserMixin, Widget):
     """
     Widget for converting date fields.
 
@@ -178,18 +386,15 @@ class DateTimeWidget(Widget):
             return None
         if isinstance(value, datetime):
             return value
-        for format in self.formats:
-            try:
-                dt = datetime.strptime(value, format)
-                if settings.USE_TZ:
-                    # make datetime timezone aware so we don't compare
-                    # naive datetime to an aware one
-                    dt = timezone.make_aware(dt,
-                                             timezone.get_default_timezone())
-                return dt
-            except (ValueError, TypeError):
-                continue
-        raise ValueError("Enter a valid date/time.")
+        try:
+            dt = self.get_parser().parse(value)
+        except ValueError:
+            raise ValueError("Enter a valid date/time.")
+        if settings.USE_TZ:
+            # make datetime timezone aware so we don't compare
+            # naive datetime to an aware one
+            dt = timezone.make_aware(dt, timezone.get_default_timezone())
+        return dt
 
     def render(self, value, obj=None):
         if not value:
@@ -197,7 +402,7 @@ class DateTimeWidget(Widget):
         return value.strftime(self.formats[0])
 
 
-class TimeWidget(Widget):
+class TimeWidget(FormatParserMixin, Widget):
     """
     Widget for converting time fields.
 
@@ -217,12 +422,10 @@ class TimeWidget(Widget):
     def clean(self, value, row=None, *args, **kwargs):
         if not value:
             return None
-        for format in self.formats:
-            try:
-                return datetime.strptime(value, format).time()
-            except (ValueError, TypeError):
-                continue
-        raise ValueError("Enter a valid time.")
+        try:
+            return self.get_parser().parse(value).time()
+        except ValueError:
+            raise ValueError("Enter a valid time.")
 
     def render(self, value, obj=None):
         if not value:
@@ -244,6 +447,39 @@ class SimpleArrayWidget(Widget):
         return self.separator.join(six.text_type(v) for v in value)
 
 
+def _get_lookup_field(model, field):
+    """
+    Returns the model field of ``model`` named ``field`` if objects can be
+    looked up by its values in bulk, ``None`` otherwise.
+    """
+    opts = model._meta
+    try:
+        model_field = opts.pk if field == 'pk' else opts.get_field(field)
+    except FieldDoesNotExist:
+        return None
+    if model_field.rel is not None:
+        return None
+    return model_field
+
+
+def _fetch_objects(queryset, field, model_field, lookup_values, chunk_size):
+    """
+    Returns the lists of objects of ``queryset`` whose ``field`` is in
+    ``lookup_values`` by value of ``model_field``, queried in chunks of
+    ``chunk_size`` values. Lists hold more than one object if ``field`` is
+    not unique.
+    """
+    lookup_values = list(set(lookup_values))
+    objs = {}
+    for i in range(0, len(lookup_values), chunk_size):
+        chunk = queryset.filter(**{
+            '%s__in' % field: lookup_values[i:i + chunk_size]
+        })
+        for obj in chunk:
+            objs.setdefault(getattr(obj, model_field.attname), []).append(obj)
+    return objs
+
+
 class ForeignKeyWidget(Widget):
     """
     Widget for a ``ForeignKey`` field which looks up a related model using
@@ -276,12 +512,46 @@ class ForeignKeyWidget(Widget):
             class Meta:
                 fields = ('author',)
 
+    Looked up objects are cached by their lookup value, see
+    :meth:`~import_export.widgets.ForeignKeyWidget.get_cache_key`. By
+    default objects are cached for a single import, in the ``cache``
+    dictionary the resource passes to
+    :meth:`~import_export.widgets.ForeignKeyWidget.clean` and
+    :meth:`~import_export.widgets.ForeignKeyWidget.prefetch`, as widgets are
+    shared by all imports of a resource. With ``cache_size``, objects are
+    also kept across imports in the widget's own cache, holding at most
+    ``cache_size`` objects, least recently used objects being evicted first.
+    Call :meth:`~import_export.widgets.ForeignKeyWidget.clear_cache` when
+    objects it holds are deleted or their lookup field changes.
+
+    Resources look up the objects of a whole column at once before importing
+    rows, see :meth:`~import_export.widgets.ForeignKeyWidget.prefetch`. With
+    ``create_missing``, objects missing for values of the column are created
+    at the same time with a single ``bulk_create``, which requires the column
+    to be prefetched, see
+    :meth:`~import_export.widgets.ForeignKeyWidget.can_prefetch`.
+
     :param model: The Model the ForeignKey refers to (required).
     :param field: A field on the related model used for looking up a particular object.
+    :param use_cache: Whether looked up objects are cached. Default is ``True``.
+    :param cache_size: Maximum number of objects cached across imports.
+        Default is ``None``, caching objects for a single import only.
+    :param create_missing: Whether missing objects are created when a column
+        is prefetched. Default is ``False``.
     """
-    def __init__(self, model, field='pk', *args, **kwargs):
+    #: Maximum number of values looked up by a single query of
+    #: :meth:`~import_export.widgets.ForeignKeyWidget.prefetch`, below
+    #: SQLite's default limit of 999 query parameters.
+    prefetch_chunk_size = 900
+
+    def __init__(self, model, field='pk', use_cache=True, cache_size=None,
+                 create_missing=False, *args, **kwargs):
         self.model = model
         self.field = field
+        self.use_cache = use_cache
+        self.cache_size = cache_size
+        self.create_missing = create_missing
+        self.cache = OrderedDict()
         super(ForeignKeyWidget, self).__init__(*args, **kwargs)
 
     def get_queryset(self, value, row, *args, **kwargs):
@@ -307,12 +577,146 @@ class ForeignKeyWidget(Widget):
         """
         return self.model.objects.all()
 
+    def get_cache_key(self, value, row):
+        """
+        Returns the key the object looked up for ``value`` is cached by, or
+        ``None`` if it must not be cached.
+
+        Objects are cached by ``value``, unless
+        :meth:`~import_export.widgets.ForeignKeyWidget.get_queryset` is
+        overridden, as the object may then depend on the row. Override this
+        method to cache objects of such widgets, e.g. by a tuple of ``value``
+        and the values of the row the queryset depends on.
+
+        :param value: The field's cleaned value in the datasource.
+        :param row: The datasource's current row.
+        """
+        if self._is_queryset_overridden():
+            return None
+        return value
+
+    def prefetch(self, values, create=True, cache=None):
+        """
+        Looks up the objects of ``values``, the values of a column of the
+        datasource, with chunked ``__in`` queries and caches them in
+        ``cache``, the cache of the running import, and in the widget's own
+        cache if ``cache_size`` is set, so that
+        :meth:`~import_export.widgets.ForeignKeyWidget.clean` doesn't query
+        them one by one.
+
+        Values are only prefetched if objects are cached, ``get_queryset``
+        is not overridden and ``field`` is a non-relational field of
+        ``model``. Values without object are not cached, cleaning them
+        still raises ``DoesNotExist``, unless ``create_missing`` and
+        ``create`` are set: their objects are then built by
+        :meth:`~import_export.widgets.ForeignKeyWidget.get_missing_objects`,
+        created with one ``bulk_create`` and looked up again. Created
+        objects are only cached in ``cache``, as their creation may be
+        rolled back with the import. With ``create_missing`` but without
+        ``create``, e.g. for dry runs which can't be rolled back, the unsaved
+        objects which would be created are cached in ``cache`` instead.
+        """
+        store = self.cache if self.cache_size is not None else cache
+        if store is None or not self.can_prefetch():
+            return
+        model_field = _get_lookup_field(self.model, self.field)
+
+        lookups = {}
+        for value in values:
+            val = super(ForeignKeyWidget, self).clean(value)
+            if not val or val in store or (cache is not None and val in cache):
+                continue
+            try:
+                lookups[val] = model_field.to_python(val)
+            except ValidationError:
+                continue
+        objs = _fetch_objects(self.get_queryset(None, None), self.field,
+                              model_field, lookups.values(),
+                              self.prefetch_chunk_size)
+        missing = set(lookup_value for lookup_value in lookups.values()
+                      if lookup_value not in objs)
+        created = {}
+        if self.create_missing and create and missing:
+            with transaction.atomic():
+                self.model.objects.bulk_create(
+                    self.get_missing_objects(sorted(missing)),
+                    batch_size=self.prefetch_chunk_size)
+            created = _fetch_objects(self.get_queryset(None, None), self.field,
+                                     model_field, missing,
+                                     self.prefetch_chunk_size)
+        elif self.create_missing and missing:
+            missing = sorted(missing)
+            created = dict(
+                (lookup_value, [obj]) for lookup_value, obj in six.moves.zip(
+                    missing, self.get_missing_objects(missing)))
+        for val, lookup_value in six.iteritems(lookups):
+            # values matching several objects are left to clean(), which
+            # raises MultipleObjectsReturned
+            if len(objs.get(lookup_value, ())) == 1:
+                store[val] = objs[lookup_value][0]
+            elif len(created.get(lookup_value, ())) == 1 and cache is not None:
+                cache[val] = created[lookup_value][0]
+        if self.cache_size is not None:
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def can_prefetch(self):
+        """
+        Returns whether :meth:`~import_export.widgets.ForeignKeyWidget.prefetch`
+        can look up values in bulk: objects are cached, ``get_queryset`` is
+        not overridden and ``field`` is a non-relational field of ``model``.
+        """
+        return (self.use_cache and not self._is_queryset_overridden() and
+                _get_lookup_field(self.model, self.field) is not None)
+
+    def get_missing_objects(self, lookup_values):
+        """
+        Returns the unsaved objects to create for ``lookup_values``, values
+        of ``field`` without object, in the order of ``lookup_values``.
+        Override this method to set other fields of created objects.
+        """
+        name = _get_lookup_field(self.model, self.field).name
+        return [self.model(**{name: lookup_value})
+                for lookup_value in lookup_values]
+
+    def clear_cache(self):
+        """
+        Clears the cache of objects kept across imports.
+        """
+        self.cache.clear()
+
+    def _is_queryset_overridden(self):
+        return type(self).get_queryset != ForeignKeyWidget.get_queryset
+
     def clean(self, value, row=None, *args, **kwargs):
+        """
+        Returns the object ``value`` refers to. ``cache`` may be passed as a
+        keyword argument, the dictionary caching objects for the running
+        import.
+        """
+        cache = kwargs.pop('cache', None)
         val = super(ForeignKeyWidget, self).clean(value)
-        if val:
-            return self.get_queryset(value, row, *args, **kwargs).get(**{self.field: val})
-        else:
+        if not val:
             return None
+        key = self.get_cache_key(val, row) if self.use_cache else None
+        if key is None:
+            return self.get_queryset(value, row, *args, **kwargs).get(**{self.field: val})
+        if cache is not None and key in cache:
+            return cache[key]
+        if self.cache_size is None:
+            obj = self.get_queryset(value, row, *args, **kwargs).get(**{self.field: val})
+            if cache is not None:
+                cache[key] = obj
+            return obj
+        try:
+            # reinserted below as the most recently used object
+            obj = self.cache.pop(key)
+        except KeyError:
+            obj = self.get_queryset(value, row, *args, **kwargs).get(**{self.field: val})
+        self.cache[key] = obj
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return obj
 
     def render(self, value, obj=None):
         if value is None:
@@ -325,12 +729,23 @@ class ManyToManyWidget(Widget):
     Widget that converts between representations of a ManyToMany relationships
     as a list and an actual ManyToMany field.
 
+    Bulk imports resolve the objects of a whole batch at once, see
+    :meth:`~import_export.widgets.ManyToManyWidget.prefetch` and
+    :meth:`~import_export.widgets.ManyToManyWidget.resolve`. Resolved
+    objects are cached by lookup value in the cache of the running import
+    passed by the resource.
+
     :param model: The model the ManyToMany field refers to (required).
     :param separator: Defaults to ``','``.
     :param field: A field on the related model. Default is ``pk``.
+    :param use_cache: Whether resolved objects are cached. Default is ``True``.
     """
+    #: Maximum number of values looked up by a single query of
+    #: :meth:`~import_export.widgets.ManyToManyWidget.prefetch`.
+    prefetch_chunk_size = 900
 
-    def __init__(self, model, separator=None, field=None, *args, **kwargs):
+    def __init__(self, model, separator=None, field=None, use_cache=True,
+                 *args, **kwargs):
         if separator is None:
             separator = ','
         if field is None:
@@ -338,18 +753,89 @@ class ManyToManyWidget(Widget):
         self.model = model
         self.separator = separator
         self.field = field
+        self.use_cache = use_cache
         super(ManyToManyWidget, self).__init__(*args, **kwargs)
 
+    def get_lookup_values(self, value):
+        """
+        Returns the list of lookup values ``value`` consists of.
+        """
+        if not value:
+            return []
+        if isinstance(value, (float, int)):
+            return [int(value)]
+        return [val for val in value.split(self.separator) if val]
+
+    def prefetch(self, values, cache=None):
+        """
+        Looks up the objects of ``values``, the values of a column of the
+        datasource, with chunked ``__in`` queries and caches them in
+        ``cache``, the cache of the running import, for
+        :meth:`~import_export.widgets.ManyToManyWidget.resolve`. The list of
+        all matching objects is cached by value, as ``field`` may not be
+        unique.
+        """
+        if not self.use_cache or cache is None:
+            return
+        model_field = _get_lookup_field(self.model, self.field)
+        if model_field is None:
+            return
+        lookups = {}
+        for value in values:
+            for val in self.get_lookup_values(value):
+                if val in cache or val in lookups:
+                    continue
+                try:
+                    lookups[val] = model_field.to_python(val)
+                except ValidationError:
+                    continue
+        objs = _fetch_objects(self.model.objects.all(), self.field,
+                              model_field, lookups.values(),
+                              self.prefetch_chunk_size)
+        for val, lookup_value in six.iteritems(lookups):
+            if lookup_value in objs:
+                cache[val] = objs[lookup_value]
+
+    def resolve(self, value, cache=None):
+        """
+        Returns the list of objects ``value`` refers to, like
+        :meth:`~import_export.widgets.ManyToManyWidget.clean` but taking
+        cached objects from ``cache``, the cache of the running import, and
+        querying the others at once.
+        """
+        if not self.use_cache:
+            cache = None
+        objs, missing = [], []
+        for val in self.get_lookup_values(value):
+            if cache is not None and val in cache:
+                objs.extend(cache[val])
+            else:
+                missing.append(val)
+        if missing:
+            found = list(self.model.objects.filter(**{
+                '%s__in' % self.field: missing
+            }))
+            objs.extend(found)
+            model_field = _get_lookup_field(self.model, self.field)
+            if cache is not None and model_field is not None:
+                by_value = {}
+                for obj in found:
+                    by_value.setdefault(
+                        getattr(obj, model_field.attname), []).append(obj)
+                for val in missing:
+                    try:
+                        lookup_value = model_field.to_python(val)
+                    except ValidationError:
+                        continue
+                    if lookup_value in by_value:
+                        cache[val] = by_value[lookup_value]
+        return objs
+
     def clean(self, value, row=None, *args, **kwargs):
         if not value:
             return self.model.objects.none()
-        if isinstance(value, (float, int)):
-            ids = [int(value)]
-        else:
-            ids = value.split(self.separator)
-        ids = filter(None, ids)
         return self.model.objects.filter(**{
-            '%s__in' % self.field: ids
+            '%s__in' % self.field: self.get_lookup_values(value)
         })
 
     def render(self, value, obj=None):
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_addparentchild'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WithAutoNow',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('notes', models.TextField(blank=True)),
+                ('modified', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -81,3 +81,9 @@ class WithDynamicDefault(models.Model):
 
 class WithFloatField(models.Model):
     f = models.FloatField(blank=True, null=True)
+
+
+class WithAutoNow(models.Model):
+    name = models.CharField(max_length=100)
+    notes = models.TextField(blank=True)
+    modified = models.DateTimeField(auto_now=True)
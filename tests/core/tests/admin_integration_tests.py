@@ -10,8 +10,10 @@ from django.utils.translation import ugettext_lazy as _
 from django.contrib.admin.models import LogEntry
 from tablib import Dataset
 
+from import_export.lookup_caches import FileLookupCache
+
 from core.admin import BookAdmin, AuthorAdmin, BookResource
-from core.models import Category, Parent
+from core.models import Book, Category, Parent
 
 
 class ImportExportAdminIntegrationTest(TestCase):
@@ -66,6 +68,30 @@ class ImportExportAdminIntegrationTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, _('Import finished, with 1 new book'))
 
+    def test_import_lookup_cache(self):
+        filename = os.path.join(
+            os.path.dirname(__file__),
+            os.path.pardir,
+            'exports',
+            'books.csv')
+        BookAdmin.lookup_cache_class = FileLookupCache
+        try:
+            with open(filename, "rb") as f:
+                response = self.client.post('/admin/core/book/import/', {
+                    'input_format': '0',
+                    'import_file': f,
+                })
+            data = response.context['confirm_form'].initial
+            name = os.path.basename(data['import_file_name'])
+            lookup_cache = FileLookupCache(name)
+            self.assertTrue(os.path.isfile(lookup_cache.get_full_path()))
+            response = self.client.post('/admin/core/book/process_import/',
+                                        data, follow=True)
+        finally:
+            BookAdmin.lookup_cache_class = None
+        self.assertContains(response, _('Import finished, with 1 new book'))
+        self.assertFalse(os.path.isfile(lookup_cache.get_full_path()))
+
     @override_settings(TEMPLATE_STRING_IF_INVALID='INVALID_VARIABLE')
     def test_import_mac(self):
         # GET the import form
@@ -112,6 +138,22 @@ class ImportExportAdminIntegrationTest(TestCase):
         self.assertTrue(response.has_header("Content-Disposition"))
         self.assertEqual(response['Content-Type'], 'text/csv')
 
+    def test_export_streaming(self):
+        Book.objects.create(name='Some book')
+        BookAdmin.export_streaming = True
+        try:
+            response = self.client.post('/admin/core/book/export/',
+                                        {'file_format': '0'})
+        finally:
+            BookAdmin.export_streaming = False
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertTrue(response.has_header("Content-Disposition"))
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertIn('Some book', content)
+        self.assertTrue(content.startswith('id,name,'))
+
     def test_import_export_buttons_visible_without_add_permission(self):
         # issue 38 - Export button not visible when no add permission
         original = BookAdmin.has_add_permission
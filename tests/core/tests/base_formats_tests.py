@@ -2,7 +2,10 @@
 from __future__ import unicode_literals
 
 import os
+from datetime import date
+from decimal import Decimal
 
+import tablib
 from django.test import TestCase
 
 try:
@@ -72,3 +75,23 @@ class CSVTest(TestCase):
         in_stream = open(filename, self.format.get_read_mode())
         data = force_text(in_stream.read())
         base_formats.CSV().create_dataset(data)
+
+
+class StreamExportTest(TestCase):
+
+    headers = ['id', 'name', 'published']
+    rows = [[1, 'Some, "book"', date(2012, 8, 13)],
+            [2, 'Bücher', None],
+            [3, '', Decimal('1.50')]]
+
+    def test_stream_export(self):
+        dataset = tablib.Dataset(*self.rows, headers=self.headers)
+        for format_class in (base_formats.CSV, base_formats.TSV,
+                             base_formats.JSON):
+            file_format = format_class()
+            self.assertTrue(file_format.can_stream())
+            stream = file_format.stream_export(self.headers, iter(self.rows))
+            self.assertEqual(''.join(stream), file_format.export_data(dataset))
+
+    def test_cannot_stream(self):
+        self.assertFalse(base_formats.XLS().can_stream())
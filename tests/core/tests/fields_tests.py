@@ -47,6 +47,28 @@ class FieldTest(TestCase):
         field.save(test, row)
         self.assertEqual(test.name.follow.me, 'foo')
 
+    def test_get_setter(self):
+        self.field.get_setter()(self.obj, 'bar')
+        self.assertEqual(self.obj.name, 'bar')
+
+        class Test:
+            class name:
+                class follow:
+                    me = 'bar'
+        test = Test()
+        field = fields.Field(column_name='name', attribute='name__follow__me')
+        field.get_setter()(test, 'foo')
+        self.assertEqual(test.name.follow.me, 'foo')
+
+    def test_get_exporter(self):
+        self.obj.other_obj = Obj(name=lambda: 'bar')
+        self.obj.none_obj = None
+        for attribute in ['name', 'date', 'other_obj__name', 'none_obj__name',
+                          'missing', 'other_obj__missing']:
+            field = fields.Field(attribute=attribute)
+            self.assertEqual(field.get_exporter()(self.obj),
+                             field.export(self.obj))
+
     def test_following_attribute(self):
         field = fields.Field(attribute='other_obj__name')
         obj2 = Obj(name="bar")
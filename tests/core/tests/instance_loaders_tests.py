@@ -2,12 +2,15 @@ from __future__ import unicode_literals
 
 import tablib
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from import_export import instance_loaders
+from import_export import fields
 from import_export import resources
 
-from core.models import Book
+from core.models import Author, Book, Child, Entry, Parent, WithAutoNow
 
 
 class CachedInstanceLoaderTest(TestCase):
@@ -31,3 +34,372 @@ class CachedInstanceLoaderTest(TestCase):
     def test_get_instance(self):
         obj = self.instance_loader.get_instance(self.dataset.dict[0])
         self.assertEqual(obj, self.book)
+
+
+class CompositeKeyCachedInstanceLoaderTest(TestCase):
+
+    def setUp(self):
+        class BookResource(resources.ModelResource):
+            class Meta:
+                model = Book
+                import_id_fields = ['name', 'author_email']
+
+        self.resource = BookResource()
+        self.book = Book.objects.create(name="Some book",
+                                        author_email="test@example.com")
+        self.book2 = Book.objects.create(name="Some book",
+                                         author_email="other@example.com")
+        self.dataset = tablib.Dataset(headers=['name', 'author_email'])
+        self.dataset.append(['Some book', 'test@example.com'])
+        self.dataset.append(['Some book', 'new@example.com'])
+
+    def test_all_instances(self):
+        instance_loader = instance_loaders.CachedInstanceLoader(
+            self.resource, self.dataset)
+        self.assertEqual(instance_loader.all_instances,
+                         {('Some book', 'test@example.com'): self.book})
+
+    def test_get_instance(self):
+        instance_loader = instance_loaders.CachedInstanceLoader(
+            self.resource, self.dataset)
+        with self.assertNumQueries(0):
+            obj = instance_loader.get_instance(self.dataset.dict[0])
+            missing = instance_loader.get_instance(self.dataset.dict[1])
+        self.assertEqual(obj, self.book)
+        self.assertIsNone(missing)
+
+    def test_get_instance_without_row_values(self):
+        class InstanceLoader(instance_loaders.CachedInstanceLoader):
+            def _supports_row_values(self, connection):
+                return False
+
+        instance_loader = InstanceLoader(self.resource, self.dataset)
+        self.assertEqual(instance_loader.get_instance(self.dataset.dict[0]),
+                         self.book)
+        self.assertIsNone(instance_loader.get_instance(self.dataset.dict[1]))
+
+    def test_get_instance_related_key(self):
+        class ChildResource(resources.ModelResource):
+            class Meta:
+                model = Child
+                import_id_fields = ['parent', 'name']
+
+        parent = Parent.objects.create(name='Parent')
+        child = Child.objects.create(parent=parent, name='Child')
+        Child.objects.create(parent=parent, name='Other child')
+        dataset = tablib.Dataset(['%s' % parent.pk, 'Child'],
+                                 headers=['parent', 'name'])
+        instance_loader = instance_loaders.CachedInstanceLoader(
+            ChildResource(), dataset)
+        self.assertEqual(instance_loader.get_instance(dataset.dict[0]), child)
+
+    def test_import_data(self):
+        self.resource._meta.instance_loader_class = \
+            instance_loaders.CachedInstanceLoader
+        result = self.resource.import_data(self.dataset, raise_errors=True)
+        self.assertEqual([row.import_type for row in result.rows],
+                         ['update', 'new'])
+        self.assertEqual(Book.objects.count(), 3)
+
+
+class ChunkedCachedInstanceLoaderTest(TestCase):
+
+    def setUp(self):
+        self.resource = resources.modelresource_factory(Book)()
+        self.books = [Book.objects.create(name="Book %s" % i)
+                      for i in range(5)]
+        self.dataset = tablib.Dataset(headers=['id', 'name'])
+        for book in self.books:
+            self.dataset.append([str(book.pk), book.name])
+
+    def get_instance_loader(self, **attrs):
+        InstanceLoader = type(str('InstanceLoader'),
+                              (instance_loaders.CachedInstanceLoader, ),
+                              attrs)
+        return InstanceLoader(self.resource, self.dataset)
+
+    def test_chunks(self):
+        with self.assertNumQueries(3):
+            instance_loader = self.get_instance_loader(chunk_size=2)
+        self.assertEqual(len(instance_loader.all_instances), 5)
+        with self.assertNumQueries(0):
+            for row, book in zip(self.dataset.dict, self.books):
+                self.assertEqual(instance_loader.get_instance(row), book)
+
+    def test_lazy(self):
+        with self.assertNumQueries(0):
+            instance_loader = self.get_instance_loader(chunk_size=2,
+                                                       lazy=True)
+        rows = self.dataset.dict
+        with self.assertNumQueries(1):
+            self.assertEqual(instance_loader.get_instance(rows[0]),
+                             self.books[0])
+            self.assertEqual(instance_loader.get_instance(rows[1]),
+                             self.books[1])
+        with self.assertNumQueries(1):
+            self.assertEqual(instance_loader.get_instance(rows[2]),
+                             self.books[2])
+        self.assertEqual(len(instance_loader.all_instances), 4)
+
+    def test_max_instances(self):
+        instance_loader = self.get_instance_loader(chunk_size=2, lazy=True,
+                                                   max_instances=3)
+        rows = self.dataset.dict
+        for row, book in zip(rows, self.books):
+            self.assertEqual(instance_loader.get_instance(row), book)
+        self.assertEqual(list(instance_loader.loaded_chunks), [1, 2])
+        self.assertEqual(sorted(instance_loader.all_instances),
+                         [book.pk for book in self.books[2:]])
+        with self.assertNumQueries(1):
+            self.assertEqual(instance_loader.get_instance(rows[0]),
+                             self.books[0])
+
+
+class LoadOnlyFieldsTest(TestCase):
+
+    def setUp(self):
+        class BookResource(resources.ModelResource):
+            class Meta:
+                model = Book
+                fields = ('id', 'name')
+                load_only_fields = True
+
+        class EntryResource(resources.ModelResource):
+            username = fields.Field(attribute='user__username')
+            full_name = fields.Field(attribute='user__get_full_name')
+
+            class Meta:
+                model = Entry
+                fields = ('id', )
+                load_only_fields = True
+
+        self.book_resource = BookResource()
+        self.entry_resource = EntryResource()
+        self.book = Book.objects.create(name="Some book",
+                                        author_email="test@example.com")
+
+    def test_get_load_fields(self):
+        instance_loader = instance_loaders.ModelInstanceLoader(
+            self.book_resource)
+        self.assertEqual(instance_loader.get_load_fields(),
+                         (['id', 'name'], []))
+
+    def test_get_load_fields_related(self):
+        instance_loader = instance_loaders.ModelInstanceLoader(
+            self.entry_resource)
+        self.assertEqual(instance_loader.get_load_fields(),
+                         (['id', 'user', 'user__username'], ['user']))
+
+    def test_get_instance(self):
+        instance_loader = instance_loaders.ModelInstanceLoader(
+            self.book_resource)
+        with CaptureQueriesContext(connection) as queries:
+            obj = instance_loader.get_instance({'id': self.book.pk})
+            self.assertEqual(obj.name, "Some book")
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('author_email', queries[0]['sql'])
+        self.assertEqual(obj.author_email, "test@example.com")
+
+    def test_auto_now_fields_loaded(self):
+        class WithAutoNowResource(resources.ModelResource):
+            class Meta:
+                model = WithAutoNow
+                fields = ('id', 'name')
+                load_only_fields = True
+
+        resource = WithAutoNowResource()
+        instance_loader = instance_loaders.ModelInstanceLoader(resource)
+        self.assertEqual(instance_loader.get_load_fields(),
+                         (['id', 'modified', 'name'], []))
+
+        obj = WithAutoNow.objects.create(name='Foo')
+        modified = obj.modified
+        dataset = tablib.Dataset([obj.pk, 'Bar'], headers=['id', 'name'])
+        resource.import_data(dataset, raise_errors=True)
+        obj.refresh_from_db()
+        self.assertEqual(obj.name, 'Bar')
+        self.assertGreater(obj.modified, modified)
+
+    def test_load_only_fields_disabled(self):
+        self.book_resource._meta.load_only_fields = False
+        instance_loader = instance_loaders.ModelInstanceLoader(
+            self.book_resource)
+        with CaptureQueriesContext(connection) as queries:
+            instance_loader.get_instance({'id': self.book.pk})
+        self.assertIn('author_email', queries[0]['sql'])
+
+
+class HashIndexInstanceLoaderTest(TestCase):
+
+    def setUp(self):
+        instance_loaders.HashIndexInstanceLoader.invalidate()
+        self.resource = resources.modelresource_factory(Book)()
+        self.books = [Book.objects.create(name="Book %s" % i)
+                      for i in range(3)]
+        self.dataset = tablib.Dataset(headers=['id', 'name'])
+        self.dataset.append([str(self.books[0].pk), 'Book 0'])
+        self.dataset.append(['', 'New book'])
+
+    def tearDown(self):
+        instance_loaders.HashIndexInstanceLoader.invalidate()
+
+    def count_book_queries(self, queries):
+        return len([q for q in queries
+                    if q['sql'].startswith('SELECT "core_book"')])
+
+    def test_get_instance(self):
+        with CaptureQueriesContext(connection) as queries:
+            instance_loader = instance_loaders.HashIndexInstanceLoader(
+                self.resource, self.dataset)
+        # a scan of the keys and a query for the matched instances
+        self.assertEqual(self.count_book_queries(queries), 2)
+        self.assertEqual(len(instance_loader.index), 3)
+        with self.assertNumQueries(0):
+            obj = instance_loader.get_instance(self.dataset.dict[0])
+            missing = instance_loader.get_instance(self.dataset.dict[1])
+        self.assertEqual(obj, self.books[0])
+        self.assertIsNone(missing)
+
+    def test_index_reused(self):
+        instance_loaders.HashIndexInstanceLoader(self.resource, self.dataset)
+        with CaptureQueriesContext(connection) as queries:
+            instance_loader = instance_loaders.HashIndexInstanceLoader(
+                self.resource, self.dataset)
+        self.assertEqual(self.count_book_queries(queries), 1)
+        self.assertEqual(instance_loader.get_instance(self.dataset.dict[0]),
+                         self.books[0])
+
+    def test_index_rebuilt_after_change(self):
+        instance_loaders.HashIndexInstanceLoader(self.resource, self.dataset)
+        book = Book.objects.create(name="Book 3")
+        self.dataset.append([str(book.pk), 'Book 3'])
+        instance_loader = instance_loaders.HashIndexInstanceLoader(
+            self.resource, self.dataset)
+        self.assertEqual(instance_loader.get_instance(self.dataset.dict[2]),
+                         book)
+
+    def test_invalidate(self):
+        class BookResource(resources.ModelResource):
+            class Meta:
+                model = Book
+                import_id_fields = ['name']
+
+        resource = BookResource()
+        instance_loaders.HashIndexInstanceLoader(resource, self.dataset)
+        Book.objects.filter(pk=self.books[1].pk).update(name='New book')
+        instance_loaders.HashIndexInstanceLoader.invalidate(Book)
+        instance_loader = instance_loaders.HashIndexInstanceLoader(
+            resource, self.dataset)
+        self.assertEqual(instance_loader.get_instance(self.dataset.dict[1]),
+                         self.books[1])
+
+    def test_stale_index_not_used(self):
+        class BookResource(resources.ModelResource):
+            class Meta:
+                model = Book
+                import_id_fields = ['name']
+
+        resource = BookResource()
+        instance_loaders.HashIndexInstanceLoader(resource, self.dataset)
+        # the lookup cache version doesn't change
+        Book.objects.filter(pk=self.books[0].pk).update(name='Renamed')
+        instance_loader = instance_loaders.HashIndexInstanceLoader(
+            resource, self.dataset)
+        self.assertIsNone(instance_loader.get_instance(self.dataset.dict[0]))
+        self.assertEqual(instance_loaders.HashIndexInstanceLoader.indexes, {})
+
+    def test_index_per_queryset(self):
+        class InstanceLoader(instance_loaders.HashIndexInstanceLoader):
+            def get_queryset(self):
+                return Book.objects.filter(author=self.resource.author)
+
+        class BookResource(resources.ModelResource):
+            class Meta:
+                model = Book
+                import_id_fields = ['name']
+
+            def __init__(self, author):
+                super(BookResource, self).__init__()
+                self.author = author
+
+            def get_lookup_cache_version(self):
+                return 'constant'
+
+        authors = [Author.objects.create(name='Author %s' % i)
+                   for i in range(2)]
+        books = [Book.objects.create(name='Shared', author=author)
+                 for author in authors]
+        dataset = tablib.Dataset(['', 'Shared'], headers=['id', 'name'])
+        for author, book in zip(authors, books):
+            instance_loader = InstanceLoader(BookResource(author), dataset)
+            self.assertEqual(instance_loader.get_instance(dataset.dict[0]),
+                             book)
+        self.assertEqual(len(instance_loaders.HashIndexInstanceLoader.indexes),
+                         2)
+
+    def test_chunk_size_limited(self):
+        instance_loader = instance_loaders.HashIndexInstanceLoader(
+            self.resource, self.dataset)
+        if connection.vendor == 'sqlite':
+            self.assertEqual(instance_loader.limit_chunk_size(1000), 999)
+        else:
+            self.assertEqual(instance_loader.limit_chunk_size(1000), 1000)
+
+    def test_import_data(self):
+        self.resource._meta.instance_loader_class = \
+            instance_loaders.HashIndexInstanceLoader
+        try:
+            result = self.resource.import_data(self.dataset,
+                                               raise_errors=True)
+        finally:
+            self.resource._meta.instance_loader_class = \
+                instance_loaders.ModelInstanceLoader
+        self.assertEqual([row.import_type for row in result.rows],
+                         ['update', 'new'])
+        self.assertEqual(Book.objects.count(), 4)
+
+
+class ExistenceOnlyInstanceLoaderTest(TestCase):
+
+    class InstanceLoader(instance_loaders.CachedInstanceLoader):
+        existence_only = True
+
+    def setUp(self):
+        self.resource = resources.modelresource_factory(Book)()
+        self.book = Book.objects.create(name="Some book")
+        self.dataset = tablib.Dataset(headers=['id', 'name'])
+        self.dataset.append([str(self.book.pk), 'Changed book'])
+        self.dataset.append(['', 'New book'])
+
+    def test_get_instance(self):
+        with CaptureQueriesContext(connection) as queries:
+            instance_loader = self.InstanceLoader(self.resource, self.dataset)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"core_book"."name"', queries[0]['sql'])
+        self.assertIs(instance_loader.get_instance(self.dataset.dict[0]),
+                      instance_loaders.EXISTING)
+        self.assertIsNone(instance_loader.get_instance(self.dataset.dict[1]))
+
+    def test_get_instance_related_key(self):
+        class ChildResource(resources.ModelResource):
+            class Meta:
+                model = Child
+                import_id_fields = ['parent', 'name']
+
+        parent = Parent.objects.create(name='Parent')
+        Child.objects.create(parent=parent, name='Child')
+        dataset = tablib.Dataset(headers=['parent', 'name'])
+        dataset.append(['%s' % parent.pk, 'Child'])
+        dataset.append(['%s' % parent.pk, 'Other child'])
+        instance_loader = self.InstanceLoader(ChildResource(), dataset)
+        self.assertIs(instance_loader.get_instance(dataset.dict[0]),
+                      instance_loaders.EXISTING)
+        self.assertIsNone(instance_loader.get_instance(dataset.dict[1]))
+
+    def test_import_data(self):
+        self.resource._meta.instance_loader_class = self.InstanceLoader
+        result = self.resource.import_data(self.dataset, raise_errors=True)
+        self.assertEqual([row.import_type for row in result.rows],
+                         ['skip', 'new'])
+        self.assertEqual(Book.objects.get(pk=self.book.pk).name, "Some book")
+        self.assertEqual(Book.objects.count(), 2)
@@ -0,0 +1,134 @@
+from __future__ import unicode_literals
+
+import os
+
+import tablib
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from import_export import instance_loaders, resources
+from import_export.lookup_caches import CacheLookupCache, FileLookupCache
+
+from core.models import Book
+
+
+class LookupCachesTest(TestCase):
+
+    def check_lookup_cache(self, lookup_cache_class):
+        lookup_cache = lookup_cache_class('import.csv')
+        self.assertFalse(lookup_cache.load('1:1'))
+        lookup_cache.lookups['["1"]'] = '1'
+        lookup_cache.save()
+
+        lookup_cache = lookup_cache_class('import.csv')
+        self.assertTrue(lookup_cache.load('1:1'))
+        self.assertEqual(lookup_cache.loaded, {'["1"]': '1'})
+        self.assertEqual(lookup_cache.lookups, {})
+
+        lookup_cache = lookup_cache_class('import.csv')
+        self.assertFalse(lookup_cache.load('2:2'))
+        self.assertEqual(lookup_cache.loaded, {})
+
+        lookup_cache.remove()
+        self.assertFalse(lookup_cache_class('import.csv').load('1:1'))
+
+    def test_cache_lookup_cache(self):
+        self.check_lookup_cache(CacheLookupCache)
+
+    def test_file_lookup_cache(self):
+        self.check_lookup_cache(FileLookupCache)
+
+    def test_file_lookup_cache_path(self):
+        lookup_cache = FileLookupCache('../../etc/passwd')
+        self.assertEqual(os.path.dirname(lookup_cache.get_full_path()),
+                         os.path.dirname(FileLookupCache('a').get_full_path()))
+
+
+class LookupCacheImportTest(TestCase):
+
+    def setUp(self):
+        self.resource = resources.modelresource_factory(Book)()
+        self.books = [Book.objects.create(name='Book %s' % i)
+                      for i in range(3)]
+        self.dataset = tablib.Dataset(headers=['id', 'name'])
+        for book in self.books:
+            self.dataset.append([book.pk, 'Changed %s' % book.pk])
+        self.dataset.append(['', 'New book'])
+        self.lookup_cache = FileLookupCache('import.csv')
+        self.addCleanup(self.lookup_cache.remove)
+
+    def count_lookups(self, queries):
+        return len([q for q in queries
+                    if q['sql'].startswith('SELECT "core_book"')])
+
+    def test_dry_run_and_import(self):
+        with CaptureQueriesContext(connection) as queries:
+            result = self.resource.import_data(
+                self.dataset, dry_run=True, lookup_cache=self.lookup_cache)
+        self.assertFalse(result.has_errors())
+        self.assertEqual(self.count_lookups(queries), 4)
+
+        lookup_cache = FileLookupCache('import.csv')
+        with CaptureQueriesContext(connection) as queries:
+            result = self.resource.import_data(
+                self.dataset, dry_run=False, lookup_cache=lookup_cache)
+        self.assertFalse(result.has_errors())
+        self.assertEqual([row.import_type for row in result.rows],
+                         ['update', 'update', 'update', 'new'])
+        # instances are fetched by a single query
+        self.assertEqual(self.count_lookups(queries), 1)
+        self.assertEqual(Book.objects.get(pk=self.books[0].pk).name,
+                         'Changed %s' % self.books[0].pk)
+
+    def test_changed_version(self):
+        self.resource.import_data(self.dataset, dry_run=True,
+                                  lookup_cache=self.lookup_cache)
+        self.books[0].delete()
+
+        lookup_cache = FileLookupCache('import.csv')
+        result = self.resource.import_data(self.dataset, dry_run=False,
+                                           lookup_cache=lookup_cache)
+        self.assertEqual(lookup_cache.loaded, {})
+        self.assertEqual([row.import_type for row in result.rows],
+                         ['new', 'update', 'update', 'new'])
+
+    def test_changed_key(self):
+        self.resource.import_data(self.dataset, dry_run=True,
+                                  lookup_cache=self.lookup_cache)
+        # a stored primary key matching another instance isn't reused
+        loaded = FileLookupCache('import.csv')
+        loaded.load(self.resource.get_lookup_cache_version())
+        lookups = loaded.read()
+        first, second = ['["%s"]' % book.pk for book in self.books[:2]]
+        lookups['lookups'][first] = lookups['lookups'][second]
+        loaded.write(lookups)
+
+        lookup_cache = FileLookupCache('import.csv')
+        result = self.resource.import_data(self.dataset, dry_run=False,
+                                           lookup_cache=lookup_cache)
+        self.assertFalse(result.has_errors())
+        self.assertEqual(Book.objects.get(pk=self.books[0].pk).name,
+                         'Changed %s' % self.books[0].pk)
+        self.assertEqual(Book.objects.get(pk=self.books[1].pk).name,
+                         'Changed %s' % self.books[1].pk)
+
+    def test_existence_only_instance_loader(self):
+        class InstanceLoader(instance_loaders.CachedInstanceLoader):
+            existence_only = True
+
+        class BookResource(resources.ModelResource):
+            class Meta:
+                model = Book
+                instance_loader_class = InstanceLoader
+
+        resource = BookResource()
+        for dry_run in (True, False):
+            result = resource.import_data(
+                self.dataset, dry_run=dry_run,
+                lookup_cache=FileLookupCache('import.csv'))
+            self.assertFalse(result.has_errors())
+            self.assertEqual([row.import_type for row in result.rows],
+                             ['skip', 'skip', 'skip', 'new'])
+        self.assertEqual(Book.objects.count(), 4)
@@ -3,19 +3,23 @@ from __future__ import unicode_literals
 import tablib
 from copy import deepcopy
 from datetime import date
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
 from unittest import skip, skipUnless
 
 from django import VERSION
 from django.conf import settings
-from django.contrib.auth.models import User
-from django.db import IntegrityError
+from django.contrib.auth.models import Group, User
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, connection
 from django.db.models import Count
 from django.db.models.fields import FieldDoesNotExist
-from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.test import (
+    TestCase, TransactionTestCase, skipIfDBFeature, skipUnlessDBFeature,
+)
+from django.test.utils import CaptureQueriesContext
 from django.utils.html import strip_tags
 
-from import_export import fields, resources, results, widgets
+from import_export import fields, pgcopy, resources, results, widgets
 from import_export.instance_loaders import ModelInstanceLoader
 from import_export.resources import Diff
 
@@ -220,6 +224,62 @@ class ModelResourceTest(TestCase):
         dataset = self.resource.export(list(Book.objects.all()))
         self.assertEqual(len(dataset), 1)
 
+    def test_iter_export(self):
+        exported = []
+        self.resource.after_export = (
+            lambda queryset, data, *args, **kwargs: exported.append(data))
+        rows = self.resource.iter_export(Book.objects.all())
+        self.assertFalse(exported)
+        self.assertEqual([tuple(row) for row in rows],
+                         list(self.resource.export(Book.objects.all())))
+        self.assertEqual(exported[0], None)
+
+    def test_get_export_relations(self):
+        class B(resources.ModelResource):
+            full_title = fields.Field(attribute='author__name')
+
+            class Meta:
+                model = Book
+                fields = ('name', 'author', 'author__name', 'categories',
+                          'full_title')
+
+            def dehydrate_full_title(self, obj):
+                return obj.name
+
+        self.assertEqual(B().get_export_relations(),
+                         (['author'], ['categories']))
+        self.assertEqual(resources.Resource().get_export_relations(), ([], []))
+
+    def test_export_prefetches_relations(self):
+        class B(resources.ModelResource):
+            class Meta:
+                model = Book
+                fields = ('name', 'author__name', 'categories')
+                export_chunk_size = 2
+
+        author = Author.objects.create(name='Author')
+        category = Category.objects.create(name='Cat')
+        for i in range(3):
+            book = Book.objects.create(name='Book %s' % i, author=author)
+            book.categories.add(category)
+        queryset = Book.objects.filter(author=author).order_by('pk')
+        with self.assertNumQueries(3):
+            dataset = B().export(queryset)
+        self.assertEqual(dataset.dict[0]['author__name'], 'Author')
+        self.assertEqual(dataset.dict[2]['categories'], str(category.pk))
+
+        B._meta.prefetch_export_relations = False
+        try:
+            with self.assertNumQueries(7):
+                self.assertEqual(B().export(queryset).dict, dataset.dict)
+        finally:
+            B._meta.prefetch_export_relations = True
+
+        # foreign keys of deferred querysets are prefetched
+        with self.assertNumQueries(5):
+            deferred = B().export(queryset.only('name', 'author'))
+        self.assertEqual(deferred.dict, dataset.dict)
+
     def test_get_diff(self):
         diff = Diff(self.resource, self.book, False)
         book2 = Book(name="Some other book")
@@ -231,6 +291,369 @@ class ModelResourceTest(TestCase):
                          u'other </ins><span>book</span>')
         self.assertFalse(html[headers.index('author_email')])
 
+    def test_get_diff_dehydrated_field(self):
+        class B(BookResource):
+            full_title = fields.Field(column_name='Full title')
+
+            def dehydrate_full_title(self, obj):
+                return '%s by %s' % (obj.name, obj.author_email)
+
+        resource = B()
+        diff = Diff(resource, self.book, False)
+        self.book.name = 'Other book'
+        diff.compare_with(resource, self.book)
+        html = diff.as_html()
+        headers = resource.get_export_headers()
+        self.assertEqual(strip_tags(html[headers.index('Full title')]),
+                         'SomeOther book by ')
+
+    def test_get_diff_widget_rendering_obj(self):
+        class PriceWidget(widgets.DecimalWidget):
+            def render(self, value, obj=None):
+                return '%s %s' % (value, obj.name)
+
+        class B(BookResource):
+            price = fields.Field(attribute='price', column_name='price',
+                                 widget=PriceWidget())
+
+        resource = B()
+        self.book.price = Decimal('1.50')
+        diff = Diff(resource, self.book, False)
+        self.book.name = 'Other book'
+        diff.compare_with(resource, self.book)
+        html = diff.as_html()
+        headers = resource.get_export_headers()
+        self.assertEqual(strip_tags(html[headers.index('price')]),
+                         '1.50 SomeOther book')
+
+    def test_import_data_renders_diff_on_access(self):
+        rendered = []
+        as_html = Diff.__dict__['as_html']
+
+        def counting_as_html(diff):
+            rendered.append(diff)
+            return as_html(diff)
+
+        Diff.as_html = counting_as_html
+        try:
+            result = self.resource.import_data(self.dataset, raise_errors=True)
+            self.assertEqual(rendered, [])
+            html = result.rows[0].diff
+            self.assertEqual(result.rows[0].diff, html)
+        finally:
+            Diff.as_html = as_html
+        self.assertEqual(len(rendered), 1)
+        self.assertEqual(len(html), len(self.resource.get_export_headers()))
+
+    def test_import_data_foreign_key_cache(self):
+        class B(BookResource):
+            author = fields.Field(attribute='author', column_name='author',
+                                  widget=widgets.ForeignKeyWidget(Author, 'name'))
+
+            class Meta:
+                model = Book
+                fields = ('id', 'name', 'author')
+
+        author = Author.objects.create(name='Author')
+        resource = B()
+        dataset = tablib.Dataset(headers=['id', 'name', 'author'])
+        for i in range(3):
+            dataset.append(['', 'Book %s' % i, 'Author'])
+        with CaptureQueriesContext(connection) as queries:
+            resource.import_data(dataset, raise_errors=True)
+        self.assertEqual(len([q for q in queries
+                              if 'FROM "core_author"' in q['sql']]), 1)
+        self.assertEqual(Book.objects.filter(author=author).count(), 3)
+        # the cache is kept by the resource for a single import
+        self.assertFalse(resource.fields['author'].widget.cache)
+        self.assertIsNone(resource.widget_caches)
+
+        Author.objects.create(name='Other author')
+        dataset.append(['', 'Book 3', 'Other author'])
+        resource._meta.prefetch_foreign_keys = False
+        with CaptureQueriesContext(connection) as queries:
+            resource.import_data(dataset, raise_errors=True)
+        self.assertEqual(len([q for q in queries
+                              if 'FROM "core_author"' in q['sql']]), 2)
+
+    def test_import_data_foreign_key_overridden_clean(self):
+        class AuthorWidget(widgets.ForeignKeyWidget):
+            def clean(self, value, row=None):
+                return super(AuthorWidget, self).clean(value.strip(), row)
+
+        class B(BookResource):
+            author = fields.Field(attribute='author', column_name='author',
+                                  widget=AuthorWidget(Author, 'name'))
+
+            class Meta:
+                model = Book
+                fields = ('id', 'name', 'author')
+
+        author = Author.objects.create(name='Author')
+        dataset = tablib.Dataset(['', 'Author book', ' Author '],
+                                 headers=['id', 'name', 'author'])
+        result = B().import_data(dataset, raise_errors=True)
+        self.assertFalse(result.has_errors())
+        self.assertEqual(Book.objects.get(name='Author book').author, author)
+
+    def test_import_data_foreign_key_non_unique(self):
+        class B(BookResource):
+            author = fields.Field(attribute='author', column_name='author',
+                                  widget=widgets.ForeignKeyWidget(Author, 'name'))
+
+            class Meta:
+                model = Book
+                fields = ('id', 'name', 'author')
+
+        Author.objects.create(name='Dup')
+        Author.objects.create(name='Dup')
+        dataset = tablib.Dataset(['', 'Dup book', 'Dup'],
+                                 headers=['id', 'name', 'author'])
+        result = B().import_data(dataset)
+        self.assertTrue(result.has_errors())
+        self.assertIsInstance(result.rows[0].errors[0].error,
+                              Author.MultipleObjectsReturned)
+        self.assertFalse(Book.objects.filter(name='Dup book').exists())
+
+    def test_import_data_foreign_key_cache_per_import(self):
+        dataset = tablib.Dataset(headers=['id', 'name', 'author'])
+        for i in range(3):
+            dataset.append(['', 'Book %s' % i, 'Author'])
+        other_dataset = tablib.Dataset(['', 'Other book', 'Author'],
+                                       headers=['id', 'name', 'author'])
+
+        class B(BookResource):
+            author = fields.Field(attribute='author', column_name='author',
+                                  widget=widgets.ForeignKeyWidget(Author, 'name'))
+
+            class Meta:
+                model = Book
+                fields = ('id', 'name', 'author')
+
+            def after_import_row(self, row, row_result, **kwargs):
+                # another import of the resource running meanwhile
+                if row['name'] == 'Book 0':
+                    B().import_data(other_dataset, raise_errors=True)
+
+        Author.objects.create(name='Author')
+        with CaptureQueriesContext(connection) as queries:
+            B().import_data(dataset, raise_errors=True)
+        self.assertEqual(len([q for q in queries
+                              if 'FROM "core_author"' in q['sql']]), 2)
+
+    def test_import_data_foreign_key_create_missing(self):
+        class B(BookResource):
+            author = fields.Field(
+                attribute='author', column_name='author',
+                widget=widgets.ForeignKeyWidget(Author, 'name', cache_size=10,
+                                                create_missing=True))
+
+            class Meta:
+                model = Book
+                fields = ('id', 'name', 'author')
+
+        Author.objects.create(name='Author')
+        resource = B()
+        dataset = tablib.Dataset(headers=['id', 'name', 'author'])
+        for name in ['Author', 'New author', 'Other author', 'New author']:
+            dataset.append(['', 'Created book', name])
+
+        result = resource.import_data(dataset, dry_run=True, raise_errors=True)
+        self.assertFalse(result.has_errors())
+        self.assertEqual(Author.objects.count(), 1)
+        # objects created by the rolled back dry run are not kept cached
+        self.assertEqual(list(resource.fields['author'].widget.cache),
+                         ['Author'])
+
+        with CaptureQueriesContext(connection) as queries:
+            result = resource.import_data(dataset, raise_errors=True)
+        self.assertFalse(result.has_errors())
+        self.assertEqual(len([q for q in queries
+                              if 'INTO "core_author"' in q['sql']]), 1)
+        self.assertEqual(
+            sorted(Book.objects.filter(name='Created book')
+                   .values_list('author__name', flat=True)),
+            ['Author', 'New author', 'New author', 'Other author'])
+
+    def test_import_data_foreign_key_create_missing_chunked_dry_run(self):
+        class B(BookResource):
+            author = fields.Field(
+                attribute='author', column_name='author',
+                widget=widgets.ForeignKeyWidget(Author, 'name',
+                                                create_missing=True))
+
+            class Meta:
+                model = Book
+                fields = ('id', 'name', 'author')
+
+        dataset = tablib.Dataset(headers=['id', 'name', 'author'])
+        for name in ['New author', 'Other author', 'New author']:
+            dataset.append(['', 'Created book', name])
+        result = B().import_data(dataset, dry_run=True, commit_every=2,
+                                 use_transactions=True)
+        self.assertFalse(result.has_errors())
+        self.assertEqual(result.totals[results.RowResult.IMPORT_TYPE_NEW], 3)
+        self.assertFalse(Author.objects.exists())
+        self.assertFalse(Book.objects.filter(name='Created book').exists())
+
+    def test_import_data_foreign_key_create_missing_not_prefetched(self):
+        class BirthdayWidget(widgets.ForeignKeyWidget):
+            def get_queryset(self, value, row):
+                return self.model.objects.filter(birthday=row['birthday'])
+
+        dataset = tablib.Dataset(['', 'Book', 'Author'],
+                                 headers=['id', 'name', 'author'])
+        for widget in [
+                widgets.ForeignKeyWidget(Author, 'name', use_cache=False,
+                                         create_missing=True),
+                BirthdayWidget(Author, 'name', create_missing=True),
+                widgets.ForeignKeyWidget(Book, 'author',
+                                         create_missing=True)]:
+            class B(BookResource):
+                author = fields.Field(attribute='author', column_name='author',
+                                      widget=widget)
+
+                class Meta:
+                    model = Book
+                    fields = ('id', 'name', 'author')
+
+            with self.assertRaises(ImproperlyConfigured):
+                B().import_data(dataset)
+
+        class B(BookResource):
+            author = fields.Field(
+                attribute='author', column_name='author',
+                widget=widgets.ForeignKeyWidget(Author, 'name',
+                                                create_missing=True))
+
+            class Meta:
+                model = Book
+                fields = ('id', 'name', 'author')
+                prefetch_foreign_keys = False
+
+        with self.assertRaises(ImproperlyConfigured):
+            B().import_data(dataset)
+
+    def test_import_data_foreign_key_create_missing_error(self):
+        class NamelessWidget(widgets.ForeignKeyWidget):
+            def get_missing_objects(self, lookup_values):
+                return [self.model(name=None) for value in lookup_values]
+
+        class B(BookResource):
+            author = fields.Field(
+                attribute='author', column_name='author',
+                widget=NamelessWidget(Author, 'name', create_missing=True))
+
+            class Meta:
+                model = Book
+                fields = ('id', 'name', 'author')
+
+        dataset = tablib.Dataset(['', 'Book', 'Author'],
+                                 headers=['id', 'name', 'author'])
+        result = B().import_data(dataset)
+        self.assertEqual(len(result.base_errors), 1)
+        self.assertIsInstance(result.base_errors[0].error, IntegrityError)
+        self.assertTrue(result.rows[0].errors)
+        self.assertFalse(Author.objects.exists())
+        with self.assertRaises(IntegrityError):
+            B().import_data(dataset, raise_errors=True)
+
+    def test_import_data_clean_columns(self):
+        class B(BookResource):
+            class Meta:
+                model = Book
+                fields = ('id', 'name', 'price')
+                clean_columns = True
+
+            def before_import_row(self, row, **kwargs):
+                if row['name'] == 'Changed':
+                    row['price'] = '4.5'
+
+        resource = B()
+        dataset = tablib.Dataset(headers=['id', 'name', 'price'])
+        dataset.append(['', 'Cleaned 1', '1.5'])
+        dataset.append(['', 'Cleaned 2', 'x'])
+        dataset.append(['', 'Cleaned 3', ''])
+        dataset.append(['', 'Changed', 'x'])
+        cleaned = []
+        clean_column = widgets.DecimalWidget.clean_column
+
+        def spy(widget, values):
+            cleaned.append(list(values))
+            return clean_column(widget, values)
+
+        widgets.DecimalWidget.clean_column = spy
+        try:
+            result = resource.import_data(dataset)
+        finally:
+            widgets.DecimalWidget.clean_column = clean_column
+        self.assertEqual(cleaned, [['1.5', 'x', '', 'x']])
+        self.assertEqual(
+            [row.import_type for row in result.rows],
+            [results.RowResult.IMPORT_TYPE_NEW,
+             results.RowResult.IMPORT_TYPE_ERROR,
+             results.RowResult.IMPORT_TYPE_NEW,
+             results.RowResult.IMPORT_TYPE_NEW])
+        self.assertIsInstance(result.rows[1].errors[0].error, InvalidOperation)
+        self.assertIsNone(resource.cleaned_columns)
+
+        del dataset[1]
+        result = resource.import_data(dataset, raise_errors=True)
+        self.assertEqual(Book.objects.get(name='Cleaned 1').price,
+                         Decimal('1.5'))
+        self.assertIsNone(Book.objects.get(name='Cleaned 3').price)
+        self.assertEqual(Book.objects.get(name='Changed').price,
+                         Decimal('4.5'))
+
+    def test_compile_import_plan(self):
+        class UpperField(fields.Field):
+            def clean(self, data, *args, **kwargs):
+                return super(UpperField, self).clean(data, *args, **kwargs).upper()
+
+        class B(resources.ModelResource):
+            name = UpperField(attribute='name', column_name='name')
+            total = fields.Field(attribute='price', readonly=True)
+
+            class Meta:
+                model = Book
+                fields = ('id', 'name', 'price', 'categories', 'total')
+
+        plan = B().compile_import_plan()
+        self.assertEqual([f.column_name for f, setter in plan.fields],
+                         ['name', 'id', 'price'])
+        self.assertEqual([setter is None for f, setter in plan.fields],
+                         [True, False, False])
+        self.assertEqual([f.column_name for f in plan.m2m_fields],
+                         ['categories'])
+
+        book = Book()
+        B().import_obj(book, {'id': '', 'name': 'Some book',
+                              'price': '1.5', 'total': '2'}, False)
+        self.assertEqual(book.name, 'SOME BOOK')
+        self.assertEqual(book.price, Decimal('1.5'))
+
+        class C(B):
+            def import_field(self, field, obj, data):
+                self.imported.append(field.column_name)
+                super(C, self).import_field(field, obj, data)
+
+        resource = C()
+        resource.imported = []
+        self.assertTrue(all(setter is None
+                            for f, setter in resource.compile_import_plan().fields))
+        resource.import_obj(Book(), {'name': 'Some book'}, False)
+        self.assertEqual(resource.imported, ['name', 'total', 'id', 'price'])
+
+    def test_import_data_skip_diff(self):
+        self.resource._meta.skip_diff = True
+        try:
+            result = self.resource.import_data(self.dataset, raise_errors=True)
+        finally:
+            self.resource._meta.skip_diff = False
+        self.assertIsNone(result.rows[0].diff)
+        self.assertEqual(result.rows[0].import_type,
+                         results.RowResult.IMPORT_TYPE_UPDATE)
+
     @skip("See: https://github.com/django-import-export/django-import-export/issues/311")
     def test_get_diff_with_callable_related_manager(self):
         resource = AuthorResource()
@@ -412,6 +835,37 @@ class ModelResourceTest(TestCase):
         self.assertEqual(full_title, '%s by %s' % (self.book.name,
                                                    self.book.author.name))
 
+    def test_compile_export_plan(self):
+        class B(resources.ModelResource):
+            full_title = fields.Field(column_name="Full title")
+
+            class Meta:
+                model = Book
+                fields = ('name', 'author__name', 'full_title', 'categories')
+
+            def dehydrate_full_title(self, obj):
+                return '%s by %s' % (obj.name, obj.author.name)
+
+        author = Author.objects.create(name="Author")
+        self.book.author = author
+        self.book.save()
+        self.book.categories.add(Category.objects.create(name='Cat'))
+        resource = B()
+        plan = resource.compile_export_plan()
+        self.assertEqual([export(self.book) for export in plan],
+                         [resource.export_field(field, self.book)
+                          for field in resource.get_export_fields()])
+        self.assertEqual(
+            resource.export_resource(Book(name='New', author=author)),
+            ['New by Author', 'New', '', 'Author'])
+
+        class C(B):
+            def export_field(self, field, obj):
+                return 'exported'
+
+        self.assertEqual(C().export(Book.objects.all())[0],
+                         ('exported',) * 4)
+
     def test_widget_fomat_in_fk_field(self):
         class B(resources.ModelResource):
 
@@ -562,6 +1016,73 @@ class ModelResourceTest(TestCase):
         self.assertFalse(result.has_errors())
         self.assertEqual(len(result.rows), 0)
 
+    def test_import_data_skip_unchanged_detects_changes(self):
+        cat1 = Category.objects.create(name='Cat 1')
+        self.book.categories.add(cat1)
+        dataset = self.resource.export()
+        dataset.append_col(lambda row: 'Changed', header='name')
+        del dataset['name']
+
+        resource = deepcopy(self.resource)
+        resource._meta.skip_unchanged = True
+        result = resource.import_data(dataset, raise_errors=True)
+        self.assertEqual(result.rows[0].import_type,
+                         results.RowResult.IMPORT_TYPE_UPDATE)
+        self.assertEqual(Book.objects.get(pk=self.book.pk).name, 'Changed')
+
+    def test_get_instance_snapshot(self):
+        cat1 = Category.objects.create(name='Cat 1')
+        self.book.categories.add(cat1)
+        snapshot = self.resource.get_instance_snapshot(self.book)
+        self.assertIsInstance(snapshot, tuple)
+        self.assertIn('Some book', snapshot)
+        self.assertIn([cat1], snapshot)
+
+    def test_import_data_without_skip_row_takes_no_snapshot(self):
+        class B(BookResource):
+            class Meta:
+                model = Book
+                skip_diff = True
+
+        class DeepCopyB(B):
+            class Meta:
+                use_deepcopy = True
+
+        self.book.categories.add(Category.objects.create(name='Cat 1'))
+        dataset = self.resource.export()
+
+        def count_category_queries(resource):
+            with CaptureQueriesContext(connection) as queries:
+                resource.import_data(dataset, raise_errors=True)
+            return len([q for q in queries.captured_queries
+                        if q['sql'].startswith('SELECT "core_category"')])
+
+        self.assertEqual(count_category_queries(B()),
+                         count_category_queries(DeepCopyB()))
+
+    def test_import_data_skip_unchanged_overridden_skip_row(self):
+        originals = []
+
+        class B(BookResource):
+            class Meta:
+                model = Book
+                skip_unchanged = True
+
+            def skip_row(self, instance, original):
+                originals.append(original)
+                return super(B, self).skip_row(instance, original)
+
+        class SnapshotB(B):
+            class Meta:
+                use_deepcopy = False
+
+        for resource_class, original_class in [(B, Book), (SnapshotB, tuple)]:
+            resource = resource_class()
+            result = resource.import_data(resource.export(), raise_errors=True)
+            self.assertEqual(result.rows[0].import_type,
+                             results.RowResult.IMPORT_TYPE_SKIP)
+            self.assertIsInstance(originals[-1], original_class)
+
     def test_before_import_access_to_kwargs(self):
         class B(BookResource):
             def before_import(self, dataset, using_transactions, dry_run, **kwargs):
@@ -714,6 +1235,541 @@ class ModelResourceTest(TestCase):
         self.assertEqual(WithFloatField.objects.all()[1].f, None)
 
 
+class RowSavepointTest(TestCase):
+
+    def setUp(self):
+        self.dataset = tablib.Dataset(headers=['id', 'name'])
+        for i in range(3):
+            self.dataset.append(['', 'Book %s' % i])
+
+    def count_savepoints(self, resource, **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            resource.import_data(self.dataset, use_transactions=True, **kwargs)
+        return len([q for q in queries.captured_queries
+                    if q['sql'].startswith('SAVEPOINT')])
+
+    def test_savepoint_per_row_when_collecting_errors(self):
+        # one savepoint per row, plus two around the whole import
+        self.assertEqual(
+            self.count_savepoints(BookResource(), raise_errors=False), 5)
+
+    def test_no_savepoint_per_row_when_raising_errors(self):
+        self.assertEqual(
+            self.count_savepoints(BookResource(), raise_errors=True), 2)
+
+    def test_use_row_savepoints(self):
+        class B(BookResource):
+            class Meta:
+                model = Book
+                use_row_savepoints = True
+
+        self.assertEqual(self.count_savepoints(B(), raise_errors=True), 5)
+
+    def test_import_data_commit_every_stops_at_failed_row(self):
+        self.dataset[1] = ('foo', 'Book 1')
+        result = BookResource().import_data(
+            self.dataset, commit_every=10, use_transactions=True)
+        self.assertEqual(len(result.rows), 2)
+        self.assertTrue(result.rows[1].errors)
+        self.assertEqual(Book.objects.count(), 0)
+
+
+class BulkImportTest(TestCase):
+
+    def setUp(self):
+        class B(BookResource):
+            class Meta:
+                model = Book
+                use_bulk = True
+                batch_size = 2
+
+            def bulk_create(self, using_transactions, dry_run):
+                self.batches.append(len(self.create_instances))
+                return super(B, self).bulk_create(using_transactions, dry_run)
+
+        self.resource = B()
+        self.resource.batches = []
+        self.dataset = tablib.Dataset(headers=['id', 'name', 'author_email'])
+        for i in range(5):
+            self.dataset.append(['', 'Book %s' % i, 'test@example.com'])
+
+    def test_import_data_bulk_create(self):
+        result = self.resource.import_data(self.dataset, raise_errors=True)
+        self.assertFalse(result.has_errors())
+        self.assertEqual(result.totals[results.RowResult.IMPORT_TYPE_NEW], 5)
+        self.assertEqual(self.resource.batches, [2, 2, 1])
+        self.assertEqual(Book.objects.count(), 5)
+
+    def test_import_data_bulk_create_pks(self):
+        saved = []
+
+        class B(BookResource):
+            class Meta:
+                model = Book
+                fields = ('name', 'author_email')
+                import_id_fields = ['name']
+                use_bulk = True
+                batch_size = 2
+
+            def after_save_instance(self, instance, using_transactions,
+                                    dry_run):
+                saved.append(instance.pk)
+
+        dataset = tablib.Dataset(headers=['name', 'author_email'])
+        for i in range(3):
+            dataset.append(['Book %s' % i, 'test@example.com'])
+        result = B().import_data(dataset, raise_errors=True)
+        self.assertFalse(result.has_errors())
+        pks = [Book.objects.get(name='Book %s' % i).pk for i in range(3)]
+        self.assertEqual([row.object_id for row in result.rows], pks)
+        self.assertEqual(saved, pks)
+
+    @skipIfDBFeature('can_return_ids_from_bulk_insert')
+    def test_import_data_bulk_after_save_instance_without_pks(self):
+        class B(BookResource):
+            class Meta:
+                model = Book
+                use_bulk = True
+
+            def after_save_instance(self, instance, using_transactions,
+                                    dry_run):
+                pass
+
+        with self.assertRaises(ImproperlyConfigured):
+            B().import_data(self.dataset)
+
+    def test_after_save_instance_called_after_batch(self):
+        saved = []
+
+        def after_save_instance(instance, using_transactions, dry_run):
+            saved.append((instance.name, len(self.resource.create_instances)))
+
+        self.resource.after_save_instance = after_save_instance
+        self.resource.import_data(self.dataset, raise_errors=True)
+        self.assertEqual([name for name, pending in saved],
+                         ['Book %s' % i for i in range(5)])
+        self.assertTrue(all(pending == 0 for name, pending in saved))
+
+    def test_import_data_bulk_update(self):
+        books = [Book.objects.create(name='Book %s' % i, price=Decimal(i))
+                 for i in range(3)]
+        dataset = tablib.Dataset(headers=['id', 'name', 'price'])
+        for book in books:
+            dataset.append([book.pk, book.name + ' (2nd ed.)', '9.99'])
+
+        with CaptureQueriesContext(connection) as queries:
+            result = self.resource.import_data(dataset, raise_errors=True)
+        self.assertFalse(result.has_errors())
+        updates = [q for q in queries.captured_queries
+                   if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(
+            result.totals[results.RowResult.IMPORT_TYPE_UPDATE], 3)
+        for book in books:
+            book.refresh_from_db()
+            self.assertTrue(book.name.endswith(' (2nd ed.)'))
+            self.assertEqual(book.price, Decimal('9.99'))
+
+    def test_import_data_bulk_delete(self):
+        class B(BookResource):
+            delete = fields.Field(widget=widgets.BooleanWidget())
+
+            class Meta:
+                model = Book
+                use_bulk = True
+                batch_size = 2
+
+            def for_delete(self, row, instance):
+                return self.fields['delete'].clean(row)
+
+            def after_bulk_delete(self, instances, dry_run):
+                self.deleted_batches.append([i.name for i in instances])
+
+        books = [Book.objects.create(name='Book %s' % i) for i in range(3)]
+        kept = Book.objects.create(name='Kept')
+        dataset = tablib.Dataset(headers=['id', 'name', 'delete'])
+        for book in books:
+            dataset.append([book.pk, book.name, '1'])
+        dataset.append([kept.pk, kept.name, '0'])
+
+        resource = B()
+        resource.deleted_batches = []
+        result = resource.import_data(dataset, raise_errors=True)
+        self.assertFalse(result.has_errors())
+        self.assertEqual(
+            result.totals[results.RowResult.IMPORT_TYPE_DELETE], 3)
+        self.assertEqual(resource.deleted_batches,
+                         [['Book 0', 'Book 1'], ['Book 2']])
+        self.assertEqual(list(Book.objects.all()), [kept])
+
+    def test_import_data_upsert(self):
+        class B(BookResource):
+            class Meta:
+                model = Book
+                use_bulk = True
+                use_upsert = True
+
+        book = Book.objects.create(name='Some book', price=Decimal('1.00'))
+        dataset = tablib.Dataset(headers=['id', 'name', 'price'])
+        dataset.append([book.pk, 'Some book', '2.00'])
+        dataset.append([book.pk + 100, 'Book with id', '3.00'])
+        dataset.append(['', 'Book without id', '4.00'])
+
+        result = B().import_data(dataset, raise_errors=True)
+        self.assertFalse(result.has_errors())
+        self.assertEqual(
+            [row.import_type for row in result.rows],
+            [results.RowResult.IMPORT_TYPE_UPDATE,
+             results.RowResult.IMPORT_TYPE_NEW,
+             results.RowResult.IMPORT_TYPE_NEW])
+        self.assertEqual(Book.objects.get(pk=book.pk).price, Decimal('2.00'))
+        self.assertEqual(Book.objects.get(pk=book.pk + 100).name,
+                         'Book with id')
+        self.assertTrue(Book.objects.filter(name='Book without id').exists())
+
+    def test_import_data_upsert_keeps_missing_columns(self):
+        class B(BookResource):
+            class Meta:
+                model = Book
+                use_bulk = True
+                use_upsert = True
+
+        book = Book.objects.create(name='Keep me', price=Decimal('1.00'),
+                                   author_email='test@example.com')
+        dataset = tablib.Dataset(headers=['id', 'price'])
+        dataset.append([book.pk, '2.00'])
+
+        result = B().import_data(dataset, raise_errors=True)
+        self.assertFalse(result.has_errors())
+        book.refresh_from_db()
+        self.assertEqual(book.price, Decimal('2.00'))
+        self.assertEqual(book.name, 'Keep me')
+        self.assertEqual(book.author_email, 'test@example.com')
+
+    def test_import_data_upsert_non_pk_key(self):
+        class U(resources.ModelResource):
+            class Meta:
+                model = User
+                fields = ('username', 'first_name', 'groups')
+                import_id_fields = ['username']
+                use_bulk = True
+                use_upsert = True
+
+        group = Group.objects.create(name='Group')
+        user = User.objects.create(username='foo', first_name='Foo',
+                                   email='foo@example.com')
+        dataset = tablib.Dataset(headers=['username', 'first_name', 'groups'])
+        dataset.append(['foo', 'Bar', '%s' % group.pk])
+        dataset.append(['new', 'New', '%s' % group.pk])
+
+        result = U().import_data(dataset, raise_errors=True)
+        self.assertFalse(result.has_errors())
+        new = User.objects.get(username='new')
+        self.assertEqual([row.object_id for row in result.rows],
+                         [user.pk, new.pk])
+        user.refresh_from_db()
+        self.assertEqual(user.first_name, 'Bar')
+        self.assertEqual(user.email, 'foo@example.com')
+        self.assertEqual(list(user.groups.all()), [group])
+        self.assertEqual(list(new.groups.all()), [group])
+
+    def test_import_data_upsert_requires_unique_key(self):
+        class B(BookResource):
+            class Meta:
+                model = Book
+                use_bulk = True
+                use_upsert = True
+                import_id_fields = ['name']
+
+        with self.assertRaises(ImproperlyConfigured):
+            B().import_data(self.dataset)
+
+    def test_import_data_bulk_m2m(self):
+        class B(BookResource):
+            class Meta:
+                model = Book
+                fields = ('id', 'name', 'categories')
+                use_bulk = True
+
+        cats = [Category.objects.create(name='Cat %s' % i) for i in range(3)]
+        book = Book.objects.create(name='Some book')
+        book.categories.add(cats[0], cats[1])
+        dataset = tablib.Dataset(headers=['id', 'name', 'categories'])
+        dataset.append([book.pk, 'Some book', '%s,%s' % (cats[1].pk, cats[2].pk)])
+        for i in range(3):
+            dataset.append([book.pk + 1 + i, 'Book %s' % i,
+                            '%s,%s' % (cats[0].pk, cats[2].pk)])
+
+        through = Book.categories.through
+        with CaptureQueriesContext(connection) as queries:
+            result = B().import_data(dataset, raise_errors=True)
+        self.assertFalse(result.has_errors())
+        table = through._meta.db_table
+        m2m_queries = [q for q in queries.captured_queries
+                       if table in q['sql'].split(' WHERE ')[0].split(' JOIN ')[0]]
+        self.assertEqual(len(m2m_queries), 3)
+        category_queries = [q for q in queries.captured_queries
+                            if q['sql'].startswith('SELECT "core_category"') and
+                            ' JOIN ' not in q['sql']]
+        self.assertEqual(len(category_queries), 1)
+        self.assertEqual(sorted(c.pk for c in book.categories.all()),
+                         [cats[1].pk, cats[2].pk])
+        for i in range(3):
+            self.assertEqual(
+                sorted(c.pk for c in
+                       Book.objects.get(name='Book %s' % i).categories.all()),
+                [cats[0].pk, cats[2].pk])
+
+    def test_import_data_bulk_m2m_generated_ids(self):
+        class B(BookResource):
+            class Meta:
+                model = Book
+                fields = ('id', 'name', 'categories')
+                use_bulk = True
+
+        cat = Category.objects.create(name='Cat')
+        dataset = tablib.Dataset(headers=['id', 'name', 'categories'])
+        for i in range(3):
+            dataset.append(['', 'Book %s' % i, '%s' % cat.pk])
+
+        result = B().import_data(dataset, raise_errors=True)
+        self.assertFalse(result.has_errors())
+        for i, row in enumerate(result.rows):
+            book = Book.objects.get(name='Book %s' % i)
+            self.assertEqual(row.object_id, book.pk)
+            self.assertEqual(list(book.categories.all()), [cat])
+
+    def test_import_data_bulk_m2m_non_unique(self):
+        class B(BookResource):
+            categories = fields.Field(
+                attribute='categories', column_name='categories',
+                widget=widgets.ManyToManyWidget(Category, field='name'))
+
+            class Meta:
+                model = Book
+                fields = ('id', 'name', 'categories')
+                use_bulk = True
+
+        cats = [Category.objects.create(name='Dup') for i in range(2)]
+        book = Book.objects.create(name='Some book')
+        dataset = tablib.Dataset([book.pk, 'Some book', 'Dup'],
+                                 headers=['id', 'name', 'categories'])
+        result = B().import_data(dataset, raise_errors=True)
+        self.assertFalse(result.has_errors())
+        self.assertEqual(sorted(c.pk for c in book.categories.all()),
+                         [cat.pk for cat in cats])
+
+    def test_import_data_bulk_m2m_overridden_clean(self):
+        class FirstCategoryWidget(widgets.ManyToManyWidget):
+            def clean(self, value, row=None, *args, **kwargs):
+                return super(FirstCategoryWidget, self).clean(
+                    value, row, *args, **kwargs)[:1]
+
+        class B(BookResource):
+            categories = fields.Field(
+                attribute='categories', column_name='categories',
+                widget=FirstCategoryWidget(Category))
+
+            class Meta:
+                model = Book
+                fields = ('id', 'name', 'categories')
+                use_bulk = True
+
+        class ImportFieldB(B):
+            def import_field(self, field, obj, data):
+                if field.attribute == 'categories':
+                    # only imports the last category
+                    last = data['categories'].split(',')[-1]
+                    data = dict(data, categories=last)
+                super(ImportFieldB, self).import_field(field, obj, data)
+
+        cats = [Category.objects.create(name='Cat %s' % i) for i in range(2)]
+        for resource_class, expected in [(B, cats[0]), (ImportFieldB, cats[1])]:
+            dataset = tablib.Dataset(headers=['id', 'name', 'categories'])
+            dataset.append(['', 'Book', '%s,%s' % (cats[0].pk, cats[1].pk)])
+            result = resource_class().import_data(dataset, raise_errors=True)
+            self.assertFalse(result.has_errors())
+            book = Book.objects.get(name='Book')
+            self.assertEqual(list(book.categories.all()), [expected])
+            book.delete()
+
+    def test_get_bulk_update_fields(self):
+        class B(resources.ModelResource):
+            author_name = fields.Field(attribute='author__name')
+            total = fields.Field(attribute='name', readonly=True)
+
+            class Meta:
+                model = Book
+                fields = ('id', 'name', 'author', 'price', 'categories')
+
+        self.assertEqual(B().get_bulk_update_fields(),
+                         ['name', 'author', 'price'])
+
+    def test_bulk_create_error_attributed_to_row(self):
+        class P(resources.ModelResource):
+            class Meta:
+                model = Profile
+                use_bulk = True
+
+        user = User.objects.create(username='foo')
+        dataset = tablib.Dataset(headers=['id', 'user', 'is_private'])
+        dataset.append(['', user.pk, '1'])
+        dataset.append(['', '', '1'])
+
+        result = P().import_data(dataset, raise_errors=False,
+                                 use_transactions=True)
+        self.assertTrue(result.has_errors())
+        self.assertFalse(result.rows[0].errors)
+        self.assertTrue(result.rows[1].errors)
+        self.assertEqual(result.totals[results.RowResult.IMPORT_TYPE_NEW], 1)
+        self.assertEqual(result.totals[results.RowResult.IMPORT_TYPE_ERROR], 1)
+
+
+class CopyImportTest(TestCase):
+
+    def setUp(self):
+        class B(BookResource):
+            class Meta:
+                model = Book
+                use_copy = True
+                batch_size = 2
+
+        self.resource = B()
+        self.dataset = tablib.Dataset(headers=['id', 'name', 'price'])
+        for i in range(5):
+            self.dataset.append(['', 'Book %s' % i, '%s.50' % i])
+
+    def test_import_data_copy(self):
+        result = self.resource.import_data(self.dataset, raise_errors=True)
+        self.assertFalse(result.has_errors())
+        self.assertEqual(result.totals[results.RowResult.IMPORT_TYPE_NEW], 5)
+        self.assertEqual(result.rows, [])
+        books = Book.objects.order_by('name')
+        self.assertEqual([b.name for b in books],
+                         ['Book %s' % i for i in range(5)])
+        self.assertEqual(books[1].price, Decimal('1.50'))
+        # model defaults are used for columns not in the dataset
+        self.assertFalse(books[0].imported)
+
+    def test_import_data_copy_error_row(self):
+        self.dataset.insert(2, ['', 'Bad book', 'foo'])
+        result = self.resource.import_data(self.dataset, raise_errors=False,
+                                           collect_failed_rows=True)
+        self.assertTrue(result.has_errors())
+        self.assertEqual(result.totals[results.RowResult.IMPORT_TYPE_NEW], 5)
+        self.assertEqual(result.totals[results.RowResult.IMPORT_TYPE_ERROR], 1)
+        self.assertEqual(len(result.failed_dataset), 1)
+        self.assertEqual(result.rows[0].errors[0].row['name'], 'Bad book')
+        self.assertEqual([line for line, errors in result.row_errors()], [3])
+
+    def test_import_data_copy_existing_key(self):
+        book = Book.objects.create(name='Existing')
+        self.dataset.append([book.pk, 'Existing again', '1.00'])
+        result = self.resource.import_data(self.dataset, raise_errors=False)
+        self.assertEqual(result.totals[results.RowResult.IMPORT_TYPE_NEW], 5)
+        self.assertEqual(result.totals[results.RowResult.IMPORT_TYPE_ERROR], 1)
+        self.assertEqual(result.rows[0].errors[0].row['name'],
+                         'Existing again')
+
+    def test_import_data_copy_incompatible_options(self):
+        class SkipUnchanged(BookResource):
+            class Meta:
+                model = Book
+                use_copy = True
+                skip_unchanged = True
+
+        class ForDelete(BookResource):
+            class Meta:
+                model = Book
+                use_copy = True
+
+            def for_delete(self, row, instance):
+                return True
+
+        class ImportField(BookResource):
+            class Meta:
+                model = Book
+                use_copy = True
+
+            def import_field(self, field, obj, data):
+                pass
+
+        class SaveInstance(BookResource):
+            class Meta:
+                model = Book
+                use_copy = True
+
+            def before_save_instance(self, instance, using_transactions,
+                                     dry_run):
+                pass
+
+        for resource_class in (SkipUnchanged, ForDelete, ImportField,
+                               SaveInstance):
+            with self.assertRaises(ImproperlyConfigured):
+                resource_class().import_data(self.dataset)
+
+    def test_escape_copy_value(self):
+        self.assertEqual(pgcopy.escape_copy_value(None), '\\N')
+        self.assertEqual(pgcopy.escape_copy_value(True), 't')
+        self.assertEqual(pgcopy.escape_copy_value('a\tb\nc\\'),
+                         'a\\tb\\nc\\\\')
+        self.assertEqual(pgcopy.escape_copy_value(Decimal('1.50')), '1.50')
+        self.assertEqual(pgcopy.escape_copy_value(str('ab')), 'ab')
+        self.assertEqual(pgcopy.escape_copy_value(b'ab', binary=True),
+                         '\\\\x6162')
+        self.assertEqual(
+            pgcopy.escape_copy_value(memoryview(b'ab'), binary=True),
+            '\\\\x6162')
+
+    def test_copy_stream(self):
+        stream = pgcopy.CopyStream(['ab\n', 'cd\n', 'e\n'])
+        self.assertEqual(stream.read(4), 'ab\nc')
+        self.assertEqual(stream.read(), 'd\ne\n')
+        self.assertEqual(stream.read(), '')
+
+
+class ChunkedImportTest(TestCase):
+
+    def setUp(self):
+        self.resource = BookResource()
+        self.dataset = tablib.Dataset(headers=['id', 'name', 'price'])
+        for i in range(6):
+            self.dataset.append(['', 'Book %s' % i, '1.00'])
+        self.dataset[3] = ('', 'Book 3', 'foo')
+
+    def test_import_data_commit_every(self):
+        result = self.resource.import_data(self.dataset, commit_every=2,
+                                           use_transactions=True)
+        self.assertTrue(result.has_errors())
+        self.assertEqual(result.committed_chunks, [(0, 2)])
+        self.assertEqual(result.resume_from, 2)
+        self.assertEqual(sorted(Book.objects.values_list('name', flat=True)),
+                         ['Book 0', 'Book 1'])
+        # Book 2 has been rolled back with the failed chunk
+        self.assertEqual(result.totals[results.RowResult.IMPORT_TYPE_NEW], 2)
+        self.assertEqual(result.totals[results.RowResult.IMPORT_TYPE_SKIP], 1)
+        self.assertEqual(result.rows[2].import_type,
+                         results.RowResult.IMPORT_TYPE_SKIP)
+
+        self.dataset[3] = ('', 'Book 3', '1.00')
+        result = self.resource.import_data(self.dataset, commit_every=2,
+                                           use_transactions=True,
+                                           resume_from=result.resume_from)
+        self.assertFalse(result.has_errors())
+        self.assertEqual(result.committed_chunks, [(2, 4), (4, 6)])
+        self.assertEqual(result.resume_from, 6)
+        self.assertEqual(Book.objects.count(), 6)
+
+    def test_import_data_commit_every_dry_run(self):
+        self.dataset[3] = ('', 'Book 3', '1.00')
+        result = self.resource.import_data(self.dataset, commit_every=2,
+                                           dry_run=True)
+        self.assertFalse(result.has_errors())
+        self.assertEqual(len(result.rows), 6)
+        self.assertEqual(result.committed_chunks, [])
+        self.assertEqual(Book.objects.count(), 0)
+
+
 class ModelResourceTransactionTest(TransactionTestCase):
     @skipUnlessDBFeature('supports_transactions')
     def test_m2m_import_with_transactions(self):
@@ -832,6 +1888,16 @@ if VERSION >= (1, 8) and 'postgresql' in settings.DATABASES['default']['ENGINE']
             book_with_chapters = list(BookWithChapters.objects.all())[0]
             self.assertListEqual(book_with_chapters.chapters, chapters)
 
+        def test_arrayfield_copy(self):
+            class BookWithChaptersResource(resources.ModelResource):
+                class Meta:
+                    model = BookWithChapters
+                    use_copy = True
+
+            dataset = tablib.Dataset(headers=["id", "name", "chapters"])
+            with self.assertRaises(ImproperlyConfigured):
+                BookWithChaptersResource().import_data(dataset)
+
 
 class ManyRelatedManagerDiffTest(TestCase):
     fixtures = ["category"]
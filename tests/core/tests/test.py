@@ -7,3 +7,4 @@ from .instance_loaders_tests import *
 from .admin_integration_tests import *
 from .base_formats_tests import *
 from .tmp_storages_tests import *
+from .lookup_caches_tests import *
@@ -30,6 +30,58 @@ class BooleanWidgetTest(TestCase):
         self.assertEqual(self.widget.render(None), "")
 
 
+class FormatParserTest(TestCase):
+
+    def test_compile_format(self):
+        self.assertIsNotNone(widgets.compile_format('%Y-%m-%d'))
+        self.assertIsNotNone(widgets.compile_format('%d.%m.%Y %H:%M:%S.%f'))
+        self.assertIsNone(widgets.compile_format('%b %d %Y'))
+        self.assertIsNone(widgets.compile_format('%Y%m%d'))
+
+    def test_parse_like_strptime(self):
+        values = [
+            ('%Y-%m-%d', '2012-08-13'),
+            ('%Y-%m-%d', '2012-8-3'),
+            ('%d.%m.%Y %H:%M', '13.08.2012  18:05'),
+            ('%Y-%m-%d %H:%M:%S.%f', '2012-08-13 18:05:01.25'),
+            ('%H:%M:%S', '20:15:00'),
+            ('%b %d %Y', 'Aug 13 2012'),
+        ]
+        for format, value in values:
+            parser = widgets.FormatParser([format])
+            self.assertEqual(parser.parse(value),
+                             datetime.strptime(value, format))
+        for value in ['2012-02-30', '2012-08-13x', '12-08-13', None]:
+            with self.assertRaises(ValueError):
+                widgets.FormatParser(['%Y-%m-%d']).parse(value)
+
+    def test_last_matching_format_first(self):
+        parser = widgets.FormatParser(['%Y-%m-%d', '%m/%d/%Y', '%d.%m.%Y'])
+        self.assertEqual(parser.parse('13.08.2012'), datetime(2012, 8, 13))
+        self.assertEqual(parser.last, 2)
+        self.assertEqual(parser.parse('2012-08-13'), datetime(2012, 8, 13))
+        self.assertEqual(parser.last, 0)
+        self.assertEqual(parser.parse('08/13/2012'), datetime(2012, 8, 13))
+        self.assertEqual(parser.last, 1)
+        # formats are not reordered while other threads may iterate them
+        self.assertEqual(parser.formats, ('%Y-%m-%d', '%m/%d/%Y', '%d.%m.%Y'))
+        self.assertRaises(ValueError, widgets.FormatParser([]).parse, '1')
+
+    def test_memo(self):
+        parser = widgets.FormatParser(['%Y-%m-%d'])
+        parser.memo_size = 1
+        parser.parse('2012-08-13')
+        self.assertEqual(list(parser.memo), ['2012-08-13'])
+        parser.parse('2012-08-14')
+        self.assertEqual(list(parser.memo), ['2012-08-14'])
+
+    def test_widget_formats_replaced(self):
+        widget = widgets.DateWidget('%Y-%m-%d')
+        widget.clean('2012-08-13')
+        widget.formats = ('%d.%m.%Y',)
+        self.assertEqual(widget.clean('13.08.2012'), date(2012, 8, 13))
+
+
 class DateWidgetTest(TestCase):
 
     def setUp(self):
@@ -138,6 +190,54 @@ class IntegerWidgetTest(TestCase):
         self.assertEqual(self.widget.clean("0.0"), self.value)
 
 
+class NumberWidgetCleanColumnTest(TestCase):
+
+    values = ['1', '', None, '2.5', 'x', 3]
+
+    def assertCleanColumn(self, widget, expected):
+        cleaned = widget.clean_column(self.values)
+        self.assertEqual(len(cleaned), len(self.values))
+        for value, expected_value in zip(cleaned, expected):
+            if isinstance(expected_value, type):
+                self.assertIsInstance(value, expected_value)
+            else:
+                self.assertEqual(value, expected_value)
+                self.assertEqual(type(value), type(expected_value))
+
+    def test_integer(self):
+        self.assertCleanColumn(widgets.IntegerWidget(),
+                               [1, None, None, 2, ValueError, 3])
+        self.assertEqual(widgets.IntegerWidget().clean_column(['1', '2']),
+                         [1, 2])
+
+    def test_float(self):
+        self.assertCleanColumn(widgets.FloatWidget(),
+                               [1.0, None, None, 2.5, ValueError, 3.0])
+        self.assertEqual(widgets.FloatWidget().clean_column(['1', '', 2]),
+                         [1.0, None, 2.0])
+
+    def test_decimal(self):
+        self.assertCleanColumn(
+            widgets.DecimalWidget(),
+            [Decimal('1'), None, None, Decimal('2.5'), Exception, Decimal(3)])
+
+    def test_without_numpy(self):
+        numpy = widgets.numpy
+        widgets.numpy = None
+        try:
+            self.test_integer()
+            self.test_float()
+        finally:
+            widgets.numpy = numpy
+
+    def test_overridden_clean(self):
+        class DoubleWidget(widgets.IntegerWidget):
+            def clean(self, value, row=None, *args, **kwargs):
+                return 2 * super(DoubleWidget, self).clean(value)
+
+        self.assertEqual(DoubleWidget().clean_column(['1', '2']), [2, 4])
+
+
 class ForeignKeyWidgetTest(TestCase):
 
     def setUp(self):
@@ -169,6 +269,137 @@ class ForeignKeyWidgetTest(TestCase):
         row = {'name': "Foo", 'birthday': author2.birthday}
         self.assertEqual(birthday_widget.clean("Foo", row), author2)
 
+    def test_clean_cached(self):
+        cache = {}
+        with self.assertNumQueries(1):
+            self.assertEqual(self.widget.clean(1, cache=cache), self.author)
+            self.assertEqual(self.widget.clean(1, cache=cache), self.author)
+        # objects are only cached in the cache of an import by default
+        with self.assertNumQueries(2):
+            self.widget.clean(1)
+            self.widget.clean(1)
+        self.assertFalse(self.widget.cache)
+
+    def test_clean_without_cache(self):
+        widget = widgets.ForeignKeyWidget(Author, use_cache=False)
+        cache = {}
+        with self.assertNumQueries(2):
+            widget.clean(1, cache=cache)
+            widget.clean(1, cache=cache)
+        self.assertFalse(cache)
+
+    def test_clean_does_not_cache_missing(self):
+        cache = {}
+        with self.assertRaises(Author.DoesNotExist):
+            self.widget.clean(2, cache=cache)
+        author = Author.objects.create(id=2, name='Bar')
+        self.assertEqual(self.widget.clean(2, cache=cache), author)
+
+    def test_clean_cache_size(self):
+        widget = widgets.ForeignKeyWidget(Author, 'name', cache_size=2)
+        Author.objects.create(name='Bar')
+        Author.objects.create(name='Baz')
+        widget.clean('Foo')
+        widget.clean('Bar')
+        widget.clean('Foo')
+        widget.clean('Baz')
+        self.assertEqual(list(widget.cache), ['Foo', 'Baz'])
+        with self.assertNumQueries(0):
+            widget.clean('Foo')
+        widget.clear_cache()
+        with self.assertNumQueries(1):
+            widget.clean('Foo')
+
+    def test_prefetch(self):
+        author2 = Author.objects.create(name='Bar')
+        widget = widgets.ForeignKeyWidget(Author, 'name')
+        cache = {}
+        with self.assertNumQueries(1):
+            widget.prefetch(['Foo', 'Bar', 'Foo', '', 'Missing'], cache=cache)
+        with self.assertNumQueries(0):
+            self.assertEqual(widget.clean('Foo', cache=cache), self.author)
+            self.assertEqual(widget.clean('Bar', cache=cache), author2)
+        with self.assertRaises(Author.DoesNotExist):
+            widget.clean('Missing', cache=cache)
+        self.assertFalse(widget.cache)
+
+    def test_prefetch_without_cache(self):
+        widget = widgets.ForeignKeyWidget(Author, 'name')
+        with self.assertNumQueries(0):
+            widget.prefetch(['Foo'])
+
+    def test_prefetch_create_missing(self):
+        widget = widgets.ForeignKeyWidget(Author, 'name', cache_size=10,
+                                          create_missing=True)
+        cache = {}
+        widget.prefetch(['Missing'], create=False, cache=cache)
+        self.assertFalse(Author.objects.filter(name='Missing').exists())
+        # the object which would be created
+        missing = widget.clean('Missing', cache=cache)
+        self.assertIsNone(missing.pk)
+        self.assertEqual(missing.name, 'Missing')
+
+        cache = {}
+        # the bulk_create of missing objects runs in a savepoint
+        with self.assertNumQueries(5):
+            widget.prefetch(['Foo', 'Missing', 'Other', 'Missing'],
+                            cache=cache)
+        self.assertEqual(Author.objects.count(), 3)
+        missing = Author.objects.get(name='Missing')
+        with self.assertNumQueries(0):
+            self.assertEqual(widget.clean('Missing', cache=cache), missing)
+        # created objects are only cached for the running import
+        self.assertEqual(list(widget.cache), ['Foo'])
+
+    def test_prefetch_pk(self):
+        cache = {}
+        with self.assertNumQueries(1):
+            self.widget.prefetch(['%s' % self.author.pk, 'invalid'],
+                                 cache=cache)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.widget.clean('%s' % self.author.pk,
+                                               cache=cache),
+                             self.author)
+
+    def test_prefetch_non_unique(self):
+        Author.objects.create(name='Foo')
+        widget = widgets.ForeignKeyWidget(Author, 'name')
+        cache = {}
+        widget.prefetch(['Foo'], cache=cache)
+        self.assertFalse(cache)
+        with self.assertRaises(Author.MultipleObjectsReturned):
+            widget.clean('Foo', cache=cache)
+
+    def test_prefetch_chunks(self):
+        Author.objects.create(name='Bar')
+        widget = widgets.ForeignKeyWidget(Author, 'name')
+        widget.prefetch_chunk_size = 1
+        with self.assertNumQueries(2):
+            widget.prefetch(['Foo', 'Bar'], cache={})
+
+    def test_prefetch_overridden_queryset(self):
+        class BirthdayWidget(widgets.ForeignKeyWidget):
+            def get_queryset(self, value, row):
+                return self.model.objects.filter(birthday=row['birthday'])
+
+        widget = BirthdayWidget(Author, 'name')
+        cache = {}
+        with self.assertNumQueries(0):
+            widget.prefetch(['Foo'], cache=cache)
+        self.assertFalse(cache)
+
+    def test_clean_row_dependent_queryset_not_cached(self):
+        class BirthdayWidget(widgets.ForeignKeyWidget):
+            def get_queryset(self, value, row):
+                return self.model.objects.filter(birthday=row['birthday'])
+
+        widget = BirthdayWidget(Author, 'name')
+        row = {'birthday': self.author.birthday}
+        cache = {}
+        with self.assertNumQueries(2):
+            widget.clean('Foo', row, cache=cache)
+            widget.clean('Foo', row, cache=cache)
+
 
 class ManyToManyWidget(TestCase):
 
@@ -203,6 +434,50 @@ class ManyToManyWidget(TestCase):
         self.assertEqual(len(cleaned_data), 1)
         self.assertIn(self.cat1, cleaned_data)
 
+    def test_resolve(self):
+        value = "%s,%s" % (self.cat1.pk, self.cat2.pk)
+        cache = {}
+        with self.assertNumQueries(1):
+            self.assertEqual(self.widget.resolve(value, cache=cache),
+                             [self.cat1, self.cat2])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.widget.resolve(value, cache=cache),
+                             [self.cat1, self.cat2])
+        self.assertEqual(self.widget.resolve(''), [])
+
+    def test_prefetch(self):
+        values = ["%s,%s" % (self.cat1.pk, self.cat2.pk), self.cat1.pk, '',
+                  "%s,999" % self.cat2.pk]
+        cache = {}
+        with self.assertNumQueries(1):
+            self.widget.prefetch(values, cache=cache)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.widget.resolve(values[0], cache=cache),
+                             [self.cat1, self.cat2])
+            self.assertEqual(self.widget.resolve(values[1], cache=cache),
+                             [self.cat1])
+        with self.assertNumQueries(1):
+            self.assertEqual(self.widget.resolve(values[3], cache=cache),
+                             [self.cat2])
+
+    def test_prefetch_non_unique(self):
+        cat3 = Category.objects.create(name='Cat 2')
+        cache = {}
+        self.widget_name.prefetch(["Cat 2"], cache=cache)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.widget_name.resolve("Cat 2", cache=cache),
+                             [self.cat2, cat3])
+        self.assertEqual(self.widget_name.resolve("Cat 2"), [self.cat2, cat3])
+
+    def test_prefetch_name(self):
+        cache = {}
+        self.widget_name.prefetch(["Cat 2"], cache=cache)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.widget_name.resolve("Cat 2", cache=cache),
+                             [self.cat2])
+        with self.assertNumQueries(1):
+            self.widget_name.resolve("Cat 2")
+
     def test_render(self):
         self.assertEqual(self.widget.render(Category.objects),
                          "%s,%s" % (self.cat1.pk, self.cat2.pk))